@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+import numpy as np
+
+from .conversions.base import ConversionDefinition
+from .conversions.batch import Decoded, Staged, finish_staged
+from .conversions.registry import conversion_infos
+from .core.executor import PIPELINE_DEPTH
+from .core.image_io import ImageSource, keep_levels_async, open_source, wait_saves
+from .core.trace import ItemTrace, Tracer, now_us
+from .models.config import GlobalConfig
+
+# Converting images held in memory, for pipelines that embed the conversions
+# rather than exchanging files with them. Inputs are arrays, Pillow images or
+# the bytes of encoded files; outputs come back as arrays, or as the bytes of
+# the files a batch run would write. A MemoryJob holds what a job file does
+# apart from its folders. The options that only concern folders and files
+# (incremental runs, resume, deduplication, caches, streaming, traces, the
+# worker pool) do not apply.
+#
+#   from SWBF2ImageTools.api import MemoryJob, convert
+#
+#   result = convert({"CS": cs_rgba, "NAM": nam_png_bytes})
+#   orm = result.outputs["ORM"]
+
+_DEFAULT_GLOBAL = GlobalConfig(out_ext="png", tga_rle=False)
+
+
+@dataclass(frozen=True)
+class MemoryJob:
+    conversion: str = "csnam_to_cnorm"
+    settings: Mapping[str, Any] = field(default_factory=dict)  # as in a job file; defaults for the rest
+    global_cfg: GlobalConfig = _DEFAULT_GLOBAL
+    encode: bool = False  # outputs as the bytes of global_cfg.out_ext files rather than as pixels
+
+
+@dataclass(frozen=True)
+class MemoryResult:
+    key: str
+    ok: bool
+    error: Optional[str] = None
+    # "C", "C_LOD1", "N", ...: (h, w) or (h, w, c) uint8 pixels, or bytes with encode.
+    # Pixels are what would be encoded: capped, compacted, never sharing memory with the inputs.
+    outputs: dict[str, Any] = field(default_factory=dict)
+    channels: Optional[dict[str, Any]] = None  # channel report entry (see core/channels.py)
+    trace: Optional[ItemTrace] = None
+
+
+_conversions: dict[str, ConversionDefinition] = {}
+
+
+def _conversion(conversion_id: str) -> ConversionDefinition:
+    conv = _conversions.get(conversion_id)
+    if conv is None:
+        info = next((info for info in conversion_infos() if info.id == conversion_id), None)
+        if info is None:
+            raise ValueError(f"Unknown conversion: {conversion_id}")
+        conv = _conversions[conversion_id] = info.load()
+    return conv
+
+
+def _prepare(job: MemoryJob) -> tuple[ConversionDefinition, Any]:
+    conv = _conversion(job.conversion)
+    # The folders of the job are never read or written; they only name outputs in traces.
+    cfg = conv.job_config_from_settings(Path(), Path(), job.global_cfg, job.settings)
+    return conv, cfg
+
+
+# (output names by suffix with their pending levels, pending saves, packed input)
+_Started = tuple[dict[str, tuple[list[str], "Future[list[Any]]"]], list["Future[Any]"], Staged]
+
+
+def _start(conv: ConversionDefinition, cfg: Any, job: MemoryJob, key: str, images: Mapping[str, ImageSource]) -> _Started:
+    """Open the images of one input, pack its outputs and start keeping (or encoding) them."""
+    expected = ", ".join(conv.input_suffixes)
+    missing = [s for s in conv.input_suffixes if s not in images]
+    if missing:
+        raise ValueError(f"{key}: {conv.id} needs images {expected}; {', '.join(missing)} missing")
+    unknown = sorted(set(images) - set(conv.input_suffixes))
+    if unknown:
+        raise ValueError(f"{key}: {conv.id} takes images {expected}, not {', '.join(unknown)}")
+
+    g = cfg.global_cfg
+    tracer = Tracer(key)
+    start = now_us()
+    handles = tuple(open_source(images[s], f"{key}_{s}") for s in conv.input_suffixes)
+    kept: dict[str, tuple[list[str], Future[list[Any]]]] = {}
+
+    def save(suffix: str, kind: str, arr: np.ndarray) -> Future[list[Any]]:
+        names = [suffix] + [f"{suffix}_LOD{n}" for n in range(1, g.lod_levels + 1)]
+        fut = keep_levels_async(arr, names, g, kind, job.encode, tracer)
+        kept[suffix] = (names, fut)
+        return fut
+
+    pending, staged = conv.convert_images(key, Decoded(tracer, start, handles), cfg, save)
+    return kept, pending, staged
+
+
+def _finish(key: str, started: _Started) -> MemoryResult:
+    kept, pending, staged = started
+    wait_saves(pending)
+    _outputs, trace, channels = finish_staged(staged)
+    outputs = {name: data for names, fut in kept.values() for name, data in zip(names, fut.result())}
+    return MemoryResult(key, True, outputs=outputs, channels=channels, trace=trace)
+
+
+def convert(images: Mapping[str, ImageSource], job: Optional[MemoryJob] = None, key: str = "image") -> MemoryResult:
+    """
+    Convert one input held in memory, given as its images by input suffix
+    ({"CS": ..., "NAM": ...} for CS/NAM → C/N/ORM). Raises ValueError for a
+    bad job or missing images, and whatever converting them raises.
+    """
+    job = job or MemoryJob()
+    conv, cfg = _prepare(job)
+    return _finish(key, _start(conv, cfg, job, key, images))
+
+
+def convert_many(
+    items: Iterable[tuple[str, Mapping[str, ImageSource]]],
+    job: Optional[MemoryJob] = None,
+    depth: int = PIPELINE_DEPTH,
+) -> Iterator[MemoryResult]:
+    """
+    Convert (key, images) items as they arrive, and yield each result in
+    order once its outputs are done. An item is packed while the outputs of
+    up to `depth` items before it are still being encoded; items are only
+    taken from `items` as fast as results are consumed. An item that fails
+    is yielded with its error and does not stop the rest. A bad job raises
+    ValueError when iteration starts.
+    """
+    job = job or MemoryJob()
+    conv, cfg = _prepare(job)
+    in_flight: deque[tuple[str, Optional[_Started], Optional[str]]] = deque()
+
+    def result(key: str, started: Optional[_Started], error: Optional[str]) -> MemoryResult:
+        if started is not None:
+            try:
+                return _finish(key, started)
+            except Exception as ex:
+                error = str(ex)
+        return MemoryResult(key, False, error=error)
+
+    for key, images in items:
+        try:
+            in_flight.append((key, _start(conv, cfg, job, key, images), None))
+        except Exception as ex:
+            in_flight.append((key, None, str(ex)))
+        while len(in_flight) > depth:
+            yield result(*in_flight.popleft())
+    while in_flight:
+        yield result(*in_flight.popleft())
@@ -1,14 +1,57 @@
 from __future__ import annotations
 
+import time
+
+_START = time.perf_counter()  # before Qt and the window are imported, for --startup-time
+
+import json
 import sys
+
+from PySide6.QtCore import QEvent, QObject
 from PySide6.QtWidgets import QApplication
 
 from .ui.main_window import MainWindow
 
+STARTUP_TIME_FLAG = "--startup-time"
+
+# Libraries the window should not need until a conversion is used.
+_HEAVY_MODULES = ("numpy", "PIL")
+
+
+class _StartupProbe(QObject):
+    """
+    Times start-up from the import of this module: imports done, window
+    constructed, first paint and ready (the selected conversion's settings
+    shown). Prints one JSON line with the phases in ms, then quits.
+    """
+
+    def __init__(self, window: MainWindow, imported: float) -> None:
+        super().__init__(window)
+        self._marks = {"imports": imported, "window": time.perf_counter()}
+        self._preloaded: list[str] = []
+        window.installEventFilter(self)
+        window.ready.connect(self._on_ready)
+
+    def eventFilter(self, obj, event) -> bool:
+        if event.type() == QEvent.Paint and "first_paint" not in self._marks:
+            self._marks["first_paint"] = time.perf_counter()
+            self._preloaded = [m for m in _HEAVY_MODULES if m in sys.modules]
+        return False
+
+    def _on_ready(self) -> None:
+        self._marks["ready"] = time.perf_counter()
+        phases = {f"{name}_ms": round((t - _START) * 1000, 1) for name, t in self._marks.items()}
+        print(json.dumps({"type": "startup", **phases, "loaded_before_paint": self._preloaded}), flush=True)
+        QApplication.quit()
+
 
 def main() -> None:
-    app = QApplication(sys.argv)
+    imported = time.perf_counter()
+    measure = STARTUP_TIME_FLAG in sys.argv
+    app = QApplication([a for a in sys.argv if a != STARTUP_TIME_FLAG])
     w = MainWindow()
+    if measure:
+        _StartupProbe(w, imported)
     w.show()
     raise SystemExit(app.exec())
 
@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Iterator, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+from .conversions.csnam_to_cnorm import DEFAULT_SETTINGS, CsNamToCnormConversion, _process_pair
+from .core.image_io import from_array, invert_band, open_image, pack_bands, resize_band, save_image
+from .models.config import GlobalConfig
+
+# Benchmark of the CS/NAM -> C/N/ORM pipeline on deterministic synthetic
+# textures. Every case runs in a fresh process so peak memory is per case.
+
+DEFAULT_SIZES = [512, 1024, 2048, 4096, 8192]
+OUTPUT_FORMATS = {
+    "png": GlobalConfig(out_ext="png", tga_rle=False),
+    "tga": GlobalConfig(out_ext="tga", tga_rle=False),
+    "tga-rle": GlobalConfig(out_ext="tga", tga_rle=True),
+    "dds": GlobalConfig(out_ext="dds", tga_rle=False),
+}
+DEFAULT_FORMATS = ["png", "tga", "tga-rle"]
+BASELINE_VERSION = 1
+# Slowdowns smaller than this are timer noise on sub-millisecond stages, whatever their ratio.
+DEFAULT_MIN_DELTA_MS = 2.0
+
+
+@dataclass(frozen=True)
+class BenchCase:
+    name: str
+    cs_size: int
+    nam_size: int
+    out_format: str
+
+
+@dataclass
+class StageTiming:
+    ms: float
+    mp_s: float
+    peak_mb: float
+
+
+@dataclass
+class CaseResult:
+    case: BenchCase
+    stages: dict[str, StageTiming] = field(default_factory=dict)
+    peak_rss_mb: Optional[float] = None
+
+
+# --- synthetic inputs ---
+
+def _synthetic_rgba(size: int, seed: int) -> np.ndarray:
+    """
+    Deterministic RGBA texture: per channel, a sum of a row and a column wave
+    plus fine noise. Built with NumPy only, so inputs do not change when Pillow
+    does, and compressible enough for encode timings to resemble real textures.
+    """
+    rng = np.random.default_rng(seed)
+    out = np.empty((size, size, 4), dtype=np.uint8)
+    coords = np.arange(size, dtype=np.float64) / size
+    for c in range(4):
+        fx, fy = rng.uniform(1.0, 8.0, 2)
+        px, py = rng.uniform(0.0, 2 * np.pi, 2)
+        rows = ((np.sin(coords * fy * 2 * np.pi + py) + 1) * 59.5).astype(np.uint8)
+        cols = ((np.sin(coords * fx * 2 * np.pi + px) + 1) * 59.5).astype(np.uint8)
+        np.add(rows[:, None], cols[None, :], out=out[..., c])
+        out[..., c] += rng.integers(0, 16, (size, size), dtype=np.uint8)
+    return out
+
+
+def synthetic_pair(work_dir: Path, cs_size: int, nam_size: int, seed: int = 0) -> tuple[str, Path, Path]:
+    """Write (or reuse) a _CS/_NAM PNG pair and return (prefix, cs_path, nam_path)."""
+    inputs = work_dir / "inputs"
+    inputs.mkdir(parents=True, exist_ok=True)
+    prefix = f"bench_{cs_size}_{nam_size}_s{seed}"
+    paths = []
+    for suffix, size, sub_seed in (("CS", cs_size, seed * 2), ("NAM", nam_size, seed * 2 + 1)):
+        path = inputs / f"{prefix}_{suffix}.png"
+        if not path.exists():
+            tmp = path.with_name(path.name + ".tmp")
+            Image.fromarray(_synthetic_rgba(size, sub_seed)).save(tmp, format="PNG", compress_level=1)
+            os.replace(tmp, path)
+        paths.append(path)
+    return prefix, paths[0], paths[1]
+
+
+def default_cases(sizes: Sequence[int], formats: Sequence[str]) -> list[BenchCase]:
+    """Matched pairs for every size, plus a half-size _CS that takes the resize path."""
+    cases = []
+    for size in sizes:
+        for fmt in formats:
+            cases.append(BenchCase(f"{size}_{fmt}", size, size, fmt))
+            cases.append(BenchCase(f"{size // 2}x{size}_{fmt}", size // 2, size, fmt))
+    return cases
+
+
+# --- measurement ---
+
+@contextmanager
+def _stage(stages: dict[str, StageTiming], name: str, pixels: int) -> Iterator[None]:
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - base
+    stages[name] = StageTiming(
+        ms=elapsed * 1000,
+        mp_s=(pixels / 1e6) / elapsed if elapsed > 0 else 0.0,
+        peak_mb=max(0, peak) / (1 << 20),
+    )
+
+
+def _best(runs: list[dict[str, StageTiming]]) -> dict[str, StageTiming]:
+    """Fastest run of each stage; peak memory is the largest seen."""
+    out: dict[str, StageTiming] = {}
+    for name in runs[0]:
+        timings = [r[name] for r in runs]
+        fastest = min(timings, key=lambda t: t.ms)
+        out[name] = StageTiming(fastest.ms, fastest.mp_s, max(t.peak_mb for t in timings))
+    return out
+
+
+def _run_stages(case: BenchCase, cs_path: Path, nam_path: Path, out_dir: Path) -> dict[str, StageTiming]:
+    """Run the steps of _process_pair one at a time, encoding synchronously so each output is timed alone."""
+    g = OUTPUT_FORMATS[case.out_format]
+    s = DEFAULT_SETTINGS
+    ext = g.out_ext
+    stages: dict[str, StageTiming] = {}
+    cs_px = case.cs_size * case.cs_size
+    nam_px = case.nam_size * case.nam_size
+
+    with open_image(cs_path) as cs, open_image(nam_path) as nam:
+        with _stage(stages, "decode_cs", cs_px):
+            c_rgb = cs.rgb()
+        with _stage(stages, "encode_c", cs_px):
+            save_image(from_array(c_rgb), out_dir / f"bench_C.{ext}", g, "color")
+        del c_rgb
+
+        with _stage(stages, "decode_nam", nam_px):
+            nam.band("R")
+        if cs.size != nam.size:
+            with _stage(stages, "resize", nam_px):
+                smooth = resize_band(cs.band(s["smooth_channel"]), nam.size)
+        else:
+            smooth = np.array(cs.band(s["smooth_channel"]))
+        cs.close()
+
+        with _stage(stages, "pack_n", nam_px):
+            n = pack_bands([nam.band("R"), nam.band("G"), 255], nam.size)
+        with _stage(stages, "encode_n", nam_px):
+            save_image(from_array(n), out_dir / f"bench_N.{ext}", g, "normal")
+        del n
+
+        with _stage(stages, "pack_orm", nam_px):
+            orm = pack_bands([nam.band(s["ao_channel"]), smooth, nam.band(s["metallic_channel"])], nam.size)
+        with _stage(stages, "invert", nam_px):
+            invert_band(orm[..., 1], out=orm[..., 1])
+        with _stage(stages, "encode_orm", nam_px):
+            save_image(from_array(orm), out_dir / f"bench_ORM.{ext}", g, "data")
+    return stages
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_case(case: BenchCase, cs_path: Path, nam_path: Path, out_dir: Path, repeat: int) -> CaseResult:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    job = CsNamToCnormConversion().job_config_from_settings(nam_path.parent, out_dir, OUTPUT_FORMATS[case.out_format], {})
+    prefix = "bench"
+
+    tracemalloc.start()
+    try:
+        stage_runs = [_run_stages(case, cs_path, nam_path, out_dir) for _ in range(repeat)]
+        pair_runs = []
+        for _ in range(repeat):
+            timings: dict[str, StageTiming] = {}
+            with _stage(timings, "process_pair", case.nam_size * case.nam_size):
+                _process_pair(prefix, cs_path, nam_path, job)
+            pair_runs.append(timings)
+    finally:
+        tracemalloc.stop()
+
+    result = CaseResult(case, stages={**_best(stage_runs), **_best(pair_runs)})
+    result.peak_rss_mb = _peak_rss_mb()
+    return result
+
+
+def run_benchmarks(cases: Sequence[BenchCase], work_dir: Path, repeat: int = 3, seed: int = 0, log=print) -> list[CaseResult]:
+    """Run every case in its own spawned process and return the results in order."""
+    results = []
+    ctx = get_context("spawn")
+    for case in cases:
+        _, cs_path, nam_path = synthetic_pair(work_dir, case.cs_size, case.nam_size, seed)
+        log(f"{case.name}: running")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results.append(pool.submit(_run_case, case, cs_path, nam_path, work_dir / "outputs" / case.name, repeat).result())
+    return results
+
+
+# --- start-up ---
+
+STARTUP_PHASES = ("imports", "window", "first_paint", "ready")
+
+
+def run_startup(repeat: int = 3, log=print) -> CaseResult:
+    """
+    Start the window in --startup-time mode `repeat` times, each in a fresh
+    interpreter, and report the fastest time to each phase plus the whole
+    process. Needs a display, or QT_QPA_PLATFORM=offscreen.
+    """
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-m", f"{__package__}.app", "--startup-time"],
+            capture_output=True, text=True, check=True,
+        )
+        process_ms = (time.perf_counter() - start) * 1000
+        report = next(json.loads(line) for line in proc.stdout.splitlines() if line.startswith('{"type": "startup"'))
+        if report["loaded_before_paint"]:
+            log(f"startup: {', '.join(report['loaded_before_paint'])} imported before the window was painted")
+        stages = {name: StageTiming(report[f"{name}_ms"], 0.0, 0.0) for name in STARTUP_PHASES}
+        stages["process"] = StageTiming(process_ms, 0.0, 0.0)
+        runs.append(stages)
+    return CaseResult(BenchCase("startup", 0, 0, "gui"), _best(runs))
+
+
+# --- reporting and baselines ---
+
+def results_to_json(results: Sequence[CaseResult], repeat: int, seed: int) -> dict[str, Any]:
+    import PIL
+
+    return {
+        "version": BASELINE_VERSION,
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": [
+            {
+                "case": r.case.name,
+                "cs_size": r.case.cs_size,
+                "nam_size": r.case.nam_size,
+                "format": r.case.out_format,
+                "peak_rss_mb": None if r.peak_rss_mb is None else round(r.peak_rss_mb, 1),
+                "stages": {
+                    name: {"ms": round(t.ms, 2), "mp_s": round(t.mp_s, 2), "peak_mb": round(t.peak_mb, 1)}
+                    for name, t in r.stages.items()
+                },
+            }
+            for r in results
+        ],
+    }
+
+
+def compare_to_baseline(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float,
+    min_delta_ms: float = DEFAULT_MIN_DELTA_MS,
+) -> list[str]:
+    """
+    Human-readable lines for every stage more than `threshold` (fraction)
+    and more than `min_delta_ms` slower than the baseline.
+    """
+    base_cases = {r["case"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for r in current["results"]:
+        base = base_cases.get(r["case"])
+        if base is None:
+            continue
+        for name, t in r["stages"].items():
+            b = base["stages"].get(name)
+            if b is None or b["ms"] <= 0:
+                continue
+            ratio = t["ms"] / b["ms"]
+            if ratio > 1 + threshold and t["ms"] - b["ms"] > min_delta_ms:
+                regressions.append(f"{r['case']} {name}: {b['ms']:.1f} ms -> {t['ms']:.1f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def _print_table(data: dict[str, Any], baseline: Optional[dict[str, Any]]) -> None:
+    base_cases = {r["case"]: r for r in (baseline or {}).get("results", [])}
+    print(f"{'case':<22}{'stage':<14}{'ms':>10}{'MP/s':>10}{'peak MB':>10}{'vs base':>10}")
+    for r in data["results"]:
+        base = base_cases.get(r["case"], {}).get("stages", {})
+        for name, t in r["stages"].items():
+            delta = ""
+            if name in base and base[name]["ms"] > 0:
+                delta = f"{t['ms'] / base[name]['ms']:.2f}x"
+            print(f"{r['case']:<22}{name:<14}{t['ms']:>10.1f}{t['mp_s']:>10.1f}{t['peak_mb']:>10.1f}{delta:>10}")
+        if r["peak_rss_mb"] is not None:
+            print(f"{r['case']:<22}{'peak RSS':<14}{'':>10}{'':>10}{r['peak_rss_mb']:>10.1f}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="swbf2-image-tools-bench",
+        description="Benchmark the CS/NAM pipeline on deterministic synthetic textures.",
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Texture sizes in px (default: 512 ... 8192).")
+    parser.add_argument("--formats", nargs="+", choices=list(OUTPUT_FORMATS), default=DEFAULT_FORMATS, help="Output formats (default: png tga tga-rle).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the fastest is reported (default: 3).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic textures.")
+    parser.add_argument("--work-dir", default="bench-work", help="Where synthetic inputs are cached and outputs written.")
+    parser.add_argument("--json", dest="json_out", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against a JSON file written by --json.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown vs the baseline reported as a regression (default: 0.10).")
+    parser.add_argument("--min-delta", dest="min_delta_ms", type=float, metavar="MS", default=DEFAULT_MIN_DELTA_MS, help=f"Smallest slowdown in ms reported as a regression, however large the ratio (default: {DEFAULT_MIN_DELTA_MS:g}).")
+    parser.add_argument("--startup", action="store_true", help="Time the window's start-up instead of the pipeline (needs a display, or QT_QPA_PLATFORM=offscreen).")
+    args = parser.parse_args(argv)
+
+    log = lambda m: print(m, file=sys.stderr)
+    if args.startup:
+        results = [run_startup(max(1, args.repeat), log=log)]
+    else:
+        cases = default_cases(args.sizes, args.formats)
+        results = run_benchmarks(cases, Path(args.work_dir), max(1, args.repeat), args.seed, log=log)
+    data = results_to_json(results, max(1, args.repeat), args.seed)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    _print_table(data, baseline)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    if baseline is not None:
+        regressions = compare_to_baseline(data, baseline, args.threshold, args.min_delta_ms)
+        for line in regressions:
+            print(f"regression: {line}")
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import MISSING, asdict, fields
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+from .conversions.base import ConversionDefinition, DetectedInput, duplicate_savings
+from .conversions.registry import ConversionInfo, conversion_infos
+from .core.dedup import DEDUP_MODES
+from .core.executor import clamp_workers, default_workers
+from .core.manifest import Manifest
+from .core.watch import WATCH_POLL_S, WATCH_SETTLE_S, InputWatcher
+from .models.config import DDS_COLOR_FORMATS, DDS_QUALITIES, DOWNSCALE_FILTERS, ENCODER_PROFILES, STREAMING_MODES, GlobalConfig
+
+SUPPORTED_FORMATS = ["png", "tga", "dds"]
+
+
+def _settings_flag(key: str) -> str:
+    return "--" + key.replace("_", "-")
+
+
+def _load_job_file(path: Optional[str]) -> dict[str, Any]:
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"Job file must contain a JSON object: {path}")
+    return data
+
+
+def _build_parser(infos: Sequence[ConversionInfo], conv: ConversionDefinition) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="swbf2-image-tools-cli",
+        description="Headless batch conversion of Frosty texture exports (no Qt required).",
+    )
+    parser.add_argument("input_folder", nargs="?", help="Folder containing the exported textures.")
+    parser.add_argument("-o", "--output", dest="output_folder", help="Output folder (defaults to the input folder).")
+    parser.add_argument("--job", help="JSON job file with conversion, folders, global and conversion settings.")
+    parser.add_argument(
+        "--conversion",
+        choices=[info.id for info in infos],
+        help=f"Conversion to run (default: {infos[0].id}).",
+    )
+    parser.add_argument("--recursive", action=argparse.BooleanOptionalAction, default=argparse.SUPPRESS, help="Also detect inputs in subfolders; outputs keep the same subfolders (default: on).")
+    parser.add_argument("--list-conversions", action="store_true", help="Print the available conversions and exit.")
+    parser.add_argument("--format", dest="out_ext", choices=SUPPORTED_FORMATS, default=argparse.SUPPRESS, help="Output format.")
+    parser.add_argument("--encoder-profile", choices=ENCODER_PROFILES, default=argparse.SUPPRESS, help="PNG encoder speed/size trade-off (default: balanced).")
+    parser.add_argument("--dds-format", choices=DDS_COLOR_FORMATS, default=argparse.SUPPRESS, help="DDS block format for colour and packed outputs; normal maps are always BC5 (default: bc7).")
+    parser.add_argument("--dds-mips", action=argparse.BooleanOptionalAction, default=argparse.SUPPRESS, help="Write the DDS mip chain (default: on).")
+    parser.add_argument("--dds-quality", choices=DDS_QUALITIES, default=argparse.SUPPRESS, help="DDS block compression speed/quality trade-off (default: balanced).")
+    parser.add_argument("--max-size", type=int, metavar="PX", default=argparse.SUPPRESS, help="Scale outputs down so their longest side is at most PX (default: 0 = full resolution).")
+    parser.add_argument("--lod-levels", type=int, metavar="N", default=argparse.SUPPRESS, help="Also write N levels (_LOD1, _LOD2, ...) of each output, each half the size of the previous (default: 0).")
+    parser.add_argument("--downscale-filter", choices=DOWNSCALE_FILTERS, default=argparse.SUPPRESS, help="Filter for capped outputs and LOD levels; reduce and box are faster for large factors (default: lanczos).")
+    parser.add_argument("--compact", dest="compact_outputs", action=argparse.BooleanOptionalAction, default=argparse.SUPPRESS, help="Write grayscale colour outputs single-channel, losslessly (PNG/TGA; default: off).")
+    parser.add_argument("--tga-rle", action=argparse.BooleanOptionalAction, default=argparse.SUPPRESS, help="TGA RLE compression.")
+    parser.add_argument("--workers", type=int, default=argparse.SUPPRESS, help="Pairs processed in parallel.")
+    parser.add_argument("--memory-budget", dest="memory_budget_mb", type=int, metavar="MB", default=argparse.SUPPRESS, help="RAM for pairs in flight across workers (default: 0 = 60%% of physical RAM).")
+    parser.add_argument("--streaming", choices=STREAMING_MODES, default=argparse.SUPPRESS, help="Convert pairs in row strips to bound memory; auto streams pairs of 8K and above (default: auto).")
+    parser.add_argument("--decode-cache", dest="decode_cache_mb", type=int, metavar="MB", default=argparse.SUPPRESS, help="Keep up to MB of decoded inputs in memory, so watch mode does not decode the unchanged file of a pair again (default: 0 = off).")
+    parser.add_argument("--disk-cache", dest="disk_cache_mb", type=int, metavar="MB", default=argparse.SUPPRESS, help="Keep up to MB of decoded inputs on disk across runs, memory-mapped instead of decoded again (default: 0 = off).")
+    parser.add_argument("--disk-cache-dir", default=argparse.SUPPRESS, help="Folder of the disk cache (default: the per-user cache folder).")
+    parser.add_argument("--incremental", action=argparse.BooleanOptionalAction, default=argparse.SUPPRESS, help="Skip inputs whose outputs are up to date.")
+    parser.add_argument("--dedup", choices=DEDUP_MODES, default=argparse.SUPPRESS, help="Convert byte-identical inputs once and hard link (or copy) the outputs for the rest (default: link).")
+    parser.add_argument("--resume", action=argparse.BooleanOptionalAction, default=argparse.SUPPRESS, help="Skip inputs an interrupted or failed run of the same job already converted (default: on).")
+    parser.add_argument("--retries", type=int, metavar="N", default=argparse.SUPPRESS, help="Extra attempts for inputs that fail (default: 0).")
+    parser.add_argument("--trace", action=argparse.BooleanOptionalAction, default=argparse.SUPPRESS, help="Write a Chrome trace of per-stage timings to the output folder.")
+    parser.add_argument("--watch", action="store_true", help="After converting, keep watching the input folder and convert inputs again as they are exported, until interrupted.")
+    parser.add_argument("--watch-interval", type=float, metavar="S", default=WATCH_POLL_S, help=f"Seconds between polls of the input folder in watch mode (default: {WATCH_POLL_S:g}).")
+    parser.add_argument("--watch-settle", type=float, metavar="S", default=WATCH_SETTLE_S, help=f"Seconds both files of an input must stay unchanged before it is converted in watch mode (default: {WATCH_SETTLE_S:g}).")
+    parser.add_argument("--verify", action="store_true", help="Report stale or deleted outputs recorded in the output folder's manifest and exit.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not print progress to stderr.")
+
+    group = parser.add_argument_group(f"{conv.display_name} settings")
+    for key, default in conv.default_settings().items():
+        if isinstance(default, bool):
+            group.add_argument(_settings_flag(key), dest=f"setting:{key}", action=argparse.BooleanOptionalAction, default=argparse.SUPPRESS, help=f"(default: {default})")
+        else:
+            group.add_argument(_settings_flag(key), dest=f"setting:{key}", type=type(default), metavar=key.upper(), default=argparse.SUPPRESS, help=f"(default: {default})")
+
+    return parser
+
+
+def _global_config(job: dict[str, Any], args: argparse.Namespace) -> GlobalConfig:
+    # GlobalConfig's own defaults, plus the fields it has none for and a worker per CPU.
+    values: dict[str, Any] = {f.name: f.default for f in fields(GlobalConfig) if f.default is not MISSING}
+    values.update(out_ext="png", tga_rle=False, workers=default_workers())
+    known = {f.name for f in fields(GlobalConfig)}
+    file_values = job.get("global", {})
+    unknown = set(file_values) - known
+    if unknown:
+        raise ValueError(f"Unknown global settings: {', '.join(sorted(unknown))}")
+    values.update(file_values)
+    for name in known:
+        if name in vars(args):
+            values[name] = getattr(args, name)
+
+    values["out_ext"] = str(values["out_ext"]).lower()
+    if values["out_ext"] not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported output format: {values['out_ext']}")
+    if values["out_ext"] != "tga":
+        values["tga_rle"] = False
+    if values["encoder_profile"] not in ENCODER_PROFILES:
+        raise ValueError(f"Unsupported encoder profile: {values['encoder_profile']}")
+    values["dds_format"] = str(values["dds_format"]).lower()
+    if values["dds_format"] not in DDS_COLOR_FORMATS:
+        raise ValueError(f"Unsupported DDS format: {values['dds_format']}")
+    if values["dds_quality"] not in DDS_QUALITIES:
+        raise ValueError(f"Unsupported DDS quality: {values['dds_quality']}")
+    values["workers"] = clamp_workers(values["workers"])
+    values["memory_budget_mb"] = max(0, int(values["memory_budget_mb"]))
+    if values["downscale_filter"] not in DOWNSCALE_FILTERS:
+        raise ValueError(f"Unsupported downscale filter: {values['downscale_filter']}")
+    for name in ("max_size", "lod_levels"):
+        values[name] = max(0, int(values[name]))
+    if values["dedup"] not in DEDUP_MODES:
+        raise ValueError(f"Unsupported dedup mode: {values['dedup']}")
+    for name in ("decode_cache_mb", "disk_cache_mb"):
+        values[name] = max(0, int(values[name]))
+    values["retries"] = max(0, int(values["retries"]))
+    return GlobalConfig(**values)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    infos = conversion_infos()
+    by_id = {info.id: info for info in infos}
+
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("--job")
+    pre.add_argument("--conversion")
+    pre_args, _ = pre.parse_known_args(argv)
+
+    try:
+        job = _load_job_file(pre_args.job)
+    except (OSError, ValueError) as ex:
+        print(f"error: {ex}", file=sys.stderr)
+        raise SystemExit(2)
+
+    conv_id = pre_args.conversion or job.get("conversion") or infos[0].id
+    if conv_id not in by_id:
+        print(f"error: unknown conversion: {conv_id}", file=sys.stderr)
+        raise SystemExit(2)
+    conv = by_id[conv_id].load()  # only the conversion that runs is imported
+
+    parser = _build_parser(infos, conv)
+    args = parser.parse_args(argv)
+
+    if args.list_conversions:
+        for c in (info.load() for info in infos):
+            print(json.dumps({"id": c.id, "display_name": c.display_name, "settings": c.default_settings()}))
+        return
+
+    input_folder = args.input_folder or job.get("input_folder")
+    if not input_folder:
+        parser.error("an input folder is required (positional argument or job file 'input_folder')")
+    input_path = Path(input_folder)
+    if not input_path.is_dir():
+        parser.error(f"input folder does not exist: {input_path}")
+
+    output_path = Path(args.output_folder or job.get("output_folder") or input_path)
+    if output_path.exists() and not output_path.is_dir():
+        parser.error(f"output path exists but is not a folder: {output_path}")
+
+    if args.verify:
+        problems = Manifest.load(output_path).verify()
+        for key, reason in problems:
+            print(json.dumps({"type": "stale", "key": key, "reason": reason}))
+        print(json.dumps({"type": "summary", "stale": len(problems)}))
+        raise SystemExit(1 if problems else 0)
+
+    settings = dict(job.get("settings", {}))
+    for dest, value in vars(args).items():
+        if dest.startswith("setting:"):
+            settings[dest[len("setting:"):]] = value
+
+    try:
+        global_cfg = _global_config(job, args)
+        cfg = conv.job_config_from_settings(input_path, output_path, global_cfg, settings)
+    except (TypeError, ValueError) as ex:
+        parser.error(str(ex))
+
+    recursive = bool(getattr(args, "recursive", job.get("recursive", True)))
+    detected = conv.detect_inputs(input_path, recursive=recursive)
+    # Taken right after detection, so inputs exported while the first batch
+    # runs are picked up by the first poll.
+    watcher = InputWatcher(conv, input_path, recursive, settle_s=args.watch_settle) if args.watch else None
+
+    def progress_cb(done: int, total: int) -> None:
+        if not args.quiet:
+            print(f"[{done}/{total}]", file=sys.stderr)
+
+    def status_cb(msg: str) -> None:
+        if not args.quiet:
+            print(msg, file=sys.stderr)
+
+    failed = _run_and_report(conv, detected, cfg, progress_cb, status_cb)
+    if watcher is None:
+        raise SystemExit(1 if failed else 0)
+
+    status_cb(f"Watching {input_path} for exported inputs (Ctrl+C to stop).")
+    try:
+        while True:
+            time.sleep(args.watch_interval)
+            ready = watcher.poll()
+            if ready:
+                status_cb(f"Changed: {', '.join(item.key for item in ready)}")
+                _run_and_report(conv, ready, cfg, progress_cb, status_cb)
+    except KeyboardInterrupt:
+        status_cb("Stopped watching.")
+    raise SystemExit(0)
+
+
+def _run_and_report(
+    conv: ConversionDefinition,
+    detected: Sequence[DetectedInput],
+    cfg: Any,
+    progress_cb: Callable[[int, int], None],
+    status_cb: Callable[[str], None],
+) -> int:
+    """Convert inputs, print one JSON line per input and a summary line; returns the number that failed."""
+    start = time.perf_counter()
+    results = conv.run(detected, cfg, progress_cb, status_cb)
+    elapsed = time.perf_counter() - start
+
+    for r in results:
+        print(json.dumps({"type": "item", **asdict(r)}), flush=True)
+    failed = sum(1 for r in results if not r.ok)
+    converted = sum(1 for r in results if r.ok and not r.skipped and not r.duplicate_of)
+    deduplicated, seconds_saved, bytes_saved = duplicate_savings(results)
+    print(json.dumps({
+        "type": "summary",
+        "conversion": conv.id,
+        "total": len(results),
+        "ok": len(results) - failed,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "pairs_per_s": round(converted / elapsed, 3) if elapsed > 0 else 0.0,
+        "bytes_read": sum(r.bytes_read for r in results),
+        "bytes_written": sum(r.bytes_written for r in results),
+        "deduplicated": deduplicated,
+        "seconds_saved": round(seconds_saved, 3),
+        "bytes_saved": bytes_saved,
+    }), flush=True)
+    return failed
+
+if __name__ == "__main__":
+    main()
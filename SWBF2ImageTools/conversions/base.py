@@ -2,9 +2,18 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Callable, Protocol, Sequence
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Mapping, Optional, Protocol, Sequence
 
-from PySide6.QtWidgets import QWidget
+from ..core.trace import ItemTrace
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    import numpy as np
+    from PySide6.QtWidgets import QWidget
+
+    from ..core.decoded_cache import DecodedCache
+    from .batch import Decoded, SaveOutput, Staged
 
 
 @dataclass(frozen=True)
@@ -14,9 +23,55 @@ class DetectedInput:
     payload: Any
 
 
+@dataclass(frozen=True)
+class ItemResult:
+    key: str
+    ok: bool
+    error: Optional[str] = None
+    outputs: tuple[str, ...] = ()
+    skipped: bool = False  # outputs were already up to date
+    seconds: float = 0.0  # wall time spent converting this input
+    bytes_read: int = 0
+    bytes_written: int = 0
+    duplicate_of: Optional[str] = None  # key of the input with identical content whose outputs were reused
+
+
+def duplicate_savings(results: Sequence[ItemResult]) -> tuple[int, float, int]:
+    """
+    (inputs deduplicated, seconds saved, bytes of reads and writes saved),
+    taking each duplicate to cost what converting the original did.
+    """
+    by_key = {r.key: r for r in results}
+    count, seconds, nbytes = 0, 0.0, 0
+    for r in results:
+        original = by_key.get(r.duplicate_of) if r.duplicate_of else None
+        if original is None:
+            continue
+        count += 1
+        seconds += original.seconds
+        nbytes += original.bytes_read + original.bytes_written
+    return count, seconds, nbytes
+
+
+def summarize_duplicates(results: Sequence[ItemResult]) -> Optional[str]:
+    count, seconds, nbytes = duplicate_savings(results)
+    if not count:
+        return None
+    return f"{count} duplicate inputs reused converted outputs, saving ~{seconds:.1f} s and {nbytes / (1 << 20):.0f} MB of reads and writes."
+
+
+def summarize_failures(results: Sequence[ItemResult]) -> Optional[str]:
+    failed = [r for r in results if not r.ok]
+    if not failed:
+        return None
+    lines = [f"{r.key}: {r.error}" for r in failed]
+    return f"{len(failed)} of {len(results)} inputs failed:\n" + "\n".join(lines)
+
+
 class ConversionDefinition(Protocol):
     id: str
     display_name: str
+    input_suffixes: tuple[str, ...]  # the files one input is converted from, key_suffix each
 
     def build_settings_widget(self) -> QWidget:
         ...
@@ -24,17 +79,81 @@ class ConversionDefinition(Protocol):
     def set_settings_enabled(self, enabled: bool) -> None:
         ...
 
-    def detect_inputs(self, input_folder: Path) -> list[DetectedInput]:
+    def on_settings_changed(self, callback: Callable[[], None]) -> None:
+        """Call callback whenever a setting in the settings widget changes."""
+        ...
+
+    def scan_inputs(self, input_folder: Path, recursive: bool = True) -> Iterator[list[DetectedInput]]:
+        """
+        Yield detected inputs in batches as the folder (and, if recursive, its
+        subfolders) is scanned, so callers can show them before the scan ends.
+        """
+        ...
+
+    def detect_inputs(self, input_folder: Path, recursive: bool = True) -> list[DetectedInput]:
+        """Every input scan_inputs finds, in scan order."""
+        ...
+
+    def input_files(self, item: DetectedInput) -> tuple[Path, ...]:
+        """The files an input is converted from; watch mode converts it again when one of them changes."""
         ...
 
     def make_job_config(self, input_folder: Path, output_folder: Path, global_cfg: Any) -> Any:
         ...
 
+    def default_settings(self) -> dict[str, Any]:
+        ...
+
+    def job_config_from_settings(
+        self,
+        input_folder: Path,
+        output_folder: Path,
+        global_cfg: Any,
+        settings: Mapping[str, Any],
+    ) -> Any:
+        ...
+
+    def estimate_memory(self, item: DetectedInput, cfg: Any) -> int:
+        """Estimated peak bytes for converting one input, from image headers only."""
+        ...
+
+    def load_preview(self, item: DetectedInput, max_size: int, cache: Optional[DecodedCache] = None) -> Any:
+        """
+        Decode an input for render_preview, scaled down so no side exceeds
+        max_size. Slow; called off the GUI thread. Full-resolution decodes go
+        to cache, for run to reuse.
+        """
+        ...
+
+    def render_preview(self, sources: Any, cfg: Any) -> list[tuple[str, np.ndarray]]:
+        """
+        (output suffix, pixels) of every output, packed from load_preview
+        sources with the settings of cfg. Fast enough to call on every
+        settings change.
+        """
+        ...
+
+    def convert_images(self, key: str, decoded: Decoded, cfg: Any, save: SaveOutput) -> tuple[list[Future[Any]], Staged]:
+        """
+        Pack the outputs of one input from images already open, a handle per
+        input suffix, and hand each output to save instead of writing it
+        (see api.py). Returns the pending saves and the packed input.
+        """
+        ...
+
     def run(
         self,
         detected: Sequence[DetectedInput],
         cfg: Any,
         progress_cb: Callable[[int, int], None],
         status_cb: Callable[[str], None],
-    ) -> None:
+        trace_cb: Optional[Callable[[ItemTrace], None]] = None,
+        result_cb: Optional[Callable[[ItemResult], None]] = None,
+    ) -> list[ItemResult]:
+        """
+        Convert every detected input. trace_cb, if given, receives the span
+        timings and I/O counters of each input as soon as it finishes;
+        result_cb receives each input's ItemResult (converted, skipped or
+        failed) as soon as it is known.
+        """
         ...
@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+from concurrent.futures import Future
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+import numpy as np
+
+from ..core.channels import ChannelReport, constant_channels, constant_value, is_grayscale
+from ..core.decoded_cache import DecodedCache, shared_cache
+from ..core.dedup import find_duplicates, materialize
+from ..core.disk_cache import open_disk_cache
+from ..core.executor import is_worker_crash, map_budgeted, map_pipelined, resolve_memory_budget
+from ..core.image_io import ImageHandle, from_array, open_image, save_levels_async
+from ..core.journal import Journal
+from ..core.manifest import Manifest
+from ..core.trace import TRACE_NAME, ItemTrace, Tracer, file_size, job_span, now_us, write_chrome_trace
+from ..models.config import GlobalConfig, output_settings
+from .base import DetectedInput, ItemResult, summarize_duplicates
+
+# What every conversion shares once it knows how to convert one input: the
+# manifest and journal checks, deduplication, memory-budgeted scheduling over
+# the pipeline or the process pool, retries, the channel report and the
+# trace. A conversion describes its per-input steps with BatchSteps and hands
+# them to run_batch.
+
+# (outputs, trace, channel report entry or None) of a converted input.
+Converted = tuple[tuple[str, ...], ItemTrace, Optional[dict[str, Any]]]
+
+# Takes one packed output as (suffix, kind, pixels) and returns its pending write.
+SaveOutput = Callable[[str, str, np.ndarray], "Future[Any]"]
+
+
+@dataclass
+class Decoded:
+    """The input files of one input, decoded ahead of packing."""
+    tracer: Tracer
+    start_us: float
+    handles: tuple[ImageHandle, ...]
+
+
+@dataclass
+class Staged:
+    """A packed input whose outputs may still be encoding."""
+    outputs: tuple[str, ...]
+    trace: ItemTrace
+    tracer: Optional[Tracer] = None  # set when the "pair" span ends once the writes are done
+    start_us: float = 0.0
+    channels: Optional[dict[str, Any]] = None  # channel report entry (see core/channels.py)
+
+
+@dataclass(frozen=True)
+class BatchSteps:
+    """
+    How a conversion converts one input. args(item) are the leading arguments
+    of prefetch, transform and process; process runs in worker processes, so
+    it and its arguments must pickle.
+    """
+    input_files: Callable[[DetectedInput], dict[str, Path]]  # by suffix, for the manifest and journal
+    output_paths: Callable[[str], tuple[Path, ...]]  # every output of a key, in ItemResult.outputs order
+    args: Callable[[DetectedInput], tuple[Any, ...]]
+    prefetch: Callable[..., Optional[Decoded]]  # (*args, cache); None when transform converts unaided
+    transform: Callable[..., tuple[list[Future[None]], Staged]]  # (*args, decoded)
+    process: Callable[..., Converted]  # (*args): prefetch, transform and wait for the writes
+    estimate_memory: Callable[[DetectedInput], int]
+
+
+def output_levels(folder: Path, key: str, suffix: str, global_cfg: GlobalConfig) -> list[Path]:
+    """Path of one output (key_suffix) followed by its LOD levels (key_suffix_LOD1, ...)."""
+    ext = global_cfg.out_ext
+    stem = f"{key}_{suffix}"
+    return [folder / (f"{stem}.{ext}" if n == 0 else f"{stem}_LOD{n}.{ext}") for n in range(global_cfg.lod_levels + 1)]
+
+
+def save_to_files(folder: Path, key: str, global_cfg: GlobalConfig, tracer: Tracer) -> SaveOutput:
+    """Writes each output of key to folder, capped and with its LOD levels (see output_levels)."""
+
+    def save(suffix: str, kind: str, arr: np.ndarray) -> Future[None]:
+        return save_levels_async(from_array(arr), output_levels(folder, key, suffix, global_cfg), global_cfg, kind, tracer)
+
+    return save
+
+
+def compacts(global_cfg: GlobalConfig) -> bool:
+    """Whether outputs may be written with fewer channels; DDS block formats are fixed."""
+    return global_cfg.compact_outputs and global_cfg.out_ext.lower() in ("png", "tga")
+
+
+def channel_analysis(arr: np.ndarray, grayscale: bool = False) -> dict[str, Any]:
+    """Channel report of one output: its constant channels and, for colour, whether it is grayscale."""
+    found: dict[str, Any] = {}
+    constant = constant_channels(arr)
+    if constant:
+        found["constant"] = constant
+    if grayscale and is_grayscale(arr):
+        found["grayscale"] = True
+    return found
+
+
+class StripAnalysis:
+    """
+    channel_analysis of an output packed strip by strip: add every strip in
+    order, then read `found`. A channel is no longer checked after the first
+    strip where it differs, nor grayscale after the first strip that is not.
+    """
+
+    def __init__(self, grayscale: bool = False) -> None:
+        self._constant: Optional[dict[int, int]] = None  # channel -> value; None before the first strip
+        self._grayscale = grayscale
+
+    def add(self, rows: np.ndarray) -> None:
+        if self._constant is None:
+            found = {i: constant_value(rows[..., i]) for i in range(rows.shape[2])}
+            self._constant = {i: value for i, value in found.items() if value is not None}
+        else:
+            self._constant = {i: value for i, value in self._constant.items() if constant_value(rows[..., i]) == value}
+        if self._grayscale and not is_grayscale(rows):
+            self._grayscale = False
+
+    @property
+    def found(self) -> dict[str, Any]:
+        found: dict[str, Any] = {}
+        if self._constant:
+            found["constant"] = {"RGBA"[i]: value for i, value in self._constant.items()}
+        if self._grayscale and self._constant is not None:
+            found["grayscale"] = True
+        return found
+
+
+def decode_inputs(key: str, paths: Sequence[Path], global_cfg: GlobalConfig, cache: Optional[DecodedCache] = None) -> Decoded:
+    """
+    Read and decode the input files of one input, taking them from cache or
+    the configured disk cache when they have them.
+    """
+    tracer = Tracer(key)
+    start = now_us()
+    disk_cache = open_disk_cache(global_cfg.disk_cache_dir, global_cfg.disk_cache_mb)
+    with ExitStack() as stack:
+
+        def load(path: Path) -> ImageHandle:
+            with tracer.span("decode", input=path.name) as span_args:
+                handle = stack.enter_context(open_image(path, cache, disk_cache))
+                handle.load()
+                if handle.cache_hit:
+                    span_args["cached"] = handle.cache_hit
+            if handle.cache_hit is None:
+                tracer.add_read(file_size(path))
+            elif handle.cache_hit == "disk":
+                tracer.add_read(handle.nbytes)
+            return handle
+
+        handles = tuple(load(path) for path in paths)
+        stack.pop_all()
+    return Decoded(tracer, start, handles)
+
+
+def finish_staged(staged: Staged) -> Converted:
+    """Result of an input whose encodes are done."""
+    if staged.tracer is not None:
+        staged.tracer.add_span("pair", staged.start_us)
+    return staged.outputs, staged.trace, staged.channels
+
+
+def run_batch(
+    steps: BatchSteps,
+    detected: Sequence[DetectedInput],
+    job: Any,
+    progress_cb: Callable[[int, int], None],
+    status_cb: Callable[[str], None],
+    trace_cb: Optional[Callable[[ItemTrace], None]] = None,
+    result_cb: Optional[Callable[[ItemResult], None]] = None,
+) -> list[ItemResult]:
+    """ConversionDefinition.run for a conversion described by steps."""
+    total = len(detected)
+    if total == 0:
+        return []
+
+    items = list(detected)
+    results: dict[int, ItemResult] = {}
+    done = 0
+
+    def finish(i: int, result: ItemResult) -> None:
+        results[i] = result
+        if result_cb:
+            result_cb(result)
+
+    job_start = now_us()
+    job_events: list[dict[str, Any]] = []
+    traces: list[ItemTrace] = []
+
+    manifest = Manifest.load(job.output_folder) if job.global_cfg.incremental else None
+    channel_report = ChannelReport.load(job.output_folder)
+    settings = output_settings(job)
+    fingerprints: dict[int, dict[str, Any]] = {}
+    journal = Journal.open(job.output_folder, settings, resume=job.global_cfg.resume)
+    complete = False
+
+    def inputs_of(i: int) -> dict[str, Path]:
+        return steps.input_files(items[i])
+
+    try:
+        todo: list[int] = []
+        resumed = 0
+        for i, item in enumerate(items):
+            if manifest is not None:
+                outputs = steps.output_paths(item.key)
+                try:
+                    up_to_date, fingerprints[i] = manifest.check(item.key, inputs_of(i), outputs, settings)
+                except OSError:
+                    up_to_date = False  # let processing report the unreadable input
+                if up_to_date:
+                    finish(i, ItemResult(key=item.key, ok=True, outputs=tuple(str(p) for p in outputs), skipped=True))
+                    done += 1
+                    progress_cb(done, total)
+                    continue
+
+            finished = journal.finished_outputs(item.key, inputs_of(i))
+            if finished is None:
+                todo.append(i)
+                continue
+            resumed += 1
+            finish(i, ItemResult(key=item.key, ok=True, outputs=finished, skipped=True))
+            if manifest is not None and i in fingerprints:
+                manifest.record(item.key, fingerprints[i], [Path(p) for p in finished], settings)
+            done += 1
+            progress_cb(done, total)
+
+        if manifest is not None:
+            job_events.append(job_span("check_manifest", job_start, inputs=total))
+        skipped = total - len(todo) - resumed
+        if skipped:
+            status_cb(f"Skipping {skipped} up-to-date inputs.")
+        if resumed:
+            status_cb(f"Resuming: {resumed} inputs were already converted by an earlier unfinished run.")
+
+        # Inputs whose files are byte-identical are converted once; the others
+        # reuse the outputs of the first when it finishes.
+        duplicates: dict[int, list[int]] = {}
+        if job.global_cfg.dedup != "off" and len(todo) > 1:
+            dedup_start = now_us()
+            known = {fp["path"]: fp["sha256"] for fps in fingerprints.values() for fp in fps.values()}
+            groups = find_duplicates([list(inputs_of(i).values()) for i in todo], known)
+            duplicates = {todo[first]: [todo[n] for n in rest] for first, rest in groups.items()}
+            reused = {i for rest in duplicates.values() for i in rest}
+            todo = [i for i in todo if i not in reused]
+            job_events.append(job_span("dedup", dedup_start, inputs=len(todo) + len(reused), duplicates=len(reused)))
+            if reused:
+                status_cb(f"{len(reused)} inputs are identical to another input and reuse its outputs.")
+
+        def settle_duplicates(i: int) -> None:
+            nonlocal done
+            original = results[i]
+            for j in duplicates.get(i, ()):
+                key = items[j].key
+                outputs = steps.output_paths(key)
+                error = None if original.ok else f"same inputs as {original.key}, which failed: {original.error}"
+                if error is None:
+                    try:
+                        for src, dst in zip(original.outputs, outputs):
+                            materialize(Path(src), dst, job.global_cfg.dedup)
+                    except OSError as ex:
+                        error = f"could not reuse the outputs of {original.key}: {ex}"
+                if error is None:
+                    finish(j, ItemResult(key=key, ok=True, outputs=tuple(str(p) for p in outputs), duplicate_of=original.key))
+                    channel_report.record(key, channel_report.entries.get(original.key))
+                    journal.record(key, inputs_of(j), outputs)
+                    if manifest is not None and j in fingerprints:
+                        manifest.record(key, fingerprints[j], outputs, settings)
+                else:
+                    finish(j, ItemResult(key=key, ok=False, error=error))
+                    journal.record(key, inputs_of(j), error=error)
+                    if manifest is not None:
+                        manifest.entries.pop(key, None)
+                done += 1
+                progress_cb(done, total)
+
+        # Inputs are admitted only while their estimated memory fits the budget.
+        # With a process pool, largest inputs go first so the big ones do not
+        # end up running alone at the end; a single worker keeps input order
+        # and overlaps prefetching, packing and writing of consecutive inputs.
+        workers = job.global_cfg.workers
+        cache = shared_cache()
+        cache.set_capacity(job.global_cfg.decode_cache_mb << 20)
+
+        budget = resolve_memory_budget(job.global_cfg.memory_budget_mb)
+        costs: dict[int, int] = {}
+        if budget is not None and todo:
+            for i in todo:
+                try:
+                    costs[i] = steps.estimate_memory(items[i])
+                except (OSError, ValueError):
+                    costs[i] = 0  # let processing report the unreadable input
+            if workers > 1:
+                todo.sort(key=lambda i: costs[i], reverse=True)
+                largest = max(costs.values(), default=0)
+                status_cb(f"Memory budget {budget >> 20} MB; largest input needs ~{-(-largest >> 20)} MB.")
+
+        # A failed input is retried in a later pass, after the rest of the
+        # batch. An input whose worker process died is retried once even
+        # without retries, since another input may have taken it down.
+        attempts = 1 + max(0, job.global_cfg.retries)
+        attempt = 0
+        while todo:
+            attempt += 1
+            if attempt > 1:
+                status_cb(f"Retrying {len(todo)} failed inputs (attempt {attempt}).")
+            retry: set[int] = set()
+            batch = todo
+            args_list = [steps.args(items[i]) for i in batch]
+
+            def on_submit(n: int) -> None:
+                status_cb(f"Processing: {items[batch[n]].key}")
+
+            batch_costs = [costs.get(i, 0) for i in batch]
+
+            if workers == 1:
+                work = map_pipelined(
+                    lambda n: steps.prefetch(*args_list[n], cache),
+                    lambda n, decoded: steps.transform(*args_list[n], decoded),
+                    lambda n, staged: finish_staged(staged),
+                    len(batch),
+                    batch_costs,
+                    budget,
+                    on_submit,
+                )
+            else:
+                work = map_budgeted(steps.process, args_list, workers, batch_costs, budget, on_submit)
+            for n, value, err in work:
+                i = batch[n]
+                key = items[i].key
+                if err is None:
+                    outputs, trace, channels = value
+                    channel_report.record(key, channels)
+                    traces.append(trace)
+                    if trace_cb:
+                        trace_cb(trace)
+                    finish(i, ItemResult(
+                        key=key,
+                        ok=True,
+                        outputs=outputs,
+                        seconds=trace.seconds("pair"),
+                        bytes_read=trace.bytes_read,
+                        bytes_written=trace.bytes_written,
+                    ))
+                    journal.record(key, inputs_of(i), [Path(p) for p in outputs])
+                    if manifest is not None and i in fingerprints:
+                        manifest.record(key, fingerprints[i], [Path(p) for p in outputs], settings)
+                elif attempt < (max(attempts, 2) if is_worker_crash(err) else attempts):
+                    status_cb(f"Failed: {key} ({err}); will retry.")
+                    retry.add(i)
+                    continue
+                else:
+                    status_cb(f"Failed: {key} ({err})")
+                    finish(i, ItemResult(key=key, ok=False, error=str(err)))
+                    journal.record(key, inputs_of(i), error=str(err))
+                    if manifest is not None:
+                        manifest.entries.pop(key, None)
+                done += 1
+                progress_cb(done, total)
+                settle_duplicates(i)
+            todo = [i for i in batch if i in retry]
+
+        complete = all(r.ok for r in results.values())
+        savings = summarize_duplicates(list(results.values()))
+        if savings:
+            status_cb(savings)
+    finally:
+        journal.close(complete)
+        channel_report.save()
+        if manifest is not None:
+            manifest.save()
+        if job.global_cfg.trace:
+            job_events.append(job_span("job", job_start, inputs=total, converted=len(traces)))
+            path = write_chrome_trace(job.output_folder / TRACE_NAME, traces, job_events)
+            status_cb(f"Trace written: {path}")
+
+    status_cb("Done.")
+    return [results[i] for i in sorted(results)]
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from .spec import ChannelChoice, ConversionSpec, OutputSpec, Setting, Source, Toggle
+
+# Conversions that only route channels, described as specs (see spec.py).
+
+CS_TO_C_R = ConversionSpec(
+    id="cs_to_cr",
+    display_name="CS → C/R",
+    inputs=("CS",),
+    outputs=(
+        OutputSpec("C", "color", (Source("CS", "R"), Source("CS", "G"), Source("CS", "B"))),
+        OutputSpec("R", "data", (Source("CS", Setting("smooth_channel"), invert=Setting("invert_smoothness_to_roughness")),)),
+    ),
+    settings=(
+        ChannelChoice("smooth_channel", "Smoothness channel in *_CS:", "A"),
+        Toggle("invert_smoothness_to_roughness", "Invert smoothness → roughness", True),
+    ),
+)
+
+NAM_TO_N = ConversionSpec(
+    id="nam_to_n",
+    display_name="NAM → N",
+    inputs=("NAM",),
+    outputs=(
+        OutputSpec("N", "normal", (Source("NAM", "R"), Source("NAM", "G"), Source("NAM", "B", force=Setting("force_normal_blue_channel")))),
+    ),
+    settings=(
+        Toggle("force_normal_blue_channel", "Force _N blue channel to 255", True),
+    ),
+)
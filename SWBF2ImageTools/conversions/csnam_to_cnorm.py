@@ -1,18 +1,73 @@
 from __future__ import annotations
 
+from concurrent.futures import Future
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Callable, Optional, Sequence
-
-from PySide6.QtWidgets import QCheckBox, QComboBox, QGridLayout, QLabel, QWidget
-from PIL import Image
-
-from ..core.image_io import extract_channel, invert_l, open_rgba, resize_l, save_image, force_normal_blue_channel
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Mapping, Optional, Sequence
+
+import numpy as np
+
+from ..core.channels import is_grayscale
+from ..core.decoded_cache import DecodedCache
+from ..core.image_io import (
+    BandSource,
+    band,
+    capped_size,
+    invert_band,
+    open_image,
+    pack_bands,
+    probe_image,
+    proxy_rgba,
+    resize_band,
+    submit_encode,
+    wait_saves,
+)
+from ..core.scan import iter_suffix_sets
+from ..core.strip_writers import StripWriter, open_strip_writer
+from ..core.strips import (
+    STRIP_ROWS,
+    BandStrips,
+    StripReader,
+    StripResampler,
+    can_stream,
+    open_strips,
+    rows_band,
+    rows_rgb,
+    use_streaming,
+)
+from ..core.trace import ItemTrace, Tracer, file_size
 from ..models.config import GlobalConfig, JobBase
-from .base import ConversionDefinition, DetectedInput
+from .base import ConversionDefinition, DetectedInput, ItemResult
+from .batch import (
+    BatchSteps,
+    Converted,
+    Decoded,
+    SaveOutput,
+    Staged,
+    StripAnalysis,
+    channel_analysis,
+    compacts,
+    decode_inputs,
+    finish_staged,
+    output_levels,
+    run_batch,
+    save_to_files,
+)
+
+if TYPE_CHECKING:
+    from PySide6.QtWidgets import QCheckBox, QComboBox, QWidget
 
 VALID_CHANNELS = ["R", "G", "B", "A"]
 
+DEFAULT_SETTINGS: dict[str, Any] = {
+    "smooth_channel": "A",
+    "invert_smoothness_to_roughness": True,
+    "ao_channel": "A",
+    "metallic_channel": "B",
+    "drop_orm_alpha": True,
+    "force_normal_blue_channel": True,
+}
+
 
 @dataclass(frozen=True)
 class CsNamJob(JobBase):
@@ -24,81 +79,353 @@ class CsNamJob(JobBase):
     force_normal_blue_channel: bool
 
 
-def _parse_prefix_and_suffix(path: Path) -> Optional[tuple[str, str]]:
-    name = path.stem
-    if name.endswith("_CS"):
-        return name[:-3], "CS"
-    if name.endswith("_NAM"):
-        return name[:-4], "NAM"
-    return None
-
-
-def _build_pairs(folder: Path) -> list[tuple[str, Path, Path]]:
-    by_prefix: dict[str, dict[str, Path]] = {}
-
-    for p in folder.iterdir():
-        if not p.is_file():
-            continue
-        parsed = _parse_prefix_and_suffix(p)
-        if not parsed:
-            continue
-        prefix, suffix = parsed
-        by_prefix.setdefault(prefix, {})[suffix] = p
-
-    pairs: list[tuple[str, Path, Path]] = []
-    for prefix, found in sorted(by_prefix.items(), key=lambda kv: kv[0].lower()):
-        cs = found.get("CS")
-        nam = found.get("NAM")
-        if cs and nam:
-            pairs.append((prefix, cs, nam))
-    return pairs
-
-
-def _process_pair(prefix: str, cs_path: Path, nam_path: Path, cfg: CsNamJob) -> None:
+def _iter_pairs(folder: Path, recursive: bool) -> Iterator[list[tuple[str, Path, Path]]]:
+    """Yield the complete _CS/_NAM pairs of each scanned directory as soon as it is listed."""
+    for sets in iter_suffix_sets(folder, ("CS", "NAM"), recursive):
+        yield [(key, cs, nam) for key, (cs, nam) in sets]
+
+
+def _output_levels(prefix: str, cfg: CsNamJob) -> tuple[list[Path], list[Path], list[Path]]:
+    """Paths of _C, _N and _ORM, each followed by its LOD levels (_C_LOD1, ...)."""
+
+    def levels(name: str) -> list[Path]:
+        return output_levels(cfg.output_folder, prefix, name, cfg.global_cfg)
+
+    return levels("C"), levels("N"), levels("ORM")
+
+
+def _output_paths(prefix: str, cfg: CsNamJob) -> tuple[Path, ...]:
+    """Every output of a pair, in the order ItemResult.outputs lists them."""
+    return tuple(p for levels in _output_levels(prefix, cfg) for p in levels)
+
+
+def _orm_alpha(cfg: CsNamJob) -> bool:
+    """Whether _ORM gets an alpha channel (always opaque)."""
+    return not cfg.drop_orm_alpha
+
+
+def _streams(cs_path: Path, nam_path: Path, cfg: CsNamJob) -> bool:
+    if cfg.global_cfg.max_size > 0 or cfg.global_cfg.lod_levels > 0:
+        return False  # downscaled outputs are resampled from whole images
+    mode = cfg.global_cfg.streaming
+    if mode != "auto":
+        return use_streaming(mode, 0)
+    (cw, ch), _ = probe_image(cs_path)
+    (nw, nh), _ = probe_image(nam_path)
+    return use_streaming(mode, max(cw * ch, nw * nh))
+
+
+def _estimate_pair_memory(cs_path: Path, nam_path: Path, cfg: CsNamJob) -> int:
+    """
+    Upper bound on the bytes _process_pair holds at once. Lifetimes overlap
+    less than this assumes, but encoders and Pillow's decode buffers make a
+    tighter figure fragile.
+    """
+    (cw, ch), cs_channels = probe_image(cs_path)
+    (nw, nh), nam_channels = probe_image(nam_path)
+    orm_channels = 4 if _orm_alpha(cfg) else 3
+
+    if _streams(cs_path, nam_path, cfg):
+        # Sources without strip access are decoded whole, one at a time (_CS
+        # keeps its smoothness band). Two strips are in flight, each with its
+        # source rows, packed outputs and about as much again in encoder and
+        # resampler temporaries.
+        cs_whole = 0 if can_stream(cs_path) else cw * ch * (2 * cs_channels + 1)
+        nam_whole = 0 if can_stream(nam_path) else nw * nh * 2 * nam_channels
+        strip = STRIP_ROWS * (cw * (cs_channels + 3) + nw * (nam_channels + 1 + 3 + orm_channels))
+        return max(cs_whole, nam_whole) + 2 * 2 * strip
+
+    # Decoded _CS plus Pillow's buffer while decoding, the _C array and its encoder copy.
+    cs_bytes = cw * ch * (2 * cs_channels + 3 + 3)
+    # Decoded _NAM plus decode buffer, smoothness band, _N and _ORM arrays with their encoder copies.
+    nam_bytes = nw * nh * (2 * nam_channels + 1 + 2 * 3 + 2 * orm_channels)
+    if cfg.global_cfg.max_size > 0 or cfg.global_cfg.lod_levels > 0:
+        # One resampled level per output next to its encoder copy.
+        cs_bytes += cw * ch * 3
+        nam_bytes += nw * nh * (3 + orm_channels)
+    return cs_bytes + nam_bytes
+
+
+def _write_strip(writer: StripWriter, rows: np.ndarray, name: str, tracer: Tracer) -> None:
+    with tracer.span("encode", output=name):
+        writer.write_rows(rows)
+
+
+def _stream_strips(
+    reader: StripReader,
+    name: str,
+    pack: Callable[[int, int, np.ndarray], list[tuple[StripWriter, np.ndarray, str]]],
+    tracer: Tracer,
+) -> None:
+    """
+    Read reader a strip at a time and hand each strip to pack, which returns
+    (writer, rows, output name) for every output. A strip is encoded on the
+    encode threads while the next one is read and packed; each writer only
+    ever has one strip pending, so rows arrive in order.
+    """
+    pending: list[Future[None]] = []
+    try:
+        h = reader.size[1]
+        for y0 in range(0, h, STRIP_ROWS):
+            y1 = min(h, y0 + STRIP_ROWS)
+            with tracer.span("decode", input=name, rows=[y0, y1]):
+                rows = reader.read_rows(y0, y1)
+            outputs = pack(y0, y1, rows)
+            wait_saves(pending)
+            pending = [submit_encode(_write_strip, writer, data, out_name, tracer) for writer, data, out_name in outputs]
+    finally:
+        wait_saves(pending)
+
+
+def _strips_grayscale(reader: StripReader) -> bool:
+    """Whether R, G and B of every row of reader are equal; reads up to the first strip where they are not."""
+    if reader.mode in ("L", "LA"):
+        return True
+    h = reader.size[1]
+    for y0 in range(0, h, STRIP_ROWS):
+        if not is_grayscale(rows_rgb(reader, reader.read_rows(y0, min(h, y0 + STRIP_ROWS)))):
+            return False
+    return True
+
+
+def _process_pair_streamed(prefix: str, cs_path: Path, nam_path: Path, cfg: CsNamJob) -> Converted:
     g = cfg.global_cfg
+    (out_c,), (out_n,), (out_orm,) = _output_levels(prefix, cfg)
+    tracer = Tracer(prefix)
+    c_analysis = StripAnalysis(grayscale=True)
+    orm_analysis = StripAnalysis()
+
+    # _CS is streamed into _C first, then _NAM into _N and _ORM with the
+    # smoothness of the matching _CS rows (resampled strip by strip when the
+    # sizes differ). A _CS that can only be decoded whole is dropped after _C,
+    # keeping just its smoothness band. Outputs are analysed strip by strip as
+    # they are packed; a compact _C is single-channel, so whether it is
+    # grayscale is found by reading _CS ahead, up to its first colour strip.
+    with tracer.span("pair", mode="stream"):
+        tracer.add_read(file_size(cs_path) + file_size(nam_path))
+        cs: StripReader = open_strips(cs_path)
+        smooth_src: StripReader = cs
+        smooth_band = cfg.smooth_channel
+        try:
+            gray_c = False
+            if compacts(g):
+                with tracer.span("analyze", output=out_c.name):
+                    gray_c = _strips_grayscale(cs)
+
+            def pack_c(y0: int, y1: int, rows: np.ndarray) -> list[tuple[StripWriter, np.ndarray, str]]:
+                rgb = rows_rgb(cs, rows)
+                with tracer.span("analyze", output=out_c.name):
+                    c_analysis.add(rgb)
+                return [(c_out, rgb[..., :1] if gray_c else rgb, out_c.name)]
+
+            with open_strip_writer(out_c, cs.size, 1 if gray_c else 3, g, "color") as c_out:
+                _stream_strips(cs, cs_path.name, pack_c, tracer)
+            if cs.in_memory:
+                smooth_src = BandStrips(np.array(rows_band(cs, cs.read_rows(0, cs.size[1]), smooth_band)))
+                smooth_band = "R"
+                cs.close()
+
+            nam = open_strips(nam_path)
+            try:
+                nw = nam.size[0]
+                resampler = StripResampler(smooth_src, smooth_band, nam.size) if smooth_src.size != nam.size else None
+                orm_channels = 4 if _orm_alpha(cfg) else 3
+
+                with open_strip_writer(out_n, nam.size, 3, g, "normal") as n_out, open_strip_writer(out_orm, nam.size, orm_channels, g, "data") as orm_out:
+
+                    def pack(y0: int, y1: int, rows: np.ndarray) -> list[tuple[StripWriter, np.ndarray, str]]:
+                        size = (nw, y1 - y0)
+                        with tracer.span("pack", output=out_n.name):
+                            n_blue: BandSource = 255 if cfg.force_normal_blue_channel else rows_band(nam, rows, "B")
+                            n = pack_bands([rows_band(nam, rows, "R"), rows_band(nam, rows, "G"), n_blue], size)
+                        if resampler is not None:
+                            with tracer.span("resize", rows=[y0, y1]):
+                                smooth = resampler.read_rows(y0, y1)
+                        else:
+                            smooth = rows_band(smooth_src, smooth_src.read_rows(y0, y1), smooth_band)
+                        with tracer.span("pack", output=out_orm.name):
+                            orm_sources: list[BandSource] = [rows_band(nam, rows, cfg.ao_channel), smooth, rows_band(nam, rows, cfg.metallic_channel)]
+                            if _orm_alpha(cfg):
+                                orm_sources.append(255)
+                            orm = pack_bands(orm_sources, size)
+                        if cfg.invert_smoothness_to_roughness:
+                            with tracer.span("invert"):
+                                invert_band(orm[..., 1], out=orm[..., 1])
+                        with tracer.span("analyze", output=out_orm.name):
+                            orm_analysis.add(orm[..., :3])
+                        return [(n_out, n, out_n.name), (orm_out, orm, out_orm.name)]
+
+                    _stream_strips(nam, nam_path.name, pack, tracer)
+            finally:
+                nam.close()
+        finally:
+            cs.close()
+            smooth_src.close()
+
+        tracer.add_written(file_size(out_c) + file_size(out_n) + file_size(out_orm))
+
+    report = {name: found for name, found in (("C", c_analysis.found), ("ORM", orm_analysis.found)) if found}
+    return (str(out_c), str(out_n), str(out_orm)), tracer.trace, report or None
+
+
+def _prefetch_pair(
+    prefix: str,
+    cs_path: Path,
+    nam_path: Path,
+    cfg: CsNamJob,
+    cache: Optional[DecodedCache] = None,
+) -> Optional[Decoded]:
+    """
+    Read and decode both inputs of a pair, taking them from cache or the
+    configured disk cache when they have them; None for a pair that is
+    streamed instead.
+    """
+    if _streams(cs_path, nam_path, cfg):
+        return None
+    return decode_inputs(prefix, (cs_path, nam_path), cfg.global_cfg, cache)
+
+
+def _transform_pair(
+    prefix: str,
+    cs_path: Path,
+    nam_path: Path,
+    cfg: CsNamJob,
+    decoded: Optional[Decoded],
+) -> tuple[list[Future[None]], Staged]:
+    """
+    Pack the outputs of a decoded pair and start encoding them. Returns the
+    pending encodes; the outputs are complete once they are done. Streamed
+    pairs are converted here entirely.
+    """
+    if decoded is None:
+        outputs, trace, channels = _process_pair_streamed(prefix, cs_path, nam_path, cfg)
+        return [], Staged(outputs, trace, channels=channels)
+    return _pack_pair(prefix, cfg, decoded, save_to_files(cfg.output_folder, prefix, cfg.global_cfg, decoded.tracer))
+
+
+def _pack_pair(prefix: str, cfg: CsNamJob, decoded: Decoded, save: SaveOutput) -> tuple[list[Future[Any]], Staged]:
+    """Pack the outputs of a decoded pair, handing each to save as soon as it is packed."""
+    g = cfg.global_cfg
+    c_paths, n_paths, orm_paths = _output_levels(prefix, cfg)
+    out_n, out_orm = n_paths[0], orm_paths[0]
+    tracer = decoded.tracer
+    pending: list[Future[Any]] = []
+    channels: dict[str, Any] = {}
+
+    # Outputs are encoded concurrently as soon as each one is packed, and the
+    # _CS buffer is released once _C is handed to the encoder and its
+    # smoothness band kept. Each encode thread also writes its output's
+    # capped size and LOD levels, every level resampled from the one above.
+    try:
+        cs, nam = decoded.handles
+        with cs, nam:
+            nam_size = nam.size
+
+            # _C, single-channel when it is grayscale
+            rgb = cs.rgb()
+            with tracer.span("analyze", output=c_paths[0].name):
+                channels["C"] = channel_analysis(rgb, grayscale=True)
+            c = rgb[..., 0] if channels["C"].get("grayscale") and compacts(g) else rgb
+            pending.append(save("C", "color", c))
+            del rgb, c
+
+            smooth = cs.band(cfg.smooth_channel)
+            if cs.size != nam_size:
+                with tracer.span("resize", src=list(cs.size), dst=list(nam_size)):
+                    smooth = resize_band(smooth, nam_size)
+            else:
+                smooth = np.array(smooth)
+            cs.close()
+
+            # _N
+            with tracer.span("pack", output=out_n.name):
+                n_blue: BandSource = 255 if cfg.force_normal_blue_channel else nam.band("B")
+                n = pack_bands([nam.band("R"), nam.band("G"), n_blue], nam_size)
+            pending.append(save("N", "normal", n))
+            del n
+
+            # _ORM
+            with tracer.span("pack", output=out_orm.name):
+                orm_sources: list[BandSource] = [nam.band(cfg.ao_channel), smooth, nam.band(cfg.metallic_channel)]
+                if _orm_alpha(cfg):
+                    orm_sources.append(255)
+                orm = pack_bands(orm_sources, nam_size)
+            nam.close()
+            del smooth
+
+            if cfg.invert_smoothness_to_roughness:
+                with tracer.span("invert"):
+                    invert_band(orm[..., 1], out=orm[..., 1])
+
+            with tracer.span("analyze", output=out_orm.name):
+                channels["ORM"] = channel_analysis(orm[..., :3])
+            pending.append(save("ORM", "data", orm))
+    except BaseException:
+        try:
+            wait_saves(pending)
+        except BaseException:
+            pass  # the packing error is the one to report
+        raise
+
+    outputs = tuple(str(p) for p in _output_paths(prefix, cfg))
+    report = {name: found for name, found in channels.items() if found}
+    return pending, Staged(outputs, tracer.trace, tracer, decoded.start_us, report or None)
+
+
+def _process_pair(prefix: str, cs_path: Path, nam_path: Path, cfg: CsNamJob) -> Converted:
+    decoded = _prefetch_pair(prefix, cs_path, nam_path, cfg)
+    pending, staged = _transform_pair(prefix, cs_path, nam_path, cfg, decoded)
+    wait_saves(pending)
+    return finish_staged(staged)
 
-    cs_rgba = open_rgba(cs_path)
-    nam_rgba = open_rgba(nam_path)
-
-    cs_w, cs_h = cs_rgba.size
-    nam_w, nam_h = nam_rgba.size
-
-    out_c = cfg.output_folder / f"{prefix}_C.{g.out_ext}"
-    out_n = cfg.output_folder / f"{prefix}_N.{g.out_ext}"
-    out_orm = cfg.output_folder / f"{prefix}_ORM.{g.out_ext}"
-
-    # _C
-    save_image(cs_rgba.convert("RGB"), out_c, g)
-
-    # _N
-    n_rgb = nam_rgba.convert("RGB")
-    if cfg.force_normal_blue_channel:
-        n_rgb = force_normal_blue_channel(n_rgb)
-    save_image(n_rgb, out_n, g)
-
-    # _ORM
-    ao = extract_channel(nam_rgba, cfg.ao_channel)
-    metal = extract_channel(nam_rgba, cfg.metallic_channel)
-    smooth = extract_channel(cs_rgba, cfg.smooth_channel)
-
-    if (cs_w, cs_h) != (nam_w, nam_h):
-        smooth = resize_l(smooth, (nam_w, nam_h))
-
-    rough = invert_l(smooth) if cfg.invert_smoothness_to_roughness else smooth
-    orm_rgb = Image.merge("RGB", (ao, rough, metal))
 
-    if cfg.drop_orm_alpha:
-        save_image(orm_rgb, out_orm, g)
-    else:
-        alpha = Image.new("L", (nam_w, nam_h), 255)
-        r, gg, b = orm_rgb.split()
-        orm_rgba = Image.merge("RGBA", (r, gg, b, alpha))
-        save_image(orm_rgba, out_orm, g)
+@dataclass(frozen=True)
+class _PreviewSources:
+    """Scaled-down RGBA copies of a pair's inputs, both the size of the _NAM proxy."""
+    cs: np.ndarray
+    nam: np.ndarray
+
+
+def _load_preview_sources(cs_path: Path, nam_path: Path, max_size: int, cache: Optional[DecodedCache]) -> _PreviewSources:
+    # Proxies are cached next to the full decodes, so an input previewed once
+    # shows again at once even after its full-resolution pixels were evicted.
+    variant = ("preview", max_size)
+
+    def proxy(path: Path, size: Optional[tuple[int, int]]) -> np.ndarray:
+        key = cache.key(path, variant) if cache is not None else None
+        hit = cache.get(key) if cache is not None else None
+        if hit is not None and (size is None or hit[0].shape[1::-1] == size):
+            return hit[0]
+        with open_image(path, cache) as handle:
+            arr = proxy_rgba(handle, size or capped_size(handle.size, max_size))
+        if cache is not None:
+            cache.put(key, arr)
+        return arr
+
+    nam = proxy(nam_path, None)
+    cs = proxy(cs_path, (nam.shape[1], nam.shape[0]))  # at the _NAM size, like the smoothness band
+    return _PreviewSources(cs, nam)
+
+
+def _render_preview(sources: _PreviewSources, cfg: CsNamJob) -> list[tuple[str, np.ndarray]]:
+    """The packing of _transform_pair, on preview proxies."""
+    cs, nam = sources.cs, sources.nam
+    size = (nam.shape[1], nam.shape[0])
+    n_blue: BandSource = 255 if cfg.force_normal_blue_channel else band(nam, "B")
+    n = pack_bands([band(nam, "R"), band(nam, "G"), n_blue], size)
+    orm_sources: list[BandSource] = [band(nam, cfg.ao_channel), band(cs, cfg.smooth_channel), band(nam, cfg.metallic_channel)]
+    if _orm_alpha(cfg):
+        orm_sources.append(255)
+    orm = pack_bands(orm_sources, size)
+    if cfg.invert_smoothness_to_roughness:
+        invert_band(orm[..., 1], out=orm[..., 1])
+    return [("C", np.ascontiguousarray(cs[..., :3])), ("N", n), ("ORM", orm)]
 
 
 class CsNamToCnormConversion(ConversionDefinition):
     id = "csnam_to_cnorm"
     display_name = "CS/NAM → C/N/ORM"
+    input_suffixes = ("CS", "NAM")
 
     def __init__(self) -> None:
         self._widget: Optional[QWidget] = None
@@ -113,29 +440,31 @@ class CsNamToCnormConversion(ConversionDefinition):
         if self._widget is not None:
             return self._widget
 
+        from PySide6.QtWidgets import QCheckBox, QComboBox, QGridLayout, QLabel, QWidget
+
         w = QWidget()
         grid = QGridLayout()
 
         self._smooth_combo = QComboBox()
         self._smooth_combo.addItems(VALID_CHANNELS)
-        self._smooth_combo.setCurrentText("A")
+        self._smooth_combo.setCurrentText(DEFAULT_SETTINGS["smooth_channel"])
 
         self._ao_combo = QComboBox()
         self._ao_combo.addItems(VALID_CHANNELS)
-        self._ao_combo.setCurrentText("A")
+        self._ao_combo.setCurrentText(DEFAULT_SETTINGS["ao_channel"])
 
         self._metal_combo = QComboBox()
         self._metal_combo.addItems(VALID_CHANNELS)
-        self._metal_combo.setCurrentText("B")
+        self._metal_combo.setCurrentText(DEFAULT_SETTINGS["metallic_channel"])
 
         self._invert_cb = QCheckBox("Invert smoothness → roughness")
-        self._invert_cb.setChecked(True)
+        self._invert_cb.setChecked(DEFAULT_SETTINGS["invert_smoothness_to_roughness"])
 
         self._drop_alpha_cb = QCheckBox("Drop alpha channel from _ORM output")
-        self._drop_alpha_cb.setChecked(True)
+        self._drop_alpha_cb.setChecked(DEFAULT_SETTINGS["drop_orm_alpha"])
 
         self._force_normal_cb = QCheckBox("Force _N blue channel to 255")
-        self._force_normal_cb.setChecked(True)
+        self._force_normal_cb.setChecked(DEFAULT_SETTINGS["force_normal_blue_channel"])
 
         grid.addWidget(QLabel("Smoothness channel in *_CS:"), 0, 0)
         grid.addWidget(self._smooth_combo, 0, 1)
@@ -158,50 +487,108 @@ class CsNamToCnormConversion(ConversionDefinition):
         if self._widget is not None:
             self._widget.setEnabled(enabled)
 
-    def detect_inputs(self, input_folder: Path) -> list[DetectedInput]:
-        pairs = _build_pairs(input_folder)
-        return [
-            DetectedInput(
-                key=prefix,
-                display_line=f"{prefix}: (_CS and _NAM found)",
-                payload=(cs_path, nam_path),
-            )
-            for prefix, cs_path, nam_path in pairs
-        ]
+    def on_settings_changed(self, callback: Callable[[], None]) -> None:
+        self.build_settings_widget()
+        assert self._smooth_combo and self._ao_combo and self._metal_combo and self._invert_cb and self._drop_alpha_cb and self._force_normal_cb
+        for combo in (self._smooth_combo, self._ao_combo, self._metal_combo):
+            combo.currentTextChanged.connect(lambda _text: callback())
+        for cb in (self._invert_cb, self._drop_alpha_cb, self._force_normal_cb):
+            cb.toggled.connect(lambda _checked: callback())
+
+    def scan_inputs(self, input_folder: Path, recursive: bool = True) -> Iterator[list[DetectedInput]]:
+        for pairs in _iter_pairs(input_folder, recursive):
+            yield [
+                DetectedInput(
+                    key=prefix,
+                    display_line=f"{prefix}: (_CS and _NAM found)",
+                    payload=(cs_path, nam_path),
+                )
+                for prefix, cs_path, nam_path in pairs
+            ]
+
+    def detect_inputs(self, input_folder: Path, recursive: bool = True) -> list[DetectedInput]:
+        return [d for batch in self.scan_inputs(input_folder, recursive) for d in batch]
+
+    def input_files(self, item: DetectedInput) -> tuple[Path, ...]:
+        cs_path, nam_path = item.payload
+        return (cs_path, nam_path)
 
     def make_job_config(self, input_folder: Path, output_folder: Path, global_cfg: GlobalConfig) -> CsNamJob:
         assert self._smooth_combo and self._ao_combo and self._metal_combo and self._invert_cb and self._drop_alpha_cb and self._force_normal_cb
 
+        settings = {
+            "smooth_channel": self._smooth_combo.currentText(),
+            "invert_smoothness_to_roughness": self._invert_cb.isChecked(),
+            "ao_channel": self._ao_combo.currentText(),
+            "metallic_channel": self._metal_combo.currentText(),
+            "drop_orm_alpha": self._drop_alpha_cb.isChecked(),
+            "force_normal_blue_channel": self._force_normal_cb.isChecked(),
+        }
+        return self.job_config_from_settings(input_folder, output_folder, global_cfg, settings)
+
+    def default_settings(self) -> dict[str, Any]:
+        return dict(DEFAULT_SETTINGS)
+
+    def job_config_from_settings(
+        self,
+        input_folder: Path,
+        output_folder: Path,
+        global_cfg: GlobalConfig,
+        settings: Mapping[str, Any],
+    ) -> CsNamJob:
+        unknown = set(settings) - set(DEFAULT_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown settings for {self.id}: {', '.join(sorted(unknown))}")
+
+        merged = {**DEFAULT_SETTINGS, **settings}
+        for key in ("smooth_channel", "ao_channel", "metallic_channel"):
+            if merged[key] not in VALID_CHANNELS:
+                raise ValueError(f"{key} must be one of {', '.join(VALID_CHANNELS)}, got {merged[key]!r}")
+
         return CsNamJob(
             conversion_id=self.id,
             input_folder=input_folder,
             output_folder=output_folder,
             global_cfg=global_cfg,
-            smooth_channel=self._smooth_combo.currentText(),
-            invert_smoothness_to_roughness=self._invert_cb.isChecked(),
-            ao_channel=self._ao_combo.currentText(),
-            metallic_channel=self._metal_combo.currentText(),
-            drop_orm_alpha=self._drop_alpha_cb.isChecked(),
-            force_normal_blue_channel=self._force_normal_cb.isChecked(),
+            smooth_channel=merged["smooth_channel"],
+            invert_smoothness_to_roughness=bool(merged["invert_smoothness_to_roughness"]),
+            ao_channel=merged["ao_channel"],
+            metallic_channel=merged["metallic_channel"],
+            drop_orm_alpha=bool(merged["drop_orm_alpha"]),
+            force_normal_blue_channel=bool(merged["force_normal_blue_channel"]),
         )
 
+    def estimate_memory(self, item: DetectedInput, cfg: Any) -> int:
+        cs_path, nam_path = item.payload
+        return _estimate_pair_memory(cs_path, nam_path, cfg)
+
+    def load_preview(self, item: DetectedInput, max_size: int, cache: Optional[DecodedCache] = None) -> _PreviewSources:
+        cs_path, nam_path = item.payload
+        return _load_preview_sources(cs_path, nam_path, max_size, cache)
+
+    def render_preview(self, sources: Any, cfg: Any) -> list[tuple[str, np.ndarray]]:
+        return _render_preview(sources, cfg)
+
+    def convert_images(self, key: str, decoded: Decoded, cfg: Any, save: SaveOutput) -> tuple[list[Future[Any]], Staged]:
+        return _pack_pair(key, cfg, decoded, save)
+
     def run(
         self,
         detected: Sequence[DetectedInput],
         cfg: Any,
         progress_cb: Callable[[int, int], None],
         status_cb: Callable[[str], None],
-    ) -> None:
+        trace_cb: Optional[Callable[[ItemTrace], None]] = None,
+        result_cb: Optional[Callable[[ItemResult], None]] = None,
+    ) -> list[ItemResult]:
         job: CsNamJob = cfg  # type: ignore[assignment]
-        total = len(detected)
-        if total == 0:
-            return
-
-        for i, item in enumerate(detected, start=1):
-            prefix = item.key
-            cs_path, nam_path = item.payload
-            status_cb(f"Processing: {prefix}")
-            _process_pair(prefix, cs_path, nam_path, job)
-            progress_cb(i, total)
-
-        status_cb("Done.")
+        steps = BatchSteps(
+            input_files=lambda item: dict(zip(self.input_suffixes, item.payload)),
+            output_paths=lambda key: _output_paths(key, job),
+            args=lambda item: (item.key, *item.payload, job),
+            prefetch=_prefetch_pair,
+            transform=_transform_pair,
+            process=_process_pair,
+            estimate_memory=lambda item: self.estimate_memory(item, job),
+        )
+        return run_batch(steps, detected, job, progress_cb, status_cb, trace_cb, result_cb)
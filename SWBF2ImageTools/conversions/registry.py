@@ -1,11 +1,80 @@
 from __future__ import annotations
 
-from .csnam_to_cnorm import CsNamToCnormConversion
-from .base import ConversionDefinition
+import importlib
+import warnings
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .base import ConversionDefinition
+
+# Conversions are listed by metadata only, so the window and the command line
+# can offer them without importing them: a conversion's module (and with it
+# NumPy and Pillow) is imported when the conversion is first used.
+#
+# Installed packages add conversions through the entry point group below.
+# Each entry point names a ConversionInfo, in a module that imports nothing
+# heavy since every start-up reads it:
+#
+#   [project.entry-points."swbf2_image_tools.conversions"]
+#   my_conversion = "my_package.info:MY_CONVERSION"
+
+ENTRY_POINT_GROUP = "swbf2_image_tools.conversions"
+
+
+@dataclass(frozen=True)
+class ConversionInfo:
+    id: str
+    display_name: str
+    target: str  # "module:attribute" of a ConversionDefinition class, or of a ConversionSpec
+
+    def load(self) -> ConversionDefinition:
+        """Import the conversion and return a new instance of it."""
+        module_name, _, attr = self.target.partition(":")
+        obj = getattr(importlib.import_module(module_name), attr)
+        from .spec import ConversionSpec
+
+        if isinstance(obj, ConversionSpec):
+            from .spec_conversion import SpecConversion
+
+            conv = SpecConversion(obj)
+        else:
+            conv = obj()
+        if conv.id != self.id:
+            raise ValueError(f"{self.target} is conversion {conv.id!r}, but is listed as {self.id!r}")
+        return conv
+
+
+# Add future conversions here; ones that only route channels as a spec in builtin_specs.py.
+BUILTIN_CONVERSIONS = [
+    ConversionInfo("csnam_to_cnorm", "CS/NAM → C/N/ORM", f"{__package__}.csnam_to_cnorm:CsNamToCnormConversion"),
+    ConversionInfo("cs_to_cr", "CS → C/R", f"{__package__}.builtin_specs:CS_TO_C_R"),
+    ConversionInfo("nam_to_n", "NAM → N", f"{__package__}.builtin_specs:NAM_TO_N"),
+]
+
+
+def conversion_infos() -> list[ConversionInfo]:
+    """The built-in conversions, then those of installed plugins. Plugins that cannot be read are skipped with a warning."""
+    infos = list(BUILTIN_CONVERSIONS)
+    ids = {info.id for info in infos}
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            info = ep.load()
+        except Exception as ex:
+            warnings.warn(f"Skipping conversion plugin {ep.name!r}: {ex}")
+            continue
+        if not isinstance(info, ConversionInfo):
+            warnings.warn(f"Skipping conversion plugin {ep.name!r}: {ep.value} is not a ConversionInfo")
+            continue
+        if info.id in ids:
+            warnings.warn(f"Skipping conversion plugin {ep.name!r}: conversion id {info.id!r} is already taken")
+            continue
+        ids.add(info.id)
+        infos.append(info)
+    return infos
 
 
 def get_conversions() -> list[ConversionDefinition]:
-    # Add future conversions here.
-    return [
-        CsNamToCnormConversion(),
-    ]
+    """Every conversion, imported."""
+    return [info.load() for info in conversion_infos()]
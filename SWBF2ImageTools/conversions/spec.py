@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional, Union
+
+from ..core.image_io import OUTPUT_KINDS
+
+# Conversions that only route channels (this band of that input, inverted or
+# not, or a constant) are described declaratively by a ConversionSpec rather
+# than written as a module of their own. A spec lists the input suffixes that
+# make up one input set, and for every output its suffix and the source of
+# each channel. Values a user may change are Setting references to the spec's
+# settings, which also describe the settings widget.
+#
+# compile_spec resolves a spec and the settings of a job into a Plan, the
+# single pass spec_conversion runs per input set: every input is decoded once,
+# its bands are shared by all outputs that read them (a band resized to
+# another input's size is resized once), and each input is released after the
+# last output that reads it.
+
+CHANNELS = ("R", "G", "B", "A")
+
+
+@dataclass(frozen=True)
+class Setting:
+    """Stands for the value of a conversion setting; negate flips an on/off setting."""
+    id: str
+    negate: bool = False
+
+
+@dataclass(frozen=True)
+class ChannelChoice:
+    """A setting choosing an input channel, shown as a combo box of R, G, B and A."""
+    id: str
+    label: str
+    default: str
+
+
+@dataclass(frozen=True)
+class Toggle:
+    """An on/off setting, shown as a check box."""
+    id: str
+    label: str
+    default: bool
+
+
+SettingSpec = Union[ChannelChoice, Toggle]
+
+
+@dataclass(frozen=True)
+class Source:
+    """
+    One channel of an output: a band of an input, or the constant value when
+    input is None or force is on. Bands can be inverted; a channel whose
+    include is off is left out of the output.
+    """
+    input: Optional[str] = None  # suffix of the input the band is read from
+    channel: Union[str, Setting] = "R"
+    invert: Union[bool, Setting] = False
+    value: int = 255
+    force: Union[bool, Setting] = False
+    include: Union[bool, Setting] = True
+
+
+def constant(value: int) -> Source:
+    """A channel filled with value."""
+    return Source(value=value)
+
+
+@dataclass(frozen=True)
+class OutputSpec:
+    """
+    One output file, key_suffix. It has the size of the size_of input, by
+    default the first input one of its channels reads; bands of inputs of
+    another size are resized to it.
+    """
+    suffix: str
+    kind: str  # "color", "data" or "normal" (see core/image_io.OUTPUT_KINDS)
+    channels: tuple[Source, ...]
+    size_of: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ConversionSpec:
+    id: str
+    display_name: str
+    inputs: tuple[str, ...]
+    outputs: tuple[OutputSpec, ...]
+    settings: tuple[SettingSpec, ...] = ()
+
+    def __post_init__(self) -> None:
+        if not self.inputs or len(set(self.inputs)) != len(self.inputs):
+            raise ValueError(f"{self.id}: inputs must be distinct suffixes")
+        if not self.outputs or len({o.suffix for o in self.outputs}) != len(self.outputs):
+            raise ValueError(f"{self.id}: outputs must have distinct suffixes")
+        by_id = {s.id: s for s in self.settings}
+        if len(by_id) != len(self.settings):
+            raise ValueError(f"{self.id}: settings must have distinct ids")
+        for s in self.settings:
+            if isinstance(s, ChannelChoice) and s.default not in CHANNELS:
+                raise ValueError(f"{self.id}: default of {s.id} must be one of {', '.join(CHANNELS)}")
+
+        def check_ref(value: Any, kind: type, what: str) -> None:
+            if isinstance(value, Setting) and not isinstance(by_id.get(value.id), kind):
+                raise ValueError(f"{self.id}: {what} refers to {value.id!r}, which is not a {kind.__name__} setting")
+
+        for out in self.outputs:
+            where = f"output {out.suffix}"
+            if out.kind not in OUTPUT_KINDS:
+                raise ValueError(f"{self.id}: {where} has unknown kind {out.kind!r}")
+            if not 1 <= len(out.channels) <= 4:
+                raise ValueError(f"{self.id}: {where} must have 1 to 4 channels")
+            if out.size_of is not None and out.size_of not in self.inputs:
+                raise ValueError(f"{self.id}: {where} takes its size from unknown input {out.size_of!r}")
+            if out.size_of is None and all(src.input is None for src in out.channels):
+                raise ValueError(f"{self.id}: {where} reads no input, so it needs size_of")
+            for src in out.channels:
+                if src.input is not None and src.input not in self.inputs:
+                    raise ValueError(f"{self.id}: {where} reads unknown input {src.input!r}")
+                if isinstance(src.channel, str) and src.channel not in CHANNELS:
+                    raise ValueError(f"{self.id}: {where} reads unknown channel {src.channel!r}")
+                if not 0 <= src.value <= 255:
+                    raise ValueError(f"{self.id}: {where} has a constant outside 0-255")
+                check_ref(src.channel, ChannelChoice, where)
+                for flag in (src.invert, src.force, src.include):
+                    check_ref(flag, Toggle, where)
+
+    def default_settings(self) -> dict[str, Any]:
+        return {s.id: s.default for s in self.settings}
+
+    def resolve_settings(self, settings: Mapping[str, Any]) -> dict[str, Any]:
+        """Defaults overridden by settings, validated."""
+        unknown = set(settings) - {s.id for s in self.settings}
+        if unknown:
+            raise ValueError(f"Unknown settings for {self.id}: {', '.join(sorted(unknown))}")
+        merged = {**self.default_settings(), **settings}
+        for s in self.settings:
+            if isinstance(s, ChannelChoice):
+                if merged[s.id] not in CHANNELS:
+                    raise ValueError(f"{s.id} must be one of {', '.join(CHANNELS)}, got {merged[s.id]!r}")
+            else:
+                merged[s.id] = bool(merged[s.id])
+        return merged
+
+
+@dataclass(frozen=True)
+class PlannedChannel:
+    input: Optional[int]  # index into Plan.inputs; None for a constant
+    channel: str
+    invert: bool
+    value: int
+
+
+@dataclass(frozen=True)
+class PlannedOutput:
+    suffix: str
+    kind: str
+    size_of: int  # index into Plan.inputs
+    channels: tuple[PlannedChannel, ...]
+    grayscale: bool  # analysed for grayscale, and written single-channel if it is with compact outputs
+
+
+@dataclass(frozen=True)
+class Plan:
+    inputs: tuple[str, ...]
+    outputs: tuple[PlannedOutput, ...]
+    last_use: tuple[Optional[int], ...]  # per input, the last output that reads its bands; None = only its size is needed
+
+
+def compile_spec(spec: ConversionSpec, settings: Mapping[str, Any]) -> Plan:
+    """Resolve spec with settings into the pass run for every input set."""
+    values = spec.resolve_settings(settings)
+
+    def resolve(value: Any) -> Any:
+        if not isinstance(value, Setting):
+            return value
+        v = values[value.id]
+        return not v if value.negate else v
+
+    index = {suffix: n for n, suffix in enumerate(spec.inputs)}
+    outputs: list[PlannedOutput] = []
+    last_use: list[Optional[int]] = [None] * len(spec.inputs)
+    for out in spec.outputs:
+        channels: list[PlannedChannel] = []
+        for src in out.channels:
+            if not resolve(src.include):
+                continue
+            invert = bool(resolve(src.invert))
+            if src.input is None or resolve(src.force):
+                channels.append(PlannedChannel(None, "", False, 255 - src.value if invert and src.input is None else src.value))
+            else:
+                channels.append(PlannedChannel(index[src.input], resolve(src.channel), invert, 0))
+        if len(channels) not in (1, 3, 4):
+            raise ValueError(f"{spec.id}: output {out.suffix} would have {len(channels)} channels; outputs have 1, 3 or 4")
+
+        n = len(outputs)
+        read = [ch.input for ch in channels if ch.input is not None]
+        for i in read:
+            last_use[i] = n
+        size_of = index[out.size_of] if out.size_of is not None else (read[0] if read else index[next(s.input for s in out.channels if s.input)])
+        grayscale = out.kind == "color" and len(channels) == 3 and all(ch.input is not None for ch in channels)
+        outputs.append(PlannedOutput(out.suffix, out.kind, size_of, tuple(channels), grayscale))
+    return Plan(spec.inputs, tuple(outputs), tuple(last_use))
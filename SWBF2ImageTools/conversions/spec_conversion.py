@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Mapping, Optional, Sequence
+
+import numpy as np
+
+from ..core.channels import constant_value, is_grayscale
+from ..core.decoded_cache import DecodedCache
+from ..core.image_io import (
+    BandSource,
+    ImageHandle,
+    band,
+    capped_size,
+    invert_band,
+    open_image,
+    pack_bands,
+    probe_image,
+    proxy_rgba,
+    resize_band,
+    wait_saves,
+)
+from ..core.scan import iter_suffix_sets
+from ..core.trace import ItemTrace
+from ..models.config import GlobalConfig, JobBase
+from .base import ConversionDefinition, DetectedInput, ItemResult
+from .batch import BatchSteps, Converted, Decoded, SaveOutput, Staged, compacts, decode_inputs, finish_staged, output_levels, run_batch, save_to_files
+from .spec import CHANNELS, ChannelChoice, ConversionSpec, Plan, PlannedOutput, compile_spec
+
+if TYPE_CHECKING:
+    from PySide6.QtWidgets import QCheckBox, QComboBox, QWidget
+
+
+@dataclass(frozen=True)
+class SpecJob(JobBase):
+    plan: Plan
+
+
+def _output_paths(key: str, cfg: SpecJob) -> tuple[Path, ...]:
+    """Every output of an input set with its LOD levels, in plan order."""
+    return tuple(p for out in cfg.plan.outputs for p in output_levels(cfg.output_folder, key, out.suffix, cfg.global_cfg))
+
+
+def _estimate_set_memory(paths: Sequence[Path], cfg: SpecJob) -> int:
+    """
+    Upper bound on the bytes _transform_set holds at once: every decoded input
+    with Pillow's decode buffer, each output with its encoder copy, and the
+    resized bands.
+    """
+    probes = [probe_image(p) for p in paths]
+    total = sum(w * h * 2 * channels for n, ((w, h), channels) in enumerate(probes) if cfg.plan.last_use[n] is not None)
+    downscaled = cfg.global_cfg.max_size > 0 or cfg.global_cfg.lod_levels > 0
+    for out in cfg.plan.outputs:
+        w, h = probes[out.size_of][0]
+        total += w * h * len(out.channels) * (3 if downscaled else 2)
+        total += w * h * sum(1 for ch in out.channels if ch.input is not None and probes[ch.input][0] != (w, h))
+    return total
+
+
+def _prefetch_set(key: str, paths: tuple[Path, ...], cfg: SpecJob, cache: Optional[DecodedCache] = None) -> Decoded:
+    """Read and decode the inputs of a set whose bands the plan reads."""
+    return decode_inputs(key, [p for n, p in enumerate(paths) if cfg.plan.last_use[n] is not None], cfg.global_cfg, cache)
+
+
+def _analysis(arr: np.ndarray, out: PlannedOutput) -> dict[str, Any]:
+    """Channel report of one output; channels that are constants of the plan are not checked."""
+    found: dict[str, Any] = {}
+    constant: dict[str, int] = {}
+    for i, ch in enumerate(out.channels):
+        if ch.input is not None:
+            value = constant_value(arr[..., i])
+            if value is not None:
+                constant[CHANNELS[i]] = value
+    if constant:
+        found["constant"] = constant
+    if out.grayscale and is_grayscale(arr):
+        found["grayscale"] = True
+    return found
+
+
+def _transform_set(key: str, paths: tuple[Path, ...], cfg: SpecJob, decoded: Decoded) -> tuple[list[Future[None]], Staged]:
+    """
+    Run the plan of cfg on a decoded input set: pack each output from bands
+    shared with the other outputs and start encoding it, releasing every
+    input once the last output reading it is packed.
+    """
+    handles = dict(zip((n for n, last in enumerate(cfg.plan.last_use) if last is not None), decoded.handles))
+    sizes = [handles[n].size if n in handles else probe_image(path)[0] for n, path in enumerate(paths)]
+    return _pack_set(key, handles, sizes, cfg, decoded, save_to_files(cfg.output_folder, key, cfg.global_cfg, decoded.tracer))
+
+
+def _convert_images(key: str, decoded: Decoded, cfg: SpecJob, save: SaveOutput) -> tuple[list[Future[Any]], Staged]:
+    """_transform_set on a handle per input, handing the outputs to save."""
+    handles = dict(enumerate(decoded.handles))
+    sizes = [handle.size for handle in decoded.handles]
+    for n, last in enumerate(cfg.plan.last_use):
+        if last is None:
+            handles.pop(n).close()  # only its size is needed
+    return _pack_set(key, handles, sizes, cfg, decoded, save)
+
+
+def _pack_set(
+    key: str,
+    handles: dict[int, ImageHandle],
+    sizes: list[tuple[int, int]],
+    cfg: SpecJob,
+    decoded: Decoded,
+    save: SaveOutput,
+) -> tuple[list[Future[Any]], Staged]:
+    """The packing of _transform_set, from the inputs whose bands the plan reads (by index) and the size of every input."""
+    plan, g = cfg.plan, cfg.global_cfg
+    tracer = decoded.tracer
+    resized: dict[tuple[int, str, tuple[int, int]], np.ndarray] = {}
+    pending: list[Future[Any]] = []
+    channels: dict[str, Any] = {}
+
+    def source(n: int, ch: str, size: tuple[int, int]) -> np.ndarray:
+        if sizes[n] == size:
+            return handles[n].band(ch)
+        arr = resized.get((n, ch, size))
+        if arr is None:
+            with tracer.span("resize", src=list(sizes[n]), dst=list(size)):
+                arr = resized[(n, ch, size)] = resize_band(handles[n].band(ch), size)
+        return arr
+
+    try:
+        for i, out in enumerate(plan.outputs):
+            name = output_levels(cfg.output_folder, key, out.suffix, g)[0].name
+            size = sizes[out.size_of]
+            with tracer.span("pack", output=name):
+                sources: list[BandSource] = [ch.value if ch.input is None else source(ch.input, ch.channel, size) for ch in out.channels]
+                arr = pack_bands(sources, size)
+            inverted = [c for c, ch in enumerate(out.channels) if ch.invert]
+            if inverted:
+                with tracer.span("invert"):
+                    for c in inverted:
+                        invert_band(arr[..., c], out=arr[..., c])
+            with tracer.span("analyze", output=name):
+                found = _analysis(arr, out)
+            if found:
+                channels[out.suffix] = found
+            if arr.shape[2] == 1 or (found.get("grayscale") and compacts(g)):
+                arr = arr[..., 0]
+            pending.append(save(out.suffix, out.kind, arr))
+            del arr, sources
+
+            for n, last in enumerate(plan.last_use):
+                if last == i:
+                    handles[n].close()
+                    for k in [k for k in resized if k[0] == n]:
+                        del resized[k]
+    except BaseException:
+        try:
+            wait_saves(pending)
+        except BaseException:
+            pass  # the packing error is the one to report
+        raise
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    outputs = tuple(str(p) for p in _output_paths(key, cfg))
+    return pending, Staged(outputs, tracer.trace, tracer, decoded.start_us, channels or None)
+
+
+def _process_set(key: str, paths: tuple[Path, ...], cfg: SpecJob) -> Converted:
+    decoded = _prefetch_set(key, paths, cfg)
+    pending, staged = _transform_set(key, paths, cfg, decoded)
+    wait_saves(pending)
+    return finish_staged(staged)
+
+
+def _load_preview_sources(paths: Sequence[Path], max_size: int, cache: Optional[DecodedCache]) -> tuple[np.ndarray, ...]:
+    """Scaled-down RGBA copies of a set's inputs, all the size of the first input's proxy."""
+    variant = ("preview", max_size)
+    proxies: list[np.ndarray] = []
+    for path in paths:
+        size = (proxies[0].shape[1], proxies[0].shape[0]) if proxies else None
+        key = cache.key(path, variant) if cache is not None else None
+        hit = cache.get(key) if cache is not None else None
+        if hit is not None and (size is None or hit[0].shape[1::-1] == size):
+            proxies.append(hit[0])
+            continue
+        with open_image(path, cache) as handle:
+            arr = proxy_rgba(handle, size or capped_size(handle.size, max_size))
+        if cache is not None:
+            cache.put(key, arr)
+        proxies.append(arr)
+    return tuple(proxies)
+
+
+def _render_preview(sources: tuple[np.ndarray, ...], cfg: SpecJob) -> list[tuple[str, np.ndarray]]:
+    """The packing of _transform_set, on preview proxies."""
+    size = (sources[0].shape[1], sources[0].shape[0])
+    rendered: list[tuple[str, np.ndarray]] = []
+    for out in cfg.plan.outputs:
+        arr = pack_bands([ch.value if ch.input is None else band(sources[ch.input], ch.channel) for ch in out.channels], size)
+        for c, ch in enumerate(out.channels):
+            if ch.invert:
+                invert_band(arr[..., c], out=arr[..., c])
+        rendered.append((out.suffix, arr[..., 0] if arr.shape[2] == 1 else arr))
+    return rendered
+
+
+class SpecConversion(ConversionDefinition):
+    """A conversion described by a ConversionSpec, with a settings widget generated from it."""
+
+    def __init__(self, spec: ConversionSpec) -> None:
+        self.spec = spec
+        self.id = spec.id
+        self.display_name = spec.display_name
+        self.input_suffixes = spec.inputs
+        self._widget: Optional[QWidget] = None
+        self._controls: dict[str, QComboBox | QCheckBox] = {}
+
+    def build_settings_widget(self) -> QWidget:
+        if self._widget is not None:
+            return self._widget
+
+        from PySide6.QtWidgets import QCheckBox, QComboBox, QGridLayout, QLabel, QWidget
+
+        w = QWidget()
+        grid = QGridLayout()
+        for row, setting in enumerate(self.spec.settings):
+            if isinstance(setting, ChannelChoice):
+                combo = QComboBox()
+                combo.addItems(list(CHANNELS))
+                combo.setCurrentText(setting.default)
+                grid.addWidget(QLabel(setting.label), row, 0)
+                grid.addWidget(combo, row, 1)
+                self._controls[setting.id] = combo
+            else:
+                cb = QCheckBox(setting.label)
+                cb.setChecked(setting.default)
+                grid.addWidget(cb, row, 0, 1, 2)
+                self._controls[setting.id] = cb
+        if not self.spec.settings:
+            grid.addWidget(QLabel("This conversion has no settings."), 0, 0)
+
+        w.setLayout(grid)
+        self._widget = w
+        return w
+
+    def set_settings_enabled(self, enabled: bool) -> None:
+        if self._widget is not None:
+            self._widget.setEnabled(enabled)
+
+    def on_settings_changed(self, callback: Callable[[], None]) -> None:
+        from PySide6.QtWidgets import QComboBox
+
+        self.build_settings_widget()
+        for control in self._controls.values():
+            if isinstance(control, QComboBox):
+                control.currentTextChanged.connect(lambda _text: callback())
+            else:
+                control.toggled.connect(lambda _checked: callback())
+
+    def scan_inputs(self, input_folder: Path, recursive: bool = True) -> Iterator[list[DetectedInput]]:
+        found = " and ".join(f"_{suffix}" for suffix in self.spec.inputs)
+        for sets in iter_suffix_sets(input_folder, self.spec.inputs, recursive):
+            yield [DetectedInput(key=key, display_line=f"{key}: ({found} found)", payload=paths) for key, paths in sets]
+
+    def detect_inputs(self, input_folder: Path, recursive: bool = True) -> list[DetectedInput]:
+        return [d for batch in self.scan_inputs(input_folder, recursive) for d in batch]
+
+    def input_files(self, item: DetectedInput) -> tuple[Path, ...]:
+        return tuple(item.payload)
+
+    def make_job_config(self, input_folder: Path, output_folder: Path, global_cfg: GlobalConfig) -> SpecJob:
+        from PySide6.QtWidgets import QComboBox
+
+        self.build_settings_widget()
+        settings = {
+            setting_id: control.currentText() if isinstance(control, QComboBox) else control.isChecked()
+            for setting_id, control in self._controls.items()
+        }
+        return self.job_config_from_settings(input_folder, output_folder, global_cfg, settings)
+
+    def default_settings(self) -> dict[str, Any]:
+        return self.spec.default_settings()
+
+    def job_config_from_settings(
+        self,
+        input_folder: Path,
+        output_folder: Path,
+        global_cfg: GlobalConfig,
+        settings: Mapping[str, Any],
+    ) -> SpecJob:
+        return SpecJob(
+            conversion_id=self.id,
+            input_folder=input_folder,
+            output_folder=output_folder,
+            global_cfg=global_cfg,
+            plan=compile_spec(self.spec, settings),
+        )
+
+    def estimate_memory(self, item: DetectedInput, cfg: Any) -> int:
+        return _estimate_set_memory(item.payload, cfg)
+
+    def load_preview(self, item: DetectedInput, max_size: int, cache: Optional[DecodedCache] = None) -> tuple[np.ndarray, ...]:
+        return _load_preview_sources(item.payload, max_size, cache)
+
+    def render_preview(self, sources: Any, cfg: Any) -> list[tuple[str, np.ndarray]]:
+        return _render_preview(sources, cfg)
+
+    def convert_images(self, key: str, decoded: Decoded, cfg: Any, save: SaveOutput) -> tuple[list[Future[Any]], Staged]:
+        return _convert_images(key, decoded, cfg, save)
+
+    def run(
+        self,
+        detected: Sequence[DetectedInput],
+        cfg: Any,
+        progress_cb: Callable[[int, int], None],
+        status_cb: Callable[[str], None],
+        trace_cb: Optional[Callable[[ItemTrace], None]] = None,
+        result_cb: Optional[Callable[[ItemResult], None]] = None,
+    ) -> list[ItemResult]:
+        job: SpecJob = cfg  # type: ignore[assignment]
+        steps = BatchSteps(
+            input_files=lambda item: dict(zip(self.spec.inputs, item.payload)),
+            output_paths=lambda key: _output_paths(key, job),
+            args=lambda item: (item.key, item.payload, job),
+            prefetch=_prefetch_set,
+            transform=_transform_set,
+            process=_process_set,
+            estimate_memory=lambda item: self.estimate_memory(item, job),
+        )
+        return run_batch(steps, detected, job, progress_cb, status_cb, trace_cb, result_cb)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+# Outputs are written under a temporary name next to their final path and
+# renamed into place once complete. A rename within one folder is atomic, so an
+# output path only ever holds a finished file: an interrupted write leaves a
+# `.tmp` file behind, never a truncated output that looks converted.
+
+TEMP_SUFFIX = ".tmp"
+
+
+def temp_path(path: Path) -> Path:
+    return path.with_name(path.name + TEMP_SUFFIX)
+
+
+def commit(tmp: Path, path: Path) -> None:
+    os.replace(tmp, path)
+
+
+def discard(tmp: Path) -> None:
+    try:
+        tmp.unlink()
+    except OSError:
+        pass
+
+
+@contextmanager
+def atomic_write(path: Path) -> Iterator[Path]:
+    """
+    Yield a temporary path to write `path` through. It replaces `path` when
+    the block finishes and is removed if the block raises.
+    """
+    tmp = temp_path(path)
+    try:
+        yield tmp
+    except BaseException:
+        discard(tmp)
+        raise
+    commit(tmp, path)
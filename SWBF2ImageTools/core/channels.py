@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from .atomic import atomic_write
+
+# Outputs are analysed after packing to find channels that hold a single value
+# (an all-black metallic, an all-white AO) and colour outputs that are really
+# grayscale. Checks walk the buffer in row chunks and stop at the first chunk
+# that differs, so a typical texture costs one chunk per check; only outputs
+# that do turn out constant or grayscale are read in full.
+
+_ANALYSIS_ROWS = 64
+
+CHANNEL_REPORT_NAME = "swbf2-image-tools-channels.json"
+CHANNEL_REPORT_VERSION = 1
+
+
+def _row_chunks(h: int) -> range:
+    return range(0, h, _ANALYSIS_ROWS)
+
+
+def constant_value(band: np.ndarray) -> Optional[int]:
+    """The value every pixel of a (h, w) band holds, or None if they differ."""
+    if band.size == 0:
+        return None
+    value = band.flat[0]
+    for y in _row_chunks(band.shape[0]):
+        if not np.all(band[y:y + _ANALYSIS_ROWS] == value):
+            return None
+    return int(value)
+
+
+def is_grayscale(rgb: np.ndarray) -> bool:
+    """Whether R, G and B are equal in every pixel of an (h, w, 3+) array."""
+    for y in _row_chunks(rgb.shape[0]):
+        rows = rgb[y:y + _ANALYSIS_ROWS]
+        if not (np.array_equal(rows[..., 0], rows[..., 1]) and np.array_equal(rows[..., 1], rows[..., 2])):
+            return False
+    return True
+
+
+def constant_channels(arr: np.ndarray, names: str = "RGBA") -> dict[str, int]:
+    """Channel name -> value for each channel of an (h, w, c) array that is constant."""
+    out: dict[str, int] = {}
+    for i in range(arr.shape[2]):
+        value = constant_value(arr[..., i])
+        if value is not None:
+            out[names[i]] = value
+    return out
+
+
+class ChannelReport:
+    """
+    Per output folder list of the outputs whose channels are constant or
+    whose colour is grayscale, keyed by input. Kept up to date across runs:
+    converting an input replaces its entry, and an input with nothing to
+    report has none.
+    """
+
+    def __init__(self, output_folder: Path, entries: Optional[dict[str, Any]] = None) -> None:
+        self.output_folder = output_folder
+        self.entries: dict[str, Any] = entries or {}
+        self._changed = False
+
+    @property
+    def path(self) -> Path:
+        return self.output_folder / CHANNEL_REPORT_NAME
+
+    @classmethod
+    def load(cls, output_folder: Path) -> "ChannelReport":
+        path = output_folder / CHANNEL_REPORT_NAME
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(output_folder)
+        if not isinstance(data, dict) or data.get("version") != CHANNEL_REPORT_VERSION:
+            return cls(output_folder)
+        return cls(output_folder, dict(data.get("entries", {})))
+
+    def record(self, key: str, entry: Optional[dict[str, Any]]) -> None:
+        if entry:
+            if self.entries.get(key) != entry:
+                self.entries[key] = entry
+                self._changed = True
+        elif self.entries.pop(key, None) is not None:
+            self._changed = True
+
+    def save(self) -> None:
+        """Write the report if an entry changed; an empty report is removed."""
+        if not self._changed:
+            return
+        self._changed = False
+        if not self.entries:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+            return
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+        with atomic_write(self.path) as tmp, open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": CHANNEL_REPORT_VERSION, "entries": self.entries}, f, indent=1, sort_keys=True)
@@ -0,0 +1,545 @@
+from __future__ import annotations
+
+import io
+import struct
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+
+import numpy as np
+
+from .atomic import commit, discard, temp_path
+from .dds import _BC7_WEIGHTS, _CHUNK_BLOCKS, _DDPF_FOURCC, _TEXELS, DDS_MAGIC, _expand_565
+
+# Block-compressed DDS encoding, vectorized with NumPy over every 4x4 block of
+# a chunk of block rows at once. Endpoints come from the principal axis of
+# each block, optionally refined by least squares against the chosen indices.
+# BC7 blocks are always written in mode 6 (one subset, RGBA, 4-bit indices).
+
+# quality -> (power iterations for the principal axis, least-squares refinement
+# passes, exhaustive BC7 index search instead of projecting onto the axis)
+_QUALITY_PARAMS: dict[str, tuple[int, int, bool]] = {
+    "fast": (2, 0, False),
+    "balanced": (4, 1, False),
+    "high": (8, 2, True),
+}
+
+# (format, sRGB) -> DXGI_FORMAT written to the DX10 header
+_DXGI_CODES = {
+    ("BC1", False): 71,
+    ("BC1", True): 72,
+    ("BC5", False): 83,
+    ("BC7", False): 98,
+    ("BC7", True): 99,
+}
+
+_DDSD_CAPS = 0x1
+_DDSD_HEIGHT = 0x2
+_DDSD_WIDTH = 0x4
+_DDSD_PIXELFORMAT = 0x1000
+_DDSD_MIPMAPCOUNT = 0x20000
+_DDSD_LINEARSIZE = 0x80000
+_DDSCAPS_COMPLEX = 0x8
+_DDSCAPS_TEXTURE = 0x1000
+_DDSCAPS_MIPMAP = 0x400000
+_D3D10_RESOURCE_DIMENSION_TEXTURE2D = 3
+
+
+# --- shared helpers ---
+#
+# Encoders work on channel-planar float32 texels of shape (c, 16, n), blocks on
+# the last axis, so every step is a long vector operation over all n blocks
+# of a chunk. Texel values and palettes are whole numbers, which keeps the
+# squared distances exact in float32.
+
+def _principal_endpoints(x: np.ndarray, iters: int) -> tuple[np.ndarray, np.ndarray]:
+    """Extremes of each block's texels along their principal axis, as (c, n) endpoints."""
+    c = x.shape[0]
+    mean = x.mean(axis=1)
+    d = x - mean[:, None, :]
+    cov = [[None] * c for _ in range(c)]
+    for i in range(c):
+        for j in range(i, c):
+            cov[i][j] = cov[j][i] = (d[i] * d[j]).sum(axis=0)
+
+    # Power iteration, starting from the covariance column of the channel with
+    # the largest variance so anti-correlated channels are handled too.
+    start = np.argmax(np.stack([cov[i][i] for i in range(c)]), axis=0)
+    axis = np.stack([np.choose(start, [cov[i][j] for j in range(c)]) for i in range(c)])
+    for _ in range(iters + 1):
+        axis /= np.maximum(np.sqrt((axis * axis).sum(axis=0)), 1e-6)
+        axis = np.stack([sum(cov[i][j] * axis[j] for j in range(c)) for i in range(c)])
+    axis /= np.maximum(np.sqrt((axis * axis).sum(axis=0)), 1e-6)
+
+    t = sum(d[i] * axis[i] for i in range(c))
+    e0 = mean + t.max(axis=0) * axis
+    e1 = mean + t.min(axis=0) * axis
+    return np.clip(e0, 0, 255), np.clip(e1, 0, 255)
+
+
+def _fit_endpoints(x: np.ndarray, alpha: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Least-squares endpoints for texels x (c, 16, n) given each texel's
+    interpolation weight toward e1 (16, n). Returns (c, n) endpoints e0 and
+    e1 and a mask of blocks whose system was solvable.
+    """
+    beta = 1.0 - alpha
+    a = (beta * beta).sum(axis=0)
+    b = (alpha * beta).sum(axis=0)
+    c = (alpha * alpha).sum(axis=0)
+    bx = (beta * x).sum(axis=1)
+    ax = (alpha * x).sum(axis=1)
+
+    det = a * c - b * b
+    ok = det > 1e-6
+    det = np.where(ok, det, 1.0)
+    e0 = (c * bx - b * ax) / det
+    e1 = (a * ax - b * bx) / det
+    return np.clip(e0, 0, 255), np.clip(e1, 0, 255), ok
+
+
+def _nearest(x: np.ndarray, palette: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Nearest palette entry (c, k, n) for each texel (c, 16, n), and the summed squared error per block."""
+    k_count = palette.shape[1]
+    bits = (k_count - 1).bit_length()
+
+    # The distance and the entry number share one key (distance << bits | k),
+    # so a running minimum finds both; ties keep the lowest entry.
+    best = np.full(x.shape[1:], np.inf, dtype=np.float32)
+    d = np.empty_like(best)
+    tmp = np.empty_like(best)
+    for k in range(k_count):
+        np.subtract(x[0], palette[0, k], out=d)
+        d *= d
+        for ch in range(1, x.shape[0]):
+            np.subtract(x[ch], palette[ch, k], out=tmp)
+            tmp *= tmp
+            d += tmp
+        d *= 1 << bits
+        d += k
+        np.minimum(best, d, out=best)
+
+    key = best.astype(np.int32)
+    return key & ((1 << bits) - 1), (key >> bits).sum(axis=0)
+
+
+def _error(x: np.ndarray, palette: np.ndarray, idx: np.ndarray) -> np.ndarray:
+    """Summed squared error per block when texels (c, 16, n) use palette (c, k, n) entries idx."""
+    err = np.zeros(x.shape[2], dtype=np.float32)
+    for ch in range(x.shape[0]):
+        diff = np.take_along_axis(palette[ch], idx, axis=0) - x[ch]
+        err += (diff * diff).sum(axis=0)
+    return err
+
+
+def _keep_better(better: np.ndarray, new: tuple, old: tuple) -> tuple:
+    """Per-block select between two tuples of arrays with the block axis last."""
+    return tuple(np.where(better, n, o) for n, o in zip(new, old))
+
+
+def _pack_indices(idx: np.ndarray, bits: int, shift: int) -> np.ndarray:
+    shifts = (np.uint64(shift) + np.uint64(bits) * _TEXELS)[:, None]
+    return (idx.astype(np.uint64) << shifts).sum(axis=0, dtype=np.uint64)
+
+
+def _words_to_bytes(*words: np.ndarray) -> np.ndarray:
+    return np.stack(words, axis=1).astype("<u8").view(np.uint8).reshape(words[0].shape[0], 8 * len(words))
+
+
+# --- BC1 ---
+
+_BC1_ALPHA = np.array([0.0, 1.0, 1 / 3, 2 / 3], dtype=np.float32)
+_BC1_SWAP = np.array([1, 0, 3, 2], dtype=np.int32)
+
+
+def _bc1_quantize(e: np.ndarray) -> np.ndarray:
+    r = np.rint(e[0] * (31 / 255)).astype(np.int32)
+    g = np.rint(e[1] * (63 / 255)).astype(np.int32)
+    b = np.rint(e[2] * (31 / 255)).astype(np.int32)
+    return (r << 11) | (g << 5) | b
+
+
+def _bc1_palette(c0: np.ndarray, c1: np.ndarray) -> np.ndarray:
+    e0 = _expand_565(c0).T
+    e1 = _expand_565(c1).T
+    return np.stack([e0, e1, (2 * e0 + e1) // 3, (e0 + 2 * e1) // 3], axis=1).astype(np.float32)
+
+
+def _encode_bc1(x: np.ndarray, params: tuple[int, int, bool]) -> np.ndarray:
+    iters, refine, _ = params
+
+    e0, e1 = _principal_endpoints(x, iters)
+    c0, c1 = _bc1_quantize(e0), _bc1_quantize(e1)
+    idx, err = _nearest(x, _bc1_palette(c0, c1))
+    for _ in range(refine):
+        f0, f1, ok = _fit_endpoints(x, _BC1_ALPHA[idx])
+        n0, n1 = _bc1_quantize(f0), _bc1_quantize(f1)
+        nidx, nerr = _nearest(x, _bc1_palette(n0, n1))
+        c0, c1, idx, err = _keep_better(ok & (nerr < err), (n0, n1, nidx, nerr), (c0, c1, idx, err))
+
+    # Four-colour mode needs c0 > c1; equal endpoints decode index 0 in either mode.
+    swap = c0 < c1
+    c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+    idx = np.where(swap, _BC1_SWAP[idx], idx)
+    idx[:, c0 == c1] = 0
+
+    colors = c0.astype(np.uint64) | (c1.astype(np.uint64) << np.uint64(16))
+    return _words_to_bytes(colors | _pack_indices(idx, 2, 32))
+
+
+# --- BC4 / BC5 ---
+
+_BC4_ALPHA = np.array([0.0, 1.0] + [k / 7 for k in range(1, 7)], dtype=np.float32)
+
+
+def _bc4_palette(a0: np.ndarray, a1: np.ndarray) -> np.ndarray:
+    cols = [a0, a1] + [((7 - k) * a0 + k * a1) // 7 for k in range(1, 7)]
+    return np.stack(cols)[None].astype(np.float32)
+
+
+def _encode_bc4_values(x: np.ndarray, params: tuple[int, int, bool]) -> np.ndarray:
+    """(1, 16, n) values -> (n,) uint64 BC4 blocks in eight-value mode."""
+    _, refine, _ = params
+
+    a0 = x[0].max(axis=0).astype(np.int32)
+    a1 = x[0].min(axis=0).astype(np.int32)
+    idx, err = _nearest(x, _bc4_palette(a0, a1))
+    for _ in range(refine):
+        f0, f1, ok = _fit_endpoints(x, _BC4_ALPHA[idx])
+        n0 = np.rint(f0[0]).astype(np.int32)
+        n1 = np.rint(f1[0]).astype(np.int32)
+        nidx, nerr = _nearest(x, _bc4_palette(n0, n1))
+        a0, a1, idx, err = _keep_better(ok & (n0 > n1) & (nerr < err), (n0, n1, nidx, nerr), (a0, a1, idx, err))
+
+    # Flat blocks decode index 0 as a0 in the six-value mode they fall into.
+    idx[:, a0 == a1] = 0
+    ends = a0.astype(np.uint64) | (a1.astype(np.uint64) << np.uint64(8))
+    return ends | _pack_indices(idx, 3, 16)
+
+
+def _encode_bc5(x: np.ndarray, params: tuple[int, int, bool]) -> np.ndarray:
+    return _words_to_bytes(_encode_bc4_values(x[0:1], params), _encode_bc4_values(x[1:2], params))
+
+
+# --- BC7 (mode 6) ---
+
+_BC7_W = _BC7_WEIGHTS[4].astype(np.int32)[:, None]
+_BC7_ALPHA = (_BC7_WEIGHTS[4] / 64).astype(np.float32)
+# Projected position along the endpoint segment, in 1/_BC7_T_STEPS steps -> nearest index
+_BC7_T_STEPS = 256
+_BC7_T_INDEX = np.searchsorted(
+    (_BC7_WEIGHTS[4][:-1] + _BC7_WEIGHTS[4][1:]) / 128, (np.arange(_BC7_T_STEPS + 1) + 0.5) / _BC7_T_STEPS
+).astype(np.int32)
+_BC7_INDEX_SHIFTS = (4 * np.arange(1, 16)).astype(np.uint64)[:, None]
+
+
+def _bc7_quantize(e: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Float (4, n) RGBA endpoints -> 7-bit values and the p-bit shared by the endpoint's channels."""
+    q0 = np.clip(np.rint(e / 2), 0, 127)
+    q1 = np.clip(np.rint((e - 1) / 2), 0, 127)
+    err0 = ((2 * q0 - e) ** 2).sum(axis=0)
+    err1 = ((2 * q1 + 1 - e) ** 2).sum(axis=0)
+    p = (err1 < err0).astype(np.int32)
+    q = np.where(p == 1, q1, q0).astype(np.int32)
+    return q, p
+
+
+def _bc7_assign(x: np.ndarray, q0: np.ndarray, p0: np.ndarray, q1: np.ndarray, p1: np.ndarray, exhaustive: bool) -> tuple[np.ndarray, np.ndarray]:
+    v0 = 2 * q0 + p0
+    v1 = 2 * q1 + p1
+    if exhaustive:
+        palette = ((64 - _BC7_W) * v0[:, None, :] + _BC7_W * v1[:, None, :] + 32) >> 6
+        return _nearest(x, palette.astype(np.float32))
+
+    # Project onto the quantized endpoint segment and round to the nearest weight.
+    d = (v1 - v0).astype(np.float32)
+    t = sum((x[c] - v0[c]) * d[c] for c in range(4))
+    t *= _BC7_T_STEPS / np.maximum((d * d).sum(axis=0), 1e-6)
+    idx = _BC7_T_INDEX[np.clip(t, 0, _BC7_T_STEPS).astype(np.int32)]
+
+    w = _BC7_WEIGHTS[4].astype(np.int32)[idx]
+    err = np.zeros(x.shape[2], dtype=np.float32)
+    for c in range(4):
+        diff = (((64 - w) * v0[c] + w * v1[c] + 32) >> 6) - x[c]
+        err += (diff * diff).sum(axis=0)
+    return idx, err
+
+
+def _encode_bc7(x: np.ndarray, params: tuple[int, int, bool]) -> np.ndarray:
+    iters, refine, exhaustive = params
+
+    e0, e1 = _principal_endpoints(x, iters)
+    (q0, p0), (q1, p1) = _bc7_quantize(e0), _bc7_quantize(e1)
+    idx, err = _bc7_assign(x, q0, p0, q1, p1, exhaustive)
+    for _ in range(refine):
+        f0, f1, ok = _fit_endpoints(x, _BC7_ALPHA[idx])
+        (n0, m0), (n1, m1) = _bc7_quantize(f0), _bc7_quantize(f1)
+        nidx, nerr = _bc7_assign(x, n0, m0, n1, m1, exhaustive)
+        q0, p0, q1, p1, idx, err = _keep_better(ok & (nerr < err), (n0, m0, n1, m1, nidx, nerr), (q0, p0, q1, p1, idx, err))
+
+    # The anchor texel stores only three index bits, so its index must be < 8.
+    flip = idx[0] >= 8
+    q0, q1 = np.where(flip, q1, q0), np.where(flip, q0, q1)
+    p0, p1 = np.where(flip, p1, p0), np.where(flip, p0, p1)
+    idx = np.where(flip, 15 - idx, idx)
+
+    q0 = q0.astype(np.uint64)
+    q1 = q1.astype(np.uint64)
+    lo = np.full(x.shape[2], 1 << 6, dtype=np.uint64)
+    for c in range(4):
+        lo |= q0[c] << np.uint64(7 + 14 * c)
+        lo |= q1[c] << np.uint64(14 + 14 * c)
+    lo |= p0.astype(np.uint64) << np.uint64(63)
+
+    u = idx.astype(np.uint64)
+    hi = p1.astype(np.uint64) | (u[0] << np.uint64(1)) | (u[1:] << _BC7_INDEX_SHIFTS).sum(axis=0, dtype=np.uint64)
+    return _words_to_bytes(lo, hi)
+
+
+# format -> (encoder, bytes per block, channels the encoder expects)
+_ENCODERS: dict[str, tuple[Callable[[np.ndarray, tuple[int, int, bool]], np.ndarray], int, int]] = {
+    "BC1": (_encode_bc1, 8, 3),
+    "BC5": (_encode_bc5, 16, 2),
+    "BC7": (_encode_bc7, 16, 4),
+}
+
+
+def _fit_channels(pixels: np.ndarray, channels: int) -> np.ndarray:
+    """Widen L/LA/RGB pixels or drop channels so there are exactly `channels`."""
+    if pixels.ndim == 2:
+        pixels = pixels[..., None]
+    c = pixels.shape[2]
+    if c in (1, 2) and channels > 2:
+        pixels = pixels[..., [0, 0, 0] + ([1] if c == 2 else [])]
+        c = pixels.shape[2]
+    if c >= channels:
+        return pixels[..., :channels]
+    pad = np.full(pixels.shape[:2] + (channels - c,), 255, dtype=np.uint8)
+    return np.concatenate([pixels, pad], axis=2)
+
+
+def encode_blocks(pixels: np.ndarray, fmt: str, quality: str) -> np.ndarray:
+    """Encode (h, w, c) uint8 pixels into (n, block_bytes) blocks in row-major block order."""
+    if quality not in _QUALITY_PARAMS:
+        raise ValueError(f"Unsupported DDS quality: {quality}")
+    encoder, block_bytes, channels = _ENCODERS[fmt]
+    params = _QUALITY_PARAMS[quality]
+
+    pixels = _fit_channels(pixels, channels)
+    h, w = pixels.shape[:2]
+    pad_h, pad_w = -h % 4, -w % 4
+    if pad_h or pad_w:
+        pixels = np.pad(pixels, ((0, pad_h), (0, pad_w), (0, 0)), mode="edge")
+    bx, by = (w + pad_w) // 4, (h + pad_h) // 4
+
+    out = np.empty((bx * by, block_bytes), dtype=np.uint8)
+    rows_per_chunk = max(1, (_CHUNK_BLOCKS // 4) // bx)
+    for r0 in range(0, by, rows_per_chunk):
+        r1 = min(by, r0 + rows_per_chunk)
+        strip = pixels[r0 * 4:r1 * 4]
+        planes = strip.reshape(r1 - r0, 4, bx, 4, channels).transpose(4, 1, 3, 0, 2).astype(np.float32)
+        out[r0 * bx:r1 * bx] = encoder(planes.reshape(channels, 16, -1), params)
+    return out
+
+
+# --- mip chain ---
+
+_SRGB_TO_LINEAR = np.where(
+    np.arange(256) <= 10,
+    np.arange(256) / 255 / 12.92,
+    ((np.arange(256) / 255 + 0.055) / 1.055) ** 2.4,
+).astype(np.float32)
+
+
+def _linear_to_srgb(x: np.ndarray) -> np.ndarray:
+    x = np.clip(x, 0, 1)
+    return np.where(x <= 0.0031308, x * 12.92, 1.055 * np.power(x, 1 / 2.4) - 0.055) * 255
+
+
+def _downsample(pixels: np.ndarray, srgb: bool) -> np.ndarray:
+    """2x2 box filter; sRGB colour channels are averaged in linear light."""
+    h, w, c = pixels.shape
+    x = pixels.astype(np.float32)
+    if srgb:
+        x[..., :3] = _SRGB_TO_LINEAR[pixels[..., :3]]
+    if h > 1:
+        x = (x[0:h - 1:2] + x[1:h:2]) * 0.5
+    if w > 1:
+        x = (x[:, 0:w - 1:2] + x[:, 1:w:2]) * 0.5
+    if srgb:
+        x[..., :3] = _linear_to_srgb(x[..., :3])
+    return np.clip(np.rint(x), 0, 255).astype(np.uint8)
+
+
+def mip_count(size_wh: tuple[int, int]) -> int:
+    return max(size_wh).bit_length()
+
+
+def _header(size_wh: tuple[int, int], mips: int, fmt: str, dxgi: int) -> bytes:
+    w, h = size_wh
+    linear_size = ((w + 3) // 4) * ((h + 3) // 4) * _ENCODERS[fmt][1]
+    flags = _DDSD_CAPS | _DDSD_HEIGHT | _DDSD_WIDTH | _DDSD_PIXELFORMAT | _DDSD_LINEARSIZE
+    caps = _DDSCAPS_TEXTURE
+    if mips > 1:
+        flags |= _DDSD_MIPMAPCOUNT
+        caps |= _DDSCAPS_COMPLEX | _DDSCAPS_MIPMAP
+
+    header = struct.pack("<7I", 124, flags, h, w, linear_size, 0, mips) + bytes(44)
+    pixel_format = struct.pack("<2I4s5I", 32, _DDPF_FOURCC, b"DX10", 0, 0, 0, 0, 0)
+    caps_block = struct.pack("<5I", caps, 0, 0, 0, 0)
+    dx10 = struct.pack("<5I", dxgi, _D3D10_RESOURCE_DIMENSION_TEXTURE2D, 0, 1, 0)
+    return DDS_MAGIC + header + pixel_format + caps_block + dx10
+
+
+def _next_level(size_wh: tuple[int, int]) -> tuple[int, int]:
+    w, h = size_wh
+    return (w // 2 if w > 1 else 1, h // 2 if h > 1 else 1)
+
+
+class _LevelStream:
+    """
+    One mip level being written. Rows are encoded in whole block rows at the
+    level's offset in the file, and each encoded chunk is downsampled into the
+    next level. Chunks always hold an even number of rows (or the whole final
+    remainder), so the result is exactly what downsampling the full level gives.
+    """
+
+    def __init__(self, writer: "DdsStripWriter", size_wh: tuple[int, int], offset: int, levels_left: int) -> None:
+        self._writer = writer
+        self.size = size_wh
+        self._offset = offset
+        self._pending: list[np.ndarray] = []
+        self._pending_rows = 0
+        self._next: _LevelStream | None = None
+        if levels_left > 1:
+            w, h = size_wh
+            blocks = ((w + 3) // 4) * ((h + 3) // 4)
+            self._next = _LevelStream(writer, _next_level(size_wh), offset + blocks * writer.block_bytes, levels_left - 1)
+
+    def feed(self, rows: np.ndarray) -> None:
+        self._pending.append(rows)
+        self._pending_rows += rows.shape[0]
+        if self._pending_rows >= 4:
+            self._flush(self._pending_rows - self._pending_rows % 4)
+
+    def finish(self) -> None:
+        if self._pending_rows:
+            self._flush(self._pending_rows)
+        if self._next is not None:
+            self._next.finish()
+
+    def _flush(self, n: int) -> None:
+        rows = np.concatenate(self._pending) if len(self._pending) > 1 else self._pending[0]
+        chunk, rest = rows[:n], rows[n:]
+        self._pending = [rest] if rest.shape[0] else []
+        self._pending_rows = rest.shape[0]
+
+        blocks = encode_blocks(chunk, self._writer.fmt, self._writer.quality)
+        self._writer._write_at(self._offset, blocks.data)
+        self._offset += blocks.nbytes
+
+        if self._next is not None:
+            if self.size[1] > 1 and chunk.shape[0] % 2:
+                chunk = chunk[:-1]  # the last row of an odd-height level has no pair
+            if chunk.shape[0]:
+                self._next.feed(_downsample(chunk, self._writer.srgb))
+
+
+class DdsStripWriter:
+    """
+    Writes a DDS from rows supplied top to bottom, in strips of any height.
+    Every mip level is encoded as its rows become available and written at its
+    precomputed offset, so only a few rows per level are held at once. The
+    file is written under a temporary name and renamed into place on close;
+    with path None it is built in memory and left in `data` on close.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path],
+        size_wh: tuple[int, int],
+        fmt: str,
+        srgb: bool = False,
+        mips: bool = True,
+        quality: str = "balanced",
+    ) -> None:
+        fmt = fmt.upper()
+        if fmt not in _ENCODERS:
+            raise ValueError(f"Unsupported DDS output format: {fmt}")
+        if quality not in _QUALITY_PARAMS:
+            raise ValueError(f"Unsupported DDS quality: {quality}")
+        self.fmt = fmt
+        self.quality = quality
+        self.srgb = srgb and fmt != "BC5"
+        self.block_bytes = _ENCODERS[fmt][1]
+
+        levels = mip_count(size_wh) if mips else 1
+        header = _header(size_wh, levels, fmt, _DXGI_CODES[(fmt, self.srgb)])
+        self._path = path
+        self._tmp: Optional[Path] = None
+        self._buffer: Optional[io.BytesIO] = None
+        self._file: BinaryIO
+        if path is None:
+            self._file = self._buffer = io.BytesIO()
+        else:
+            self._tmp = temp_path(path)
+            self._file = open(self._tmp, "wb")
+        self.data = b""
+        self._file.write(header)
+        self._top = _LevelStream(self, size_wh, len(header), levels)
+
+    def __enter__(self) -> "DdsStripWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _write_at(self, offset: int, data) -> None:
+        self._file.seek(offset)
+        self._file.write(data)
+
+    def write_rows(self, rows: np.ndarray) -> None:
+        if rows.ndim == 2:
+            rows = rows[..., None]
+        if rows.shape[0]:
+            self._top.feed(rows)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        try:
+            self._top.finish()
+        except BaseException:
+            self.abort()
+            raise
+        if self._buffer is not None:
+            self.data = self._buffer.getvalue()
+        self._file.close()
+        if self._tmp is not None:
+            commit(self._tmp, self._path)
+
+    def abort(self) -> None:
+        """Drop a partially written output."""
+        self._file.close()
+        if self._tmp is not None:
+            discard(self._tmp)
+
+
+def write_dds(path: Path, pixels: np.ndarray, fmt: str, srgb: bool = False, mips: bool = True, quality: str = "balanced") -> None:
+    """
+    Write (h, w, c) uint8 pixels as a BC1, BC5 or BC7 DDS with a DX10 header.
+    With mips, the full chain down to 1x1 is generated from the top level.
+    """
+    h, w = pixels.shape[:2]
+    with DdsStripWriter(path, (w, h), fmt, srgb, mips, quality) as out:
+        out.write_rows(pixels)
+
+
+def encode_dds(pixels: np.ndarray, fmt: str, srgb: bool = False, mips: bool = True, quality: str = "balanced") -> bytes:
+    """The DDS write_dds writes, as bytes."""
+    h, w = pixels.shape[:2]
+    with DdsStripWriter(None, (w, h), fmt, srgb, mips, quality) as out:
+        out.write_rows(pixels)
+    return out.data
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Hashable, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Decoding is the slowest step that does not depend on the settings, and in an
+# interactive session the same inputs are decoded over and over: for the
+# preview, then again for Process after a setting changed. Decoded pixels are
+# kept in a process-wide LRU bounded in bytes, keyed by path plus size and
+# mtime so an input that is exported again is decoded afresh.
+
+# Default capacity of the GUI session's cache. Batch runs (CLI) default to no cache.
+DEFAULT_DECODE_CACHE_MB = 1024
+
+CacheKey = tuple[str, int, int, Hashable]
+
+
+class DecodedCache:
+    """
+    Size-bounded LRU of decoded pixel arrays. Cached arrays are made
+    read-only, since every user gets the same buffer. Safe to use from
+    several threads.
+    """
+
+    def __init__(self, capacity_bytes: int = 0) -> None:
+        self._capacity = max(0, capacity_bytes)
+        self._entries: OrderedDict[CacheKey, tuple[np.ndarray, Any]] = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def set_capacity(self, capacity_bytes: int) -> None:
+        with self._lock:
+            self._capacity = max(0, capacity_bytes)
+            self._evict()
+
+    def key(self, path: Path, variant: Hashable = None) -> Optional[CacheKey]:
+        """Key of path as it is on disk now, or None if it cannot be stat'ed (or caching is off)."""
+        if self._capacity == 0:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (str(path), st.st_size, st.st_mtime_ns, variant)
+
+    def get(self, key: Optional[CacheKey]) -> Optional[tuple[np.ndarray, Any]]:
+        """(array, metadata) stored under key, or None."""
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def __contains__(self, key: Optional[CacheKey]) -> bool:
+        with self._lock:
+            return key is not None and key in self._entries
+
+    def put(self, key: Optional[CacheKey], arr: np.ndarray, meta: Any = None) -> None:
+        """Store arr under key; arrays larger than the whole cache are not kept."""
+        if key is None or arr.nbytes > self._capacity:
+            return
+        arr.flags.writeable = False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old[0].nbytes
+            self._entries[key] = (arr, meta)
+            self._nbytes += arr.nbytes
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def _evict(self) -> None:
+        while self._entries and self._nbytes > self._capacity:
+            _key, (arr, _meta) = self._entries.popitem(last=False)
+            self._nbytes -= arr.nbytes
+
+
+_shared_cache = DecodedCache()
+
+
+def _forget_shared_cache() -> None:
+    # Worker processes are not meant to reuse decodes (see csnam_to_cnorm.run),
+    # and the inherited lock may have been held by another thread at the fork.
+    global _shared_cache
+    _shared_cache = DecodedCache()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_shared_cache)
+
+
+def shared_cache() -> DecodedCache:
+    """The cache of this process. Its capacity is 0 (off) until something sets it."""
+    return _shared_cache
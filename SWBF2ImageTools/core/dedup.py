@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import os
+import shutil
+from pathlib import Path
+from typing import Mapping, Optional, Sequence
+
+from .atomic import atomic_write, discard
+from .manifest import hash_file
+
+# Exports often repeat the same texture under several prefixes (shared detail
+# maps, decals, LOD variants). Items whose inputs are byte-identical produce
+# identical outputs, so only the first of each group is converted and the
+# others get links to (or copies of) its outputs.
+
+DEDUP_MODES = ["off", "link", "copy"]
+
+
+def find_duplicates(
+    inputs: Sequence[Sequence[Path]],
+    known_hashes: Optional[Mapping[str, str]] = None,
+) -> dict[int, list[int]]:
+    """
+    Group items whose inputs are byte-identical, role by role. Returns the
+    index of the first item of every group with more than one member, mapped
+    to the indices of the others, in input order.
+
+    Items are grouped by input sizes first and only those sharing their sizes
+    with another item are hashed, so unique inputs are never read. Hashes in
+    known_hashes (path -> sha256, e.g. from the manifest) are reused. An input
+    that cannot be read leaves its item ungrouped, for processing to report.
+    """
+    known = dict(known_hashes or {})
+
+    by_size: dict[tuple[int, ...], list[int]] = {}
+    for i, paths in enumerate(inputs):
+        try:
+            sizes = tuple(p.stat().st_size for p in paths)
+        except OSError:
+            continue
+        by_size.setdefault(sizes, []).append(i)
+
+    by_content: dict[tuple[str, ...], list[int]] = {}
+    for candidates in by_size.values():
+        if len(candidates) < 2:
+            continue
+        for i in candidates:
+            digest: list[str] = []
+            try:
+                for p in inputs[i]:
+                    if str(p) not in known:
+                        known[str(p)] = hash_file(p)
+                    digest.append(known[str(p)])
+            except OSError:
+                continue
+            by_content.setdefault(tuple(digest), []).append(i)
+
+    groups: dict[int, list[int]] = {}
+    for members in by_content.values():
+        if len(members) > 1:
+            members.sort()
+            groups[members[0]] = members[1:]
+    return groups
+
+
+def materialize(src: Path, dst: Path, mode: str) -> bool:
+    """
+    Make dst a hard link to src ("link") or a copy of it ("copy"). Links fall
+    back to copies where the file system does not support them. Replaces dst
+    atomically. Returns True if a link was made.
+    """
+    if mode not in ("link", "copy"):
+        raise ValueError(f"Unsupported dedup mode: {mode}")
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(dst) as tmp:
+        discard(tmp)
+        if mode == "link":
+            try:
+                os.link(src, tmp)
+                return True
+            except OSError:
+                pass  # other volume, FAT, or no link support: copy instead
+        shutil.copyfile(src, tmp)
+    return False
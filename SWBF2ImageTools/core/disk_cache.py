@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from .atomic import atomic_write, discard
+from .manifest import hash_file
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Decoded inputs can also be kept on disk across sessions, as raw .npy arrays
+# named by the SHA-256 of the source file. A hit memory-maps the array, so the
+# pixels are paged in as packing reads them and nothing is decoded. Entries
+# are written atomically and looked up by name, so worker processes (and
+# several runs at once) can share one cache folder.
+#
+# Hashing a source is far cheaper than decoding it, and is skipped altogether
+# for files whose path, size and mtime were hashed before: a small index file
+# per (path, size, mtime) holds the content hash.
+
+DISK_CACHE_DIRNAME = "swbf2-image-tools"
+_ENTRY_SUFFIX = ".npy"
+# Part of every entry name; bumped when decoding changes, so entries decoded
+# the old way are never hit and age out of the cache.
+_ENTRY_VERSION = 2
+_INDEX_DIR = "index"
+
+
+def default_cache_dir() -> Path:
+    """Per-user cache folder: %LOCALAPPDATA% on Windows, $XDG_CACHE_HOME or ~/.cache elsewhere."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / DISK_CACHE_DIRNAME / "decoded"
+
+
+class DiskDecodeCache:
+    """
+    Size-capped on-disk cache of decoded pixel arrays, evicting the least
+    recently used entries (by mtime, which a hit refreshes) once the cap is
+    exceeded.
+    """
+
+    def __init__(self, folder: Path, capacity_bytes: int) -> None:
+        self.folder = folder
+        self.capacity = max(0, capacity_bytes)
+
+    def _index_path(self, path: Path, st: os.stat_result) -> Path:
+        ident = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+        return self.folder / _INDEX_DIR / hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, digest: str) -> Path:
+        return self.folder / f"{digest}-v{_ENTRY_VERSION}{_ENTRY_SUFFIX}"
+
+    def digest(self, path: Path) -> Optional[str]:
+        """Content hash of path, from the index when the file is unchanged; None if it cannot be read."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        index = self._index_path(path, st)
+        try:
+            return index.read_text(encoding="ascii").strip()
+        except OSError:
+            pass
+        try:
+            digest = hash_file(path)
+        except OSError:
+            return None
+        try:
+            index.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_write(index) as tmp:
+                tmp.write_text(digest, encoding="ascii")
+        except OSError:
+            pass  # an unwritable cache only costs hashing again
+        return digest
+
+    def get(self, digest: Optional[str]) -> Optional[np.ndarray]:
+        """The array stored for digest, memory-mapped read-only, or None."""
+        if digest is None:
+            return None
+        import numpy as np  # imported on use, so the window can show its settings without NumPy
+        entry = self._entry_path(digest)
+        try:
+            arr = np.load(entry, mmap_mode="r")
+            os.utime(entry)  # most recently used
+        except (OSError, ValueError):
+            return None
+        return arr
+
+    def put(self, digest: Optional[str], arr: np.ndarray) -> None:
+        """Store arr for digest, then evict old entries beyond the cap. Failures are ignored."""
+        if digest is None or arr.nbytes > self.capacity:
+            return
+        import numpy as np
+        entry = self._entry_path(digest)
+        try:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            with atomic_write(entry) as tmp, open(tmp, "wb") as f:
+                np.save(f, np.ascontiguousarray(arr), allow_pickle=False)
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits its cap."""
+        entries: list[tuple[float, int, Path]] = []
+        try:
+            with os.scandir(self.folder) as it:
+                for e in it:
+                    if e.name.endswith(_ENTRY_SUFFIX) and e.is_file():
+                        st = e.stat()
+                        entries.append((st.st_mtime, st.st_size, Path(e.path)))
+        except OSError:
+            return
+        total = sum(size for _mtime, size, _path in entries)
+        if total <= self.capacity:
+            return
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total <= self.capacity:
+                break
+            discard(path)
+            total -= size
+
+
+_open_caches: dict[tuple[str, int], DiskDecodeCache] = {}
+
+
+def open_disk_cache(folder: str, capacity_mb: int) -> Optional[DiskDecodeCache]:
+    """The disk cache for a configured folder ("" = default) and cap in MB; None when the cap is 0 (off)."""
+    if capacity_mb <= 0:
+        return None
+    key = (folder, capacity_mb)
+    cache = _open_caches.get(key)
+    if cache is None:
+        cache = DiskDecodeCache(Path(folder) if folder else default_cache_dir(), capacity_mb << 20)
+        cache.evict()  # the cap may have been lowered since the last run
+        _open_caches[key] = cache
+    return cache
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import os
+import queue
+import sys
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterator, Optional, Sequence
+
+# Share of physical RAM the automatic memory budget may hand to in-flight items.
+AUTO_BUDGET_FRACTION = 0.6
+
+# Items map_pipelined prefetches ahead of the one being transformed, and items
+# whose writes may still be in flight behind it.
+PIPELINE_DEPTH = 2
+
+
+# ProcessPoolExecutor refuses more than 61 workers on Windows.
+_WINDOWS_MAX_WORKERS = 61
+
+
+def clamp_workers(workers: int) -> int:
+    """A worker count limited to what a process pool accepts on this platform."""
+    workers = max(1, int(workers))
+    if sys.platform == "win32":
+        return min(workers, _WINDOWS_MAX_WORKERS)
+    return workers
+
+
+def default_workers() -> int:
+    return clamp_workers(os.cpu_count() or 1)
+
+
+def max_workers() -> int:
+    """Upper end of the worker count settings offer."""
+    return clamp_workers(max(default_workers(), 64))
+
+
+def system_memory() -> Optional[int]:
+    """Total physical memory in bytes, or None if it cannot be determined."""
+    if sys.platform == "win32":
+        import ctypes
+
+        class MemoryStatusEx(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("sullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MemoryStatusEx()
+        status.dwLength = ctypes.sizeof(MemoryStatusEx)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return int(status.ullTotalPhys)
+        return None
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def resolve_memory_budget(budget_mb: int) -> Optional[int]:
+    """Budget in bytes for a configured value in MB: 0 = automatic, None = unlimited."""
+    if budget_mb > 0:
+        return budget_mb * (1 << 20)
+    total = system_memory()
+    return int(total * AUTO_BUDGET_FRACTION) if total else None
+
+
+def _submit(pool: ProcessPoolExecutor, fn: Callable[..., Any], args: tuple) -> Future:
+    # Once a worker process dies (killed for memory, crashed in native code)
+    # the pool refuses new work. Items submitted after that fail like the ones
+    # that were in flight, instead of aborting the whole batch.
+    try:
+        return pool.submit(fn, *args)
+    except BrokenProcessPool as ex:
+        fut: Future = Future()
+        fut.set_exception(ex)
+        return fut
+
+
+def is_worker_crash(err: BaseException) -> bool:
+    """True if an item failed because its worker process died, not because of its input."""
+    return isinstance(err, BrokenProcessPool)
+
+
+def map_ordered(
+    fn: Callable[..., Any],
+    args_list: Sequence[tuple],
+    workers: int,
+    on_submit: Optional[Callable[[int], None]] = None,
+) -> Iterator[tuple[int, Any, Optional[BaseException]]]:
+    """
+    Call fn(*args) for every entry of args_list and yield (index, result, error)
+    in submission order.
+
+    workers <= 1 runs everything in the calling process. Otherwise a process pool
+    is used, with a bounded window of in-flight items so results can be reported
+    in order without queueing the whole batch up front. An exception raised for
+    one item is yielded as its error and never stops the remaining items.
+
+    on_submit(i) is called once item i is running. The pool takes items in
+    order, so the oldest pending one is always running (or done); it is
+    reported when its result is waited on rather than when it is queued.
+    """
+    workers = clamp_workers(workers)
+    if workers <= 1:
+        for i, args in enumerate(args_list):
+            if on_submit:
+                on_submit(i)
+            try:
+                yield i, fn(*args), None
+            except Exception as ex:
+                yield i, None, ex
+        return
+
+    window = workers * 4
+    pending: deque[tuple[int, Future]] = deque()
+    next_index = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while next_index < len(args_list) or pending:
+            while next_index < len(args_list) and len(pending) < window:
+                pending.append((next_index, _submit(pool, fn, args_list[next_index])))
+                next_index += 1
+
+            i, fut = pending.popleft()
+            if on_submit:
+                on_submit(i)
+            try:
+                yield i, fut.result(), None
+            except Exception as ex:
+                yield i, None, ex
+
+
+def map_budgeted(
+    fn: Callable[..., Any],
+    args_list: Sequence[tuple],
+    workers: int,
+    costs: Sequence[int],
+    budget: Optional[int],
+    on_submit: Optional[Callable[[int], None]] = None,
+) -> Iterator[tuple[int, Any, Optional[BaseException]]]:
+    """
+    Like map_ordered, but yields (index, result, error) as items finish, and
+    only starts an item while the summed cost (estimated peak bytes) of the
+    items running stays within budget. Items start in args_list order, so
+    callers pass them largest-first; an item bigger than the whole budget
+    still runs, on its own. No more items are submitted than there are
+    workers, so on_submit(i) is called as item i starts.
+    """
+    workers = clamp_workers(workers)
+    if workers <= 1 or budget is None:
+        yield from map_ordered(fn, args_list, workers, on_submit)
+        return
+
+    running: dict[Future, int] = {}
+    in_use = 0
+    next_index = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while next_index < len(args_list) or running:
+            while next_index < len(args_list) and len(running) < workers:
+                cost = costs[next_index]
+                if running and in_use + cost > budget:
+                    break
+                if on_submit:
+                    on_submit(next_index)
+                running[_submit(pool, fn, args_list[next_index])] = next_index
+                in_use += cost
+                next_index += 1
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                i = running.pop(fut)
+                in_use -= costs[i]
+                try:
+                    yield i, fut.result(), None
+                except Exception as ex:
+                    yield i, None, ex
+
+
+class _Budget:
+    """Blocks an item from starting until the costs of the items in flight leave room for it."""
+
+    def __init__(self, budget: Optional[int]) -> None:
+        self._budget = budget
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, cost: int, stop: threading.Event) -> bool:
+        with self._cond:
+            while self._budget is not None and self._in_use and self._in_use + cost > self._budget:
+                if stop.is_set():
+                    return False
+                self._cond.wait(0.1)
+            self._in_use += cost
+            return True
+
+    def release(self, cost: int) -> None:
+        with self._cond:
+            self._in_use -= cost
+            self._cond.notify_all()
+
+
+def _wait_all(futures: Sequence[Future]) -> None:
+    first_error: Optional[BaseException] = None
+    for fut in futures:
+        try:
+            fut.result()
+        except BaseException as ex:
+            if first_error is None:
+                first_error = ex
+    if first_error is not None:
+        raise first_error
+
+
+def map_pipelined(
+    prefetch: Callable[[int], Any],
+    transform: Callable[[int, Any], tuple[Sequence[Future], Any]],
+    finish: Callable[[int, Any], Any],
+    count: int,
+    costs: Sequence[int],
+    budget: Optional[int],
+    on_submit: Optional[Callable[[int], None]] = None,
+    depth: int = PIPELINE_DEPTH,
+) -> Iterator[tuple[int, Any, Optional[BaseException]]]:
+    """
+    Run items 0..count-1 through three overlapping stages in the calling
+    process and yield (index, result, error) as items finish:
+
+    - prefetch(i) on a reader thread, up to `depth` items ahead (reading and
+      decoding inputs, so the disk works while the CPU transforms);
+    - transform(i, prefetched) on the calling thread, returning the futures
+      of the writes it started and a payload;
+    - once those writes are done, finish(i, payload) gives the result. Up to
+      `depth` items may have writes in flight behind the one being transformed.
+
+    An item only enters the pipeline while the summed cost (estimated peak
+    bytes) of the items in it fits the budget; an item bigger than the whole
+    budget runs on its own. A failure in any stage is yielded as that item's
+    error and never stops the rest.
+    """
+    gate = _Budget(budget)
+    stop = threading.Event()
+    ready: queue.Queue = queue.Queue(maxsize=depth)
+
+    def reader() -> None:
+        for i in range(count):
+            if not gate.acquire(costs[i], stop):
+                return
+            try:
+                item = (i, prefetch(i), None)
+            except Exception as ex:
+                item = (i, None, ex)
+            while not stop.is_set():
+                try:
+                    ready.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            del item  # do not keep the decoded inputs alive while waiting for budget
+
+    thread = threading.Thread(target=reader, name="prefetch", daemon=True)
+    thread.start()
+
+    writing: deque[tuple[int, Sequence[Future], Any]] = deque()
+
+    def complete(i: int, futures: Sequence[Future], payload: Any) -> tuple[int, Any, Optional[BaseException]]:
+        try:
+            _wait_all(futures)
+            return i, finish(i, payload), None
+        except Exception as ex:
+            return i, None, ex
+        finally:
+            gate.release(costs[i])
+
+    try:
+        received = 0
+        while received < count:
+            # Report writes that are already done, and make room behind the
+            # next transform. When nothing is prefetched yet, waiting on the
+            # oldest write frees budget the reader may be waiting for.
+            while writing and (len(writing) >= depth or all(f.done() for f in writing[0][1]) or ready.empty()):
+                yield complete(*writing.popleft())
+
+            i, value, err = ready.get()
+            received += 1
+            if err is not None:
+                gate.release(costs[i])
+                yield i, None, err
+                continue
+            if on_submit:
+                on_submit(i)
+            try:
+                futures, payload = transform(i, value)
+            except Exception as ex:
+                gate.release(costs[i])
+                yield i, None, ex
+                continue
+            finally:
+                del value
+            writing.append((i, futures, payload))
+
+        while writing:
+            yield complete(*writing.popleft())
+    finally:
+        stop.set()
+        for _, futures, _ in writing:
+            for fut in futures:
+                fut.cancel()
+        thread.join()
@@ -1,19 +1,248 @@
 from __future__ import annotations
 
+import io
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple, Union
 
-from PIL import Image
+import numpy as np
+from PIL import Image, UnidentifiedImageError
 
-from ..models.config import GlobalConfig
+from ..models.config import DDS_COLOR_FORMATS, GlobalConfig
+from .atomic import atomic_write
+from .dds import DDS_MAGIC, DdsFile, is_dds
+from .dds_writer import encode_dds, write_dds
+from .decoded_cache import DecodedCache
+from .disk_cache import DiskDecodeCache
+from .trace import Tracer, file_size
+
+
+def _open_native_dds(path: Path) -> Optional[DdsFile]:
+    """DdsFile for block-compressed DDS we decode ourselves, else None (use Pillow)."""
+    if not is_dds(path):
+        return None
+    try:
+        return DdsFile(path)
+    except NotImplementedError:
+        return None
 
 
 def open_rgba(path: Path) -> Image.Image:
+    dds = _open_native_dds(path)
+    if dds is not None:
+        arr = dds.decode()
+        return Image.fromarray(np.ascontiguousarray(arr if arr.shape[2] > 1 else arr[..., 0])).convert("RGBA")
+
     img = Image.open(path)
     img.load()
     return img.convert("RGBA")
 
 
+# Modes whose decoded buffer already holds what convert("RGBA") would produce,
+# mapped to the source band index for each of R, G, B, A (None = constant 255).
+_NATIVE_BAND_MAP: dict[str, tuple[Optional[int], ...]] = {
+    "RGBA": (0, 1, 2, 3),
+    "RGB": (0, 1, 2, None),
+    "L": (0, 0, 0, None),
+    "LA": (0, 0, 0, 1),
+}
+_MODE_BY_CHANNELS = {len(mode): mode for mode in _NATIVE_BAND_MAP}
+
+
+def _native_band_map(img: Image.Image) -> Optional[tuple[Optional[int], ...]]:
+    """
+    Band map of img's own layout, or None if it must go through
+    convert("RGBA"): other modes, and any image with a transparent colour
+    (tRNS), whose pixels of that colour convert("RGBA") makes transparent.
+    """
+    if "transparency" in img.info:
+        return None
+    return _NATIVE_BAND_MAP.get(img.mode)
+
+
+# An image held in memory: (h, w) or (h, w, 1-4) uint8 pixels, a Pillow image,
+# or the bytes of an encoded file in any format the tool reads.
+ImageSource = Union[np.ndarray, Image.Image, bytes, bytearray, memoryview]
+
+
+class ImageHandle:
+    """
+    Lazily decoded image. The header is read on construction; pixels are
+    decoded once on first access and kept in the source layout, so an RGB or
+    RGBA source is never copied into a new RGBA buffer. Bands come back as
+    views into that buffer (or a broadcast constant for a missing alpha) and
+    match what convert("RGBA") would have produced. Block-compressed DDS is
+    decoded natively (top mip only); everything else goes through Pillow.
+
+    With a cache, pixels decoded earlier in this process are taken from it
+    without opening the file, and with a disk cache, pixels decoded by any
+    earlier run are memory-mapped from it; `cache_hit` then says which
+    ("memory" or "disk"). Fresh decodes are added to both.
+
+    With source, the image is taken from memory instead of read from path,
+    which then only names it; pixels are used as they are, without a copy.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        cache: Optional[DecodedCache] = None,
+        disk_cache: Optional[DiskDecodeCache] = None,
+        source: Optional[ImageSource] = None,
+    ) -> None:
+        self.path = path
+        self._cache = cache
+        self._cache_key = cache.key(path) if cache is not None else None
+        self._disk_cache = disk_cache
+        self._digest: Optional[str] = None
+        self._arr: Optional[np.ndarray] = None
+        self._band_map: tuple[Optional[int], ...] = (0, 1, 2, 3)
+        self._dds: Optional[DdsFile] = None
+        self._img: Optional[Image.Image] = None
+        self.cache_hit: Optional[str] = None
+
+        if source is not None:
+            self._open_source(source)
+            return
+        hit = cache.get(self._cache_key) if cache is not None else None
+        if hit is not None:
+            self._arr, (self._band_map, self.mode) = hit
+            self.size: Tuple[int, int] = (self._arr.shape[1], self._arr.shape[0])
+            self.cache_hit = "memory"
+            return
+        if disk_cache is not None:
+            self._digest = disk_cache.digest(path)
+            arr = disk_cache.get(self._digest)
+            if arr is not None and arr.ndim == 3 and arr.shape[2] in _MODE_BY_CHANNELS:
+                self._arr = arr
+                self.mode = _MODE_BY_CHANNELS[arr.shape[2]]
+                self._band_map = _NATIVE_BAND_MAP[self.mode]
+                self.size = (arr.shape[1], arr.shape[0])
+                self.cache_hit = "disk"
+                return
+
+        self._dds = _open_native_dds(path)
+        if self._dds is not None:
+            self.size = self._dds.size
+            self.mode: str = self._dds.mode
+        else:
+            self._img = Image.open(path)
+            self.size = self._img.size
+            self.mode = self._img.mode
+
+    def _open_source(self, source: ImageSource) -> None:
+        if isinstance(source, Image.Image):
+            source = np.asarray(source if _native_band_map(source) is not None else source.convert("RGBA"))
+        if isinstance(source, np.ndarray):
+            arr = source[..., np.newaxis] if source.ndim == 2 else source
+            if arr.dtype != np.uint8 or arr.ndim != 3 or arr.shape[2] not in _MODE_BY_CHANNELS:
+                raise ValueError(f"{self.path}: expected (h, w) or (h, w, 1-4) uint8 pixels, got {source.dtype} {source.shape}")
+            self._arr = arr
+            self.mode = _MODE_BY_CHANNELS[arr.shape[2]]
+            self._band_map = _NATIVE_BAND_MAP[self.mode]
+            self.size = (arr.shape[1], arr.shape[0])
+            return
+        data = bytes(source)
+        if data[:4] == DDS_MAGIC:
+            try:
+                self._dds = DdsFile(self.path, data)
+            except NotImplementedError:
+                pass  # decoded by Pillow
+            else:
+                self.size, self.mode = self._dds.size, self._dds.mode
+                return
+        try:
+            self._img = Image.open(io.BytesIO(data))
+        except UnidentifiedImageError:
+            raise ValueError(f"{self.path}: not an image file Pillow can read") from None
+        self.size, self.mode = self._img.size, self._img.mode
+
+    def __enter__(self) -> "ImageHandle":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _pixels(self) -> np.ndarray:
+        if self._arr is not None:
+            return self._arr
+        if self._dds is not None:
+            self._arr = self._dds.decode()
+            self._band_map = _NATIVE_BAND_MAP[self._dds.mode]
+            self._dds = None
+        if self._arr is None:
+            img = self._img
+            if img is None:
+                raise ValueError(f"Image handle is closed: {self.path}")
+            img.load()
+            band_map = _native_band_map(img)
+            if band_map is None:
+                img = img.convert("RGBA")
+                band_map = _NATIVE_BAND_MAP["RGBA"]
+            arr = np.asarray(img)
+            self._arr = arr if arr.ndim == 3 else arr[..., np.newaxis]
+            self._band_map = band_map
+            self._img.close()
+            self._img = None
+        if self._disk_cache is not None:
+            self._disk_cache.put(self._digest, self._arr)
+        if self._cache is not None:
+            self._cache.put(self._cache_key, self._arr, (self._band_map, self.mode))
+        return self._arr
+
+    def load(self) -> None:
+        """Decode now rather than on first access."""
+        self._pixels()
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the decoded pixels."""
+        return self._pixels().nbytes
+
+    def band(self, ch: str) -> np.ndarray:
+        arr = self._pixels()
+        src = self._band_map[channel_index(ch)]
+        if src is None:
+            return np.broadcast_to(np.uint8(255), arr.shape[:2])
+        return arr[..., src]
+
+    def rgb(self) -> np.ndarray:
+        arr = self._pixels()
+        if self._band_map[:3] == (0, 1, 2):
+            return arr[..., :3]
+        return np.repeat(arr[..., :1], 3, axis=2)
+
+    def close(self) -> None:
+        if self._img is not None:
+            self._img.close()
+            self._img = None
+        self._dds = None
+        self._arr = None
+
+
+def open_source(source: ImageSource, name: str) -> ImageHandle:
+    """Handle of an image held in memory; name stands in for its file name in errors and traces."""
+    return ImageHandle(Path(name), source=source)
+
+
+def probe_image(path: Path) -> tuple[Tuple[int, int], int]:
+    """
+    ((width, height), channels of the decoded array) read from the file
+    header only. Matches what ImageHandle will hold after decoding.
+    """
+    dds = _open_native_dds(path)
+    if dds is not None:
+        return dds.size, len(dds.mode)
+    with Image.open(path) as img:
+        mode = img.mode if _native_band_map(img) is not None else "RGBA"
+        return img.size, len(mode)
+
+
+def open_image(path: Path, cache: Optional[DecodedCache] = None, disk_cache: Optional[DiskDecodeCache] = None) -> ImageHandle:
+    return ImageHandle(path, cache, disk_cache)
+
+
 def channel_index(ch: str) -> int:
     return {"R": 0, "G": 1, "B": 2, "A": 3}[ch]
 
@@ -28,10 +257,56 @@ def invert_l(img_l: Image.Image) -> Image.Image:
     return img_l.point(lambda v: 255 - v)
 
 
-def resize_l(img_l: Image.Image, size_wh: Tuple[int, int]) -> Image.Image:
+# How images are resampled to another size. "lanczos" filters every output
+# pixel over the whole source footprint. "reduce" first shrinks by the largest
+# whole factor that stays within 2x of the target with Image.reduce (a block
+# average), then resamples the rest with LANCZOS: much faster for large
+# factors, with nearly identical results. "box" block-averages when the size
+# divides evenly (exact halvings) and resamples with a box filter otherwise.
+
+_REDUCING_GAP = 2.0
+
+
+def resize_image(img: Image.Image, size_wh: Tuple[int, int], filter: str = "lanczos") -> Image.Image:
+    size_wh = (int(size_wh[0]), int(size_wh[1]))
+    if img.size == size_wh:
+        return img
+    if filter == "lanczos":
+        return img.resize(size_wh, resample=Image.Resampling.LANCZOS)
+    if filter == "reduce":
+        return img.resize(size_wh, resample=Image.Resampling.LANCZOS, reducing_gap=_REDUCING_GAP)
+    if filter == "box":
+        (w, h), (tw, th) = img.size, size_wh
+        if tw <= w and th <= h and w % tw == 0 and h % th == 0:
+            return img.reduce((w // tw, h // th))
+        return img.resize(size_wh, resample=Image.Resampling.BOX)
+    raise ValueError(f"Unsupported downscale filter: {filter}")
+
+
+def resize_l(img_l: Image.Image, size_wh: Tuple[int, int], filter: str = "lanczos") -> Image.Image:
     if img_l.mode != "L":
         img_l = img_l.convert("L")
-    return img_l.resize(size_wh, resample=Image.Resampling.LANCZOS)
+    return resize_image(img_l, size_wh, filter)
+
+
+def capped_size(size_wh: Tuple[int, int], max_size: int) -> Tuple[int, int]:
+    """size_wh scaled down, keeping its aspect ratio, so no side exceeds max_size (0 = no cap)."""
+    w, h = size_wh
+    longest = max(w, h)
+    if max_size <= 0 or longest <= max_size:
+        return (w, h)
+    return (max(1, w * max_size // longest), max(1, h * max_size // longest))
+
+
+def half_size(size_wh: Tuple[int, int]) -> Tuple[int, int]:
+    return (max(1, size_wh[0] // 2), max(1, size_wh[1] // 2))
+
+def proxy_rgba(handle: ImageHandle, size_wh: Tuple[int, int]) -> np.ndarray:
+    """(h, w, 4) copy of an image scaled to size_wh with the fast "reduce" filter, for previews."""
+    rgb = resize_image(Image.fromarray(np.ascontiguousarray(handle.rgb())), size_wh, "reduce")
+    alpha = resize_image(Image.fromarray(np.ascontiguousarray(handle.band("A"))), size_wh, "reduce")
+    return np.dstack([np.asarray(rgb), np.asarray(alpha)])
+
 
 def force_normal_blue_channel(img_rgb: Image.Image) -> Image.Image:
     if img_rgb.mode != "RGB":
@@ -40,15 +315,239 @@ def force_normal_blue_channel(img_rgb: Image.Image) -> Image.Image:
     blue = Image.new("L", img_rgb.size, 255)
     return Image.merge("RGB", (r, g, blue))
 
-def save_image(img: Image.Image, out_path: Path, global_cfg: GlobalConfig) -> None:
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    ext = global_cfg.out_ext.lower()
+# --- NumPy array backend ---
+#
+# Arrays are uint8, shaped (h, w) for a single band or (h, w, c) for packed
+# images. Band extraction returns views into the decoded buffer, so a pair is
+# decoded once and each output is packed into a single new buffer.
+
+BandSource = Union[np.ndarray, int]
+
+
+def to_array(img: Image.Image) -> np.ndarray:
+    return np.asarray(img)
+
+
+def from_array(arr: np.ndarray) -> Image.Image:
+    return Image.fromarray(np.ascontiguousarray(arr))
+
 
+def band(arr: np.ndarray, ch: str) -> np.ndarray:
+    return arr[..., channel_index(ch)]
+
+
+def invert_band(arr: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    return np.subtract(np.uint8(255), arr, out=out)
+
+
+def resize_band(arr: np.ndarray, size_wh: Tuple[int, int], filter: str = "lanczos") -> np.ndarray:
+    return np.asarray(resize_l(Image.fromarray(np.ascontiguousarray(arr)), size_wh, filter))
+
+
+def pack_bands(sources: Sequence[BandSource], size_wh: Tuple[int, int]) -> np.ndarray:
+    """
+    Pack bands into one (h, w, len(sources)) buffer. Each source is either a
+    (h, w) array or an int constant filling the whole band.
+    """
+    w, h = size_wh
+    out = np.empty((h, w, len(sources)), dtype=np.uint8)
+    for i, src in enumerate(sources):
+        out[..., i] = src
+    return out
+
+
+def force_normal_blue_array(rgb: np.ndarray) -> np.ndarray:
+    """Set the blue band of an (h, w, 3+) array to 255 in place."""
+    rgb[..., 2] = 255
+    return rgb
+
+
+# PNG save() arguments per encoder profile. Pillow does not expose the PNG row
+# filter, so the knobs are the zlib level and strategy (compress_type 3 is
+# Z_RLE, which beats the default strategy at level 1 in both speed and size
+# on texture data).
+_PNG_PROFILE_ARGS: dict[str, dict[str, Any]] = {
+    "fastest": {"compress_level": 1, "compress_type": 3},
+    "balanced": {"compress_level": 6},
+    "smallest": {"optimize": True},
+}
+
+
+# What an output texture holds. Only DDS output uses it, to pick the block
+# format and whether the DXGI format is flagged sRGB.
+OUTPUT_KINDS = ["color", "data", "normal"]
+
+
+def dds_output_format(global_cfg: GlobalConfig, kind: str) -> tuple[str, bool]:
+    """(block format, sRGB) for a DDS output of the given kind."""
+    if kind not in OUTPUT_KINDS:
+        raise ValueError(f"Unsupported output kind: {kind}")
+    if global_cfg.dds_format not in DDS_COLOR_FORMATS:
+        raise ValueError(f"Unsupported DDS format: {global_cfg.dds_format}")
+    fmt = "BC5" if kind == "normal" else global_cfg.dds_format.upper()
+    return fmt, kind == "color"
+
+
+def _pillow_format(global_cfg: GlobalConfig) -> tuple[str, dict[str, Any]]:
+    """Pillow format and save() arguments of the PNG and TGA outputs."""
+    ext = global_cfg.out_ext.lower()
     if ext == "png":
-        img.save(out_path, format="PNG", optimize=True)
-        return
+        profile = global_cfg.encoder_profile
+        if profile not in _PNG_PROFILE_ARGS:
+            raise ValueError(f"Unsupported encoder profile: {profile}")
+        return "PNG", _PNG_PROFILE_ARGS[profile]
     if ext == "tga":
-        img.save(out_path, format="TGA", compress=bool(global_cfg.tga_rle))
+        return "TGA", {"rle": bool(global_cfg.tga_rle)}
+    raise ValueError(f"Unsupported output format: {global_cfg.out_ext}")
+
+
+def save_image(img: Image.Image, out_path: Path, global_cfg: GlobalConfig, kind: str = "color") -> None:
+    """Write an output, atomically: out_path only ever holds a complete file."""
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if global_cfg.out_ext.lower() == "dds":
+        # DdsStripWriter renames its output into place itself.
+        fmt, srgb = dds_output_format(global_cfg, kind)
+        write_dds(out_path, to_array(img), fmt, srgb=srgb, mips=global_cfg.dds_mips, quality=global_cfg.dds_quality)
         return
+    pil_format, args = _pillow_format(global_cfg)
+    with atomic_write(out_path) as tmp:
+        img.save(tmp, format=pil_format, **args)
 
-    raise ValueError(f"Unsupported output format: {global_cfg.out_ext}")
+
+def encode_image(img: Image.Image, global_cfg: GlobalConfig, kind: str = "color") -> bytes:
+    """The file save_image writes, as bytes."""
+    if global_cfg.out_ext.lower() == "dds":
+        fmt, srgb = dds_output_format(global_cfg, kind)
+        return encode_dds(to_array(img), fmt, srgb=srgb, mips=global_cfg.dds_mips, quality=global_cfg.dds_quality)
+    pil_format, args = _pillow_format(global_cfg)
+    buf = io.BytesIO()
+    img.save(buf, format=pil_format, **args)
+    return buf.getvalue()
+
+
+# Pillow releases the GIL while encoding, so the outputs of one pair can be
+# written concurrently from a small per-process thread pool.
+_ENCODE_THREADS = 3
+_encode_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _forget_encode_pool() -> None:
+    # A forked worker process inherits the pool object but none of its threads.
+    global _encode_pool
+    _encode_pool = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_encode_pool)
+
+
+def submit_encode(fn: Callable[..., Any], *args: Any) -> "Future[Any]":
+    """Run fn on the shared encode thread pool."""
+    global _encode_pool
+    if _encode_pool is None:
+        _encode_pool = ThreadPoolExecutor(max_workers=_ENCODE_THREADS, thread_name_prefix="encode")
+    return _encode_pool.submit(fn, *args)
+
+
+def _save_traced(img: Image.Image, out_path: Path, global_cfg: GlobalConfig, kind: str, tracer: Optional[Tracer]) -> None:
+    if tracer is None:
+        save_image(img, out_path, global_cfg, kind)
+        return
+    with tracer.span("encode", output=out_path.name, format=global_cfg.out_ext):
+        save_image(img, out_path, global_cfg, kind)
+    tracer.add_written(file_size(out_path))
+
+
+def save_image_async(
+    img: Image.Image,
+    out_path: Path,
+    global_cfg: GlobalConfig,
+    kind: str = "color",
+    tracer: Optional[Tracer] = None,
+) -> "Future[None]":
+    return submit_encode(_save_traced, img, out_path, global_cfg, kind, tracer)
+
+
+def _levels(img: Image.Image, names: Sequence[str], global_cfg: GlobalConfig, tracer: Optional[Tracer]) -> Iterator[Image.Image]:
+    """
+    One level per name: img capped to global_cfg.max_size, then each level
+    half the size of the one before, resampled from it.
+    """
+    size = capped_size(img.size, global_cfg.max_size)
+    for n, name in enumerate(names):
+        if n:
+            size = half_size(size)
+        if img.size != size:
+            if tracer is None:
+                img = resize_image(img, size, global_cfg.downscale_filter)
+            else:
+                with tracer.span("downscale", output=name, size=list(size)):
+                    img = resize_image(img, size, global_cfg.downscale_filter)
+        yield img
+
+
+def _save_levels(img: Image.Image, paths: Sequence[Path], global_cfg: GlobalConfig, kind: str, tracer: Optional[Tracer]) -> None:
+    for level, path in zip(_levels(img, [p.name for p in paths], global_cfg, tracer), paths):
+        _save_traced(level, path, global_cfg, kind, tracer)
+
+
+def save_levels_async(
+    img: Image.Image,
+    paths: Sequence[Path],
+    global_cfg: GlobalConfig,
+    kind: str = "color",
+    tracer: Optional[Tracer] = None,
+) -> "Future[None]":
+    """
+    Save an output and its LOD chain on one encode thread: paths[0] gets img
+    capped to global_cfg.max_size, and every further path half the size of
+    the level before it, resampled from that level rather than from img.
+    """
+    return submit_encode(_save_levels, img, list(paths), global_cfg, kind, tracer)
+
+
+def _keep_levels(arr: np.ndarray, names: Sequence[str], global_cfg: GlobalConfig, kind: str, encode: bool, tracer: Optional[Tracer]) -> list[Any]:
+    if not encode and arr.base is not None:
+        arr = arr.copy()  # never a view of the inputs (an RGB _C is one), which stay the caller's
+    img = from_array(arr)
+    kept: list[Any] = []
+    for level, name in zip(_levels(img, names, global_cfg, tracer), names):
+        if not encode:
+            kept.append(arr if level is img else np.array(level))
+        elif tracer is None:
+            kept.append(encode_image(level, global_cfg, kind))
+        else:
+            with tracer.span("encode", output=name, format=global_cfg.out_ext):
+                data = encode_image(level, global_cfg, kind)
+            tracer.add_written(len(data))
+            kept.append(data)
+    return kept
+
+
+def keep_levels_async(
+    arr: np.ndarray,
+    names: Sequence[str],
+    global_cfg: GlobalConfig,
+    kind: str = "color",
+    encode: bool = False,
+    tracer: Optional[Tracer] = None,
+) -> "Future[list[Any]]":
+    """
+    save_levels_async without files: the output and its LOD levels, one per
+    name, as arrays, or with encode as the bytes of the files
+    save_levels_async would write.
+    """
+    return submit_encode(_keep_levels, arr, list(names), global_cfg, kind, encode, tracer)
+
+
+def wait_saves(futures: Iterable["Future[None]"]) -> None:
+    """Wait for every pending save and re-raise the first failure."""
+    first_error: Optional[BaseException] = None
+    for fut in futures:
+        try:
+            fut.result()
+        except BaseException as ex:
+            if first_error is None:
+                first_error = ex
+    if first_error is not None:
+        raise first_error
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import IO, Any, Mapping, Optional, Sequence
+
+from .atomic import atomic_write
+from .manifest import settings_hash, stat_entry
+
+JOURNAL_NAME = ".swbf2-image-tools-journal.jsonl"
+JOURNAL_VERSION = 1
+
+
+def _stats(paths: Mapping[str, Path]) -> Optional[dict[str, Any]]:
+    out: dict[str, Any] = {}
+    for role, path in paths.items():
+        st = stat_entry(path)
+        if st is None:
+            return None
+        out[role] = {"path": str(path), **st}
+    return out
+
+
+class Journal:
+    """
+    Append-only record of the items a batch has finished, kept in the output
+    folder while the batch runs. Each line is flushed to disk as its item
+    completes, so after a crash or an interrupted run the next run of the same
+    job can skip what was already converted. The journal is removed once a
+    batch finishes without failures.
+
+    Unlike the manifest, entries are checked by size and mtime only: they only
+    have to survive until the batch is finished, not across edits of the inputs.
+    """
+
+    def __init__(self, output_folder: Path, settings: Mapping[str, Any], entries: Optional[dict[str, Any]] = None) -> None:
+        self.output_folder = output_folder
+        self.settings_hash = settings_hash(settings)
+        self.entries: dict[str, Any] = entries or {}
+        self._file: Optional[IO[str]] = None
+
+    @property
+    def path(self) -> Path:
+        return self.output_folder / JOURNAL_NAME
+
+    @classmethod
+    def open(cls, output_folder: Path, settings: Mapping[str, Any], resume: bool = True) -> "Journal":
+        """
+        Start the journal of a batch. With resume, the finished items of an
+        earlier run with the same settings are carried over; otherwise, or if
+        the settings changed, any earlier journal is discarded.
+        """
+        journal = cls(output_folder, settings)
+        if resume:
+            journal.entries = journal._load()
+        journal._start()
+        return journal
+
+    def _load(self) -> dict[str, Any]:
+        entries: dict[str, Any] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return entries
+        if not lines:
+            return entries
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return entries
+        if not isinstance(header, dict) or header.get("version") != JOURNAL_VERSION or header.get("settings_hash") != self.settings_hash:
+            return entries
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line of a crashed run
+            if isinstance(entry, dict) and "key" in entry:
+                entries[entry["key"]] = entry
+        return entries
+
+    def _start(self) -> None:
+        # Rewrite the carried-over entries compactly, then append from there.
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+        header = {"version": JOURNAL_VERSION, "settings_hash": self.settings_hash}
+        with atomic_write(self.path) as tmp, open(tmp, "w", encoding="utf-8") as f:
+            for entry in [header, *self.entries.values()]:
+                f.write(json.dumps(entry, sort_keys=True) + "\n")
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def finished_outputs(self, key: str, inputs: Mapping[str, Path]) -> Optional[tuple[str, ...]]:
+        """
+        The outputs of an item an earlier run converted, if its inputs are
+        unchanged and its outputs are still the files that run wrote.
+        """
+        entry = self.entries.get(key)
+        if not entry or not entry.get("ok"):
+            return None
+        if _stats(inputs) != entry.get("inputs"):
+            return None
+        outputs = entry.get("outputs", {})
+        if not outputs or any(stat_entry(Path(p)) != st for p, st in outputs.items()):
+            return None
+        return tuple(outputs)
+
+    def record(
+        self,
+        key: str,
+        inputs: Mapping[str, Path],
+        outputs: Sequence[Path] = (),
+        error: Optional[str] = None,
+    ) -> None:
+        """Append the outcome of one item and flush it to disk."""
+        if error is None:
+            entry = {"key": key, "ok": True, "inputs": _stats(inputs), "outputs": {str(p): stat_entry(p) for p in outputs}}
+        else:
+            entry = {"key": key, "ok": False, "error": error}
+        self.entries[key] = entry
+        if self._file is None:
+            return
+        self._file.write(json.dumps(entry, sort_keys=True) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self, complete: bool) -> None:
+        """Close the journal; a complete batch has nothing to resume, so it is removed."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if complete:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
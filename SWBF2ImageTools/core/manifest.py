@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Mapping, Optional, Sequence
+
+from .atomic import atomic_write
+
+MANIFEST_NAME = ".swbf2-image-tools-manifest.json"
+MANIFEST_VERSION = 1
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_HASH_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def settings_hash(settings: Mapping[str, Any]) -> str:
+    blob = json.dumps(settings, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def stat_entry(path: Path) -> Optional[dict[str, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def fingerprint_input(path: Path, previous: Optional[Mapping[str, Any]] = None) -> dict[str, Any]:
+    """
+    Size, mtime and content hash of an input file. The hash recorded in
+    `previous` is reused when size and mtime are unchanged, so unchanged
+    inputs are never re-read.
+    """
+    st = stat_entry(path)
+    if st is None:
+        raise FileNotFoundError(path)
+    if (
+        previous
+        and previous.get("path") == str(path)
+        and previous.get("size") == st["size"]
+        and previous.get("mtime_ns") == st["mtime_ns"]
+        and previous.get("sha256")
+    ):
+        sha = previous["sha256"]
+    else:
+        sha = hash_file(path)
+    return {"path": str(path), **st, "sha256": sha}
+
+
+class Manifest:
+    """
+    Per output folder record of which inputs and settings produced which
+    outputs, used to skip pairs that are already up to date.
+    """
+
+    def __init__(self, output_folder: Path, entries: Optional[dict[str, Any]] = None) -> None:
+        self.output_folder = output_folder
+        self.entries: dict[str, Any] = entries or {}
+
+    @property
+    def path(self) -> Path:
+        return self.output_folder / MANIFEST_NAME
+
+    @classmethod
+    def load(cls, output_folder: Path) -> "Manifest":
+        path = output_folder / MANIFEST_NAME
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(output_folder)
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls(output_folder)
+        return cls(output_folder, dict(data.get("entries", {})))
+
+    def save(self) -> None:
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+        with atomic_write(self.path) as tmp, open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f, indent=1, sort_keys=True)
+
+    def check(
+        self,
+        key: str,
+        inputs: Mapping[str, Path],
+        outputs: Sequence[Path],
+        settings: Mapping[str, Any],
+    ) -> tuple[bool, dict[str, Any]]:
+        """
+        Fingerprint the inputs of one item and report whether its recorded
+        outputs are still valid: same input content, same settings, and every
+        output still present. Returns (up_to_date, input_fingerprints).
+        """
+        entry = self.entries.get(key) or {}
+        previous_inputs = entry.get("inputs", {})
+        fps = {role: fingerprint_input(p, previous_inputs.get(role)) for role, p in inputs.items()}
+
+        if not entry or entry.get("settings_hash") != settings_hash(settings):
+            return False, fps
+        if set(previous_inputs) != set(fps):
+            return False, fps
+        if any(previous_inputs[role].get("sha256") != fp["sha256"] for role, fp in fps.items()):
+            return False, fps
+        if sorted(entry.get("outputs", {})) != sorted(str(p) for p in outputs):
+            return False, fps
+        if not all(p.is_file() for p in outputs):
+            return False, fps
+
+        # Content unchanged; refresh stat info so the next check stays on the fast path.
+        entry["inputs"] = fps
+        return True, fps
+
+    def record(
+        self,
+        key: str,
+        input_fingerprints: Mapping[str, Any],
+        outputs: Sequence[Path],
+        settings: Mapping[str, Any],
+    ) -> None:
+        self.entries[key] = {
+            "inputs": dict(input_fingerprints),
+            "settings": dict(settings),
+            "settings_hash": settings_hash(settings),
+            "outputs": {str(p): stat_entry(p) for p in outputs},
+        }
+
+    def verify(self, rehash: bool = False) -> list[tuple[str, str]]:
+        """
+        Report (key, reason) for every entry whose outputs were deleted or
+        modified, or whose inputs changed or disappeared since they were
+        written. Only stats files unless `rehash` is set or an input's stat
+        changed, in which case its content hash decides.
+        """
+        problems: list[tuple[str, str]] = []
+        for key in sorted(self.entries, key=str.lower):
+            entry = self.entries[key]
+            reason = self._verify_entry(entry, rehash)
+            if reason:
+                problems.append((key, reason))
+        return problems
+
+    def _verify_entry(self, entry: Mapping[str, Any], rehash: bool) -> Optional[str]:
+        for out, recorded in entry.get("outputs", {}).items():
+            st = stat_entry(Path(out))
+            if st is None:
+                return f"output missing: {out}"
+            if recorded and st != recorded:
+                return f"output modified: {out}"
+
+        for role, recorded in entry.get("inputs", {}).items():
+            path = Path(recorded["path"])
+            st = stat_entry(path)
+            if st is None:
+                return f"input missing: {path}"
+            if rehash or st["size"] != recorded.get("size") or st["mtime_ns"] != recorded.get("mtime_ns"):
+                if hash_file(path) != recorded.get("sha256"):
+                    return f"input changed: {path}"
+        return None
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Sequence
+
+# Directory listings for input detection, cached per directory and keyed by its
+# mtime. Adding, removing or renaming an entry updates the mtime of the
+# directory holding it, so an unchanged mtime means the listing is still valid
+# and a re-scan costs one stat per directory instead of a full listing.
+
+
+@dataclass(frozen=True)
+class _Listing:
+    mtime_ns: int
+    files: tuple[str, ...]
+    dirs: tuple[str, ...]
+
+
+# A listing is only cached once its directory has been unmodified for this
+# long, so a change landing within the same mtime tick (2 s on FAT) is not missed.
+_RACY_NS = 2_000_000_000
+
+_index: dict[str, _Listing] = {}
+_index_lock = threading.Lock()
+
+
+def _list_dir(path: str) -> _Listing:
+    mtime_ns = os.stat(path).st_mtime_ns
+    with _index_lock:
+        cached = _index.get(path)
+    if cached is not None and cached.mtime_ns == mtime_ns:
+        return cached
+
+    files: list[str] = []
+    dirs: list[str] = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                # DirEntry answers from the directory listing itself on Windows
+                # and from d_type elsewhere, so this costs no stat per entry.
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.name)
+                elif entry.is_file():
+                    files.append(entry.name)
+            except OSError:
+                continue
+
+    listing = _Listing(mtime_ns, tuple(sorted(files, key=str.lower)), tuple(sorted(dirs, key=str.lower)))
+    if time.time_ns() - mtime_ns >= _RACY_NS:
+        with _index_lock:
+            _index[path] = listing
+    return listing
+
+
+def walk_files(root: Path, recursive: bool = True) -> Iterator[tuple[Path, tuple[str, ...]]]:
+    """
+    Yield (directory, file names) for root and, if recursive, every directory
+    below it, depth first in case-insensitive name order. Symlinked directories
+    are not followed; subdirectories that cannot be read are skipped.
+    """
+    top = str(root)
+    stack = [top]
+    while stack:
+        path = stack.pop()
+        try:
+            listing = _list_dir(path)
+        except OSError:
+            if path == top:
+                raise
+            continue
+        yield Path(path), listing.files
+        if recursive:
+            stack.extend(os.path.join(path, name) for name in reversed(listing.dirs))
+
+
+def iter_suffix_sets(root: Path, suffixes: Sequence[str], recursive: bool = True) -> Iterator[list[tuple[str, tuple[Path, ...]]]]:
+    """
+    Yield the complete sets of each scanned directory as soon as it is listed:
+    (key, paths) for every prefix with a file named prefix_SUFFIX.* for each
+    of suffixes, paths in suffixes order. Keys of sets below root carry their
+    relative directory ("sub/dir/prefix"), which also places their outputs in
+    the same subdirectory of the output folder.
+    """
+    tags = tuple(f"_{s}" for s in suffixes)
+    for directory, names in walk_files(root, recursive):
+        by_prefix: dict[str, dict[str, Path]] = {}
+        for name in names:
+            stem = os.path.splitext(name)[0]
+            if not stem.endswith(tags):
+                continue  # most files in an export folder; skip them without building a Path
+            tag = max((t for t in tags if stem.endswith(t)), key=len)
+            by_prefix.setdefault(stem[:-len(tag)], {})[tag] = directory / name
+
+        rel = directory.relative_to(root).as_posix()
+        sets: list[tuple[str, tuple[Path, ...]]] = []
+        for prefix, found in sorted(by_prefix.items(), key=lambda kv: kv[0].lower()):
+            if len(found) == len(tags):
+                sets.append((prefix if rel == "." else f"{rel}/{prefix}", tuple(found[t] for t in tags)))
+        if sets:
+            yield sets
+
+
+def clear_index() -> None:
+    with _index_lock:
+        _index.clear()
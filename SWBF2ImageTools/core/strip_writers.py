@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import struct
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Protocol, Tuple
+
+import numpy as np
+
+from ..models.config import GlobalConfig
+from .atomic import commit, discard, temp_path
+from .dds_writer import DdsStripWriter
+from .image_io import dds_output_format
+
+# Writers that take an image as row strips, top to bottom, so an output never
+# has to exist in memory as a whole. Pixel content matches save_image; the
+# bytes differ (PNG row filters are chosen here rather than by Pillow, and TGA
+# is written top-down), which every reader handles.
+
+
+class StripWriter(Protocol):
+    def write_rows(self, rows: np.ndarray) -> None:
+        """Append (n, w, c) uint8 rows."""
+        ...
+
+    def close(self) -> None:
+        """Finish the file and move it into place."""
+        ...
+
+    def abort(self) -> None:
+        """Drop a partially written output."""
+        ...
+
+    def __enter__(self) -> "StripWriter":
+        ...
+
+    def __exit__(self, exc_type, *exc) -> None:
+        ...
+
+
+class _FileWriter:
+    """Writes to a temporary file that replaces the output path on close."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._tmp = temp_path(path)
+        self._file: BinaryIO = open(self._tmp, "wb")
+
+    def __enter__(self) -> "_FileWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _finish(self) -> None:
+        pass
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        try:
+            self._finish()
+        except BaseException:
+            self.abort()
+            raise
+        self._file.close()
+        commit(self._tmp, self._path)
+
+    def abort(self) -> None:
+        """Drop a partially written output."""
+        self._file.close()
+        discard(self._tmp)
+
+
+# --- PNG ---
+
+# encoder profile -> (zlib level, zlib strategy), the same knobs save_image passes to Pillow
+_PNG_ZLIB_ARGS: dict[str, tuple[int, int]] = {
+    "fastest": (1, zlib.Z_RLE),
+    "balanced": (6, zlib.Z_DEFAULT_STRATEGY),
+    "smallest": (9, zlib.Z_DEFAULT_STRATEGY),
+}
+_PNG_COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}  # channels -> PNG colour type
+_PNG_IDAT_BYTES = 1 << 20
+_PNG_FILTER_ROWS = 64  # rows filtered per vector pass, bounding the int16 temporaries
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def _png_filter(rows: np.ndarray, prev: np.ndarray, bpp: int) -> np.ndarray:
+    """
+    Filter (n, stride) rows with the filter of least absolute sum per row, the
+    heuristic from the PNG specification. Returns (n, 1 + stride) bytes with
+    the filter type first. prev is the unfiltered row above the first one.
+    Arithmetic is uint8 with wraparound, which is what PNG filtering is defined as.
+    """
+    x = rows
+    up = np.concatenate([prev[None], x[:-1]])
+    left = np.zeros_like(x)
+    left[:, bpp:] = x[:, :-bpp]
+    upleft = np.zeros_like(x)
+    upleft[:, bpp:] = up[:, :-bpp]
+
+    # Paeth predictor: pa = |b - c|, pb = |a - c|, pc = |a + b - 2c|. The
+    # choice is applied as masked uint8 arithmetic, much faster than np.where.
+    pa = up.astype(np.int16)
+    pa -= upleft
+    pb = left.astype(np.int16)
+    pb -= upleft
+    pc = pa + pb
+    np.abs(pa, out=pa)
+    np.abs(pb, out=pb)
+    np.abs(pc, out=pc)
+    use_left = pa <= pb
+    use_left &= pa <= pc
+    paeth = up - upleft
+    paeth *= (pb <= pc).view(np.uint8)
+    paeth += upleft
+    to_left = left - paeth
+    to_left *= use_left.view(np.uint8)
+    paeth += to_left
+    del pa, pb, pc, use_left, to_left
+
+    average = (left >> 1) + (up >> 1) + (left & up & 1)
+    candidates = [x, x - left, x - up, x - average, x - paeth]
+    # Sum of |filtered byte as int8| per row: min(v, 256 - v) in uint8.
+    cost = np.stack([np.minimum(f, 0 - f).sum(axis=1, dtype=np.uint32) for f in candidates])
+    best = cost.argmin(axis=0)
+
+    out = np.empty((x.shape[0], x.shape[1] + 1), dtype=np.uint8)
+    out[:, 0] = best
+    for kind, f in enumerate(candidates):
+        chosen = best == kind
+        if chosen.any():
+            out[chosen, 1:] = f[chosen]
+    return out
+
+
+class PngStripWriter(_FileWriter):
+    def __init__(self, path: Path, size_wh: Tuple[int, int], channels: int, profile: str) -> None:
+        if profile not in _PNG_ZLIB_ARGS:
+            raise ValueError(f"Unsupported encoder profile: {profile}")
+        if channels not in _PNG_COLOR_TYPES:
+            raise ValueError(f"Unsupported channel count for PNG: {channels}")
+        super().__init__(path)
+        w, h = size_wh
+        self._channels = channels
+        self._prev = np.zeros(w * channels, dtype=np.uint8)
+        level, strategy = _PNG_ZLIB_ARGS[profile]
+        self._zlib = zlib.compressobj(level, zlib.DEFLATED, 15, 9, strategy)
+        self._idat = bytearray()
+
+        ihdr = struct.pack(">IIBBBBB", w, h, 8, _PNG_COLOR_TYPES[channels], 0, 0, 0)
+        self._file.write(b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", ihdr))
+
+    def write_rows(self, rows: np.ndarray) -> None:
+        flat = rows.reshape(rows.shape[0], -1)
+        for r0 in range(0, flat.shape[0], _PNG_FILTER_ROWS):
+            part = flat[r0:r0 + _PNG_FILTER_ROWS]
+            self._idat += self._zlib.compress(_png_filter(part, self._prev, self._channels).data)
+            self._prev = part[-1].copy()
+            if len(self._idat) >= _PNG_IDAT_BYTES:
+                self._file.write(_png_chunk(b"IDAT", bytes(self._idat)))
+                self._idat.clear()
+
+    def _finish(self) -> None:
+        self._idat += self._zlib.flush()
+        self._file.write(_png_chunk(b"IDAT", bytes(self._idat)) + _png_chunk(b"IEND", b""))
+
+
+# --- TGA ---
+
+_TGA_FOOTER = b"\0" * 8 + b"TRUEVISION-XFILE.\0"
+_TGA_PACKET = 128
+
+
+def _tga_rle(px: np.ndarray, width: int) -> np.ndarray:
+    """
+    RLE-encode (n, c) pixels, width per row, into TGA packets that never span
+    rows. Repeated pixels become run packets; everything else is grouped into
+    raw packets. Vectorized over the whole strip.
+    """
+    n, c = px.shape
+    key = np.zeros(n, dtype=np.uint32)
+    for i in range(c):
+        key |= px[:, i].astype(np.uint32) << (8 * i)
+
+    idx = np.arange(n)
+    row_start = idx % width == 0
+    run_start = row_start.copy()
+    run_start[1:] |= key[1:] != key[:-1]
+    run_id = np.cumsum(run_start) - 1
+    run_begin = np.flatnonzero(run_start)
+    run_len = np.diff(np.append(run_begin, n))
+    repeat = (run_len >= 2)[run_id]
+
+    literal = ~repeat
+    literal_start = literal & (row_start | ~np.concatenate([[False], literal[:-1]]))
+    seg_start = (repeat & run_start) | literal_start
+    seg_id = np.cumsum(seg_start) - 1
+    seg_begin = np.flatnonzero(seg_start)
+    seg_len = np.diff(np.append(seg_begin, n))
+
+    pos = idx - seg_begin[seg_id]
+    packet = pos % _TGA_PACKET == 0
+    count = np.minimum(_TGA_PACKET, seg_len[seg_id] - pos)
+    header = np.where(repeat, 0x80 | (count - 1), count - 1).astype(np.uint8)
+    emit = literal | packet
+
+    size = packet.astype(np.int64) + emit * c
+    offset = np.cumsum(size) - size
+    out = np.empty(int(size.sum()), dtype=np.uint8)
+    out[offset[packet]] = header[packet]
+    at = offset[emit] + packet[emit]
+    out[at[:, None] + np.arange(c)] = px[emit]
+    return out
+
+
+class TgaStripWriter(_FileWriter):
+    """Uncompressed or RLE TGA with a top-left origin, so rows are written in the order they arrive."""
+
+    def __init__(self, path: Path, size_wh: Tuple[int, int], channels: int, rle: bool) -> None:
+        if channels not in (1, 3, 4):
+            raise ValueError(f"Unsupported channel count for TGA: {channels}")
+        super().__init__(path)
+        w, h = size_wh
+        self._width = w
+        self._rle = rle
+        self._order = [2, 1, 0, 3][:channels] if channels > 1 else [0]  # BGR(A) on disk
+        image_type = (3 if channels == 1 else 2) + (8 if rle else 0)
+        descriptor = 0x20 | (8 if channels == 4 else 0)
+        self._file.write(struct.pack("<BBBHHBHHHHBB", 0, 0, image_type, 0, 0, 0, 0, 0, w, h, channels * 8, descriptor))
+
+    def write_rows(self, rows: np.ndarray) -> None:
+        px = rows[..., self._order].reshape(-1, len(self._order))
+        data = _tga_rle(px, self._width) if self._rle else np.ascontiguousarray(px)
+        self._file.write(data.data)
+
+    def _finish(self) -> None:
+        self._file.write(_TGA_FOOTER)
+
+
+def open_strip_writer(
+    out_path: Path,
+    size_wh: Tuple[int, int],
+    channels: int,
+    global_cfg: GlobalConfig,
+    kind: str = "color",
+) -> StripWriter:
+    """The strip-by-strip counterpart of save_image, honouring the same settings."""
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    ext = global_cfg.out_ext.lower()
+
+    if ext == "png":
+        return PngStripWriter(out_path, size_wh, channels, global_cfg.encoder_profile)
+    if ext == "tga":
+        return TgaStripWriter(out_path, size_wh, channels, bool(global_cfg.tga_rle))
+    if ext == "dds":
+        fmt, srgb = dds_output_format(global_cfg, kind)
+        return DdsStripWriter(out_path, size_wh, fmt, srgb=srgb, mips=global_cfg.dds_mips, quality=global_cfg.dds_quality)
+
+    raise ValueError(f"Unsupported output format: {global_cfg.out_ext}")
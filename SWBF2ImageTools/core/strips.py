@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import math
+import struct
+from pathlib import Path
+from typing import BinaryIO, Optional, Protocol, Tuple
+
+import numpy as np
+from PIL import Image
+
+from ..models.config import STREAMING_MODES
+from .dds import DdsFile
+from .image_io import _NATIVE_BAND_MAP, ImageHandle, _open_native_dds, channel_index
+
+# Row-strip access to decoded images, for converting textures too large to
+# hold in memory at once. DDS (block rows through a memory map) and
+# uncompressed TGA (raw rows) are read strip by strip; any other format is
+# decoded once through ImageHandle and served from memory.
+
+STRIP_ROWS = 256
+
+# "auto" streams pairs at or above 8K x 8K, where a pair held in memory needs gigabytes.
+STREAM_AUTO_PIXELS = 8192 * 8192
+
+
+def use_streaming(mode: str, pixels: int) -> bool:
+    """Whether an item with this many pixels in its largest image is converted strip by strip."""
+    if mode not in STREAMING_MODES:
+        raise ValueError(f"Unsupported streaming mode: {mode}")
+    return mode == "on" or (mode == "auto" and pixels >= STREAM_AUTO_PIXELS)
+
+
+class StripReader(Protocol):
+    size: Tuple[int, int]
+    mode: str
+    in_memory: bool  # the whole image is decoded, so strips cost nothing extra
+
+    def read_rows(self, y0: int, y1: int) -> np.ndarray:
+        """Rows [y0, y1) as an (n, w, c) uint8 array in `mode` channel order."""
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+def rows_band(reader: StripReader, rows: np.ndarray, ch: str) -> np.ndarray:
+    """One RGBA channel of rows read from reader, following ImageHandle's rules for missing channels."""
+    src = _NATIVE_BAND_MAP[reader.mode][channel_index(ch)]
+    if src is None:
+        return np.full(rows.shape[:2], 255, dtype=np.uint8)
+    return rows[..., src]
+
+
+def rows_rgb(reader: StripReader, rows: np.ndarray) -> np.ndarray:
+    if reader.mode in ("RGB", "RGBA"):
+        return rows[..., :3]
+    return np.repeat(rows[..., :1], 3, axis=2)
+
+
+class _DdsStrips:
+    in_memory = False
+
+    def __init__(self, dds: DdsFile) -> None:
+        self._dds = dds
+        self.size = dds.size
+        self.mode = dds.mode
+
+    def read_rows(self, y0: int, y1: int) -> np.ndarray:
+        b0, b1 = y0 // 4, (y1 + 3) // 4
+        rows = self._dds.decode(b0, b1)
+        return rows[y0 - b0 * 4:y1 - b0 * 4]
+
+    def close(self) -> None:
+        pass
+
+
+class _TgaStrips:
+    """Uncompressed true-colour or greyscale TGA, read a strip of rows at a time."""
+    in_memory = False
+
+    def __init__(self, path: Path, offset: int, size: Tuple[int, int], depth: int, top_down: bool) -> None:
+        self.size = size
+        self.mode = {8: "L", 24: "RGB", 32: "RGBA"}[depth]
+        self._channels = depth // 8
+        self._offset = offset
+        self._top_down = top_down
+        self._file: Optional[BinaryIO] = open(path, "rb")
+
+    def read_rows(self, y0: int, y1: int) -> np.ndarray:
+        if self._file is None:
+            raise ValueError("Strip reader is closed")
+        w, h = self.size
+        row_bytes = w * self._channels
+        first = y0 if self._top_down else h - y1  # bottom-up files store the last row first
+        self._file.seek(self._offset + first * row_bytes)
+        rows = np.fromfile(self._file, dtype=np.uint8, count=(y1 - y0) * row_bytes).reshape(y1 - y0, w, self._channels)
+        if not self._top_down:
+            rows = rows[::-1]
+        if self._channels == 1:
+            return rows
+        order = [2, 1, 0, 3][: self._channels]  # BGR(A) on disk
+        return rows[..., order]
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _DecodedStrips:
+    """Fallback for formats without strip access: decode fully, then slice."""
+    in_memory = True
+
+    def __init__(self, path: Path) -> None:
+        self._handle = ImageHandle(path)
+        self.size = self._handle.size
+        self._handle.load()
+        self.mode = next(m for m, bm in _NATIVE_BAND_MAP.items() if bm == self._handle._band_map)
+
+    def read_rows(self, y0: int, y1: int) -> np.ndarray:
+        return self._handle._pixels()[y0:y1]
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+def _probe_tga(path: Path) -> Optional[_TgaStrips]:
+    if path.suffix.lower() != ".tga":
+        return None
+    with open(path, "rb") as f:
+        head = f.read(18)
+    if len(head) < 18:
+        return None
+    id_len, cmap_type, image_type = head[0], head[1], head[2]
+    w, h, depth, descriptor = struct.unpack_from("<HHBB", head, 12)
+    if cmap_type != 0 or image_type not in (2, 3) or depth not in (8, 24, 32) or descriptor & 0x10:
+        return None  # colour-mapped, RLE, 16-bit or right-to-left: let Pillow decode it
+    if (image_type == 3) != (depth == 8):
+        return None
+    offset = 18 + id_len
+    if path.stat().st_size < offset + w * h * (depth // 8):
+        return None
+    return _TgaStrips(path, offset, (w, h), depth, top_down=bool(descriptor & 0x20))
+
+
+def open_strips(path: Path) -> StripReader:
+    dds = _open_native_dds(path)
+    if dds is not None:
+        return _DdsStrips(dds)
+    tga = _probe_tga(path)
+    if tga is not None:
+        return tga
+    return _DecodedStrips(path)
+
+
+def can_stream(path: Path) -> bool:
+    """True if path is read strip by strip rather than decoded whole."""
+    return _open_native_dds(path) is not None or _probe_tga(path) is not None
+
+
+class BandStrips:
+    """A single decoded band held in memory, served as strips."""
+    in_memory = True
+    mode = "L"
+
+    def __init__(self, band: np.ndarray) -> None:
+        self._band = band
+        self.size = (band.shape[1], band.shape[0])
+
+    def read_rows(self, y0: int, y1: int) -> np.ndarray:
+        return self._band[y0:y1, :, None]
+
+    def close(self) -> None:
+        pass
+
+
+# --- LANCZOS resampling, strip by strip ---
+#
+# Pillow resizes in two passes: horizontally into uint8 rows, then vertically.
+# The horizontal pass of a strip is just Pillow resizing those rows to the new
+# width. The vertical pass is a port of Pillow's 8-bit resampler with the same
+# coefficients and fixed-point rounding, so resizing a band strip by strip
+# gives exactly what resize_l returns.
+
+_PRECISION_BITS = 32 - 8 - 2
+_LANCZOS_SUPPORT = 3.0
+
+
+def _lanczos(x: np.ndarray) -> np.ndarray:
+    def sinc(v: np.ndarray) -> np.ndarray:
+        v = v * math.pi
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(v == 0.0, 1.0, np.sin(v) / np.where(v == 0.0, 1.0, v))
+
+    return np.where((-3.0 <= x) & (x < 3.0), sinc(x) * sinc(x / 3), 0.0)
+
+
+def _coefficients(in_size: int, out_size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(first source index, source count, int32 fixed-point weights (out_size, ksize))."""
+    scale = in_size / out_size
+    filterscale = max(scale, 1.0)
+    support = _LANCZOS_SUPPORT * filterscale
+    ksize = int(math.ceil(support)) * 2 + 1
+
+    center = (np.arange(out_size) + 0.5) * scale
+    xmin = np.maximum((center - support + 0.5).astype(np.int64), 0)
+    xmax = np.minimum((center + support + 0.5).astype(np.int64), in_size) - xmin
+
+    taps = np.arange(ksize)
+    w = _lanczos((taps[None, :] + xmin[:, None] - center[:, None] + 0.5) * (1.0 / filterscale))
+    w = np.where(taps[None, :] < xmax[:, None], w, 0.0)
+    total = w.sum(axis=1, keepdims=True)
+    w = np.where(total != 0.0, w / np.where(total != 0.0, total, 1.0), w)
+
+    scaled = w * (1 << _PRECISION_BITS)
+    fixed = np.where(w < 0, (-0.5 + scaled).astype(np.int64), (0.5 + scaled).astype(np.int64))
+    return xmin, xmax, fixed.astype(np.int32)
+
+
+def _resample_rows(src: np.ndarray, first: np.ndarray, fixed: np.ndarray) -> np.ndarray:
+    """Vertical pass: output row i is the weighted sum of src rows first[i] + tap."""
+    acc = np.full((fixed.shape[0], src.shape[1]), 1 << (_PRECISION_BITS - 1), dtype=np.int32)
+    last = src.shape[0] - 1
+    for tap in range(fixed.shape[1]):
+        acc += src[np.minimum(first + tap, last)].astype(np.int32) * fixed[:, tap, None]
+    acc >>= _PRECISION_BITS
+    return np.clip(acc, 0, 255).astype(np.uint8)
+
+
+class StripResampler:
+    """
+    LANCZOS resize of one band from a StripReader, producing output rows on
+    demand in increasing order. Only the source rows under the vertical
+    kernel of the requested rows are read and kept.
+    """
+
+    def __init__(self, reader: StripReader, band: str, size_wh: Tuple[int, int]) -> None:
+        self._reader = reader
+        self._band = band
+        in_w, in_h = reader.size
+        out_w, out_h = size_wh
+        self.size = size_wh
+        self._need_h = out_w != in_w
+        self._need_v = out_h != in_h
+        if self._need_v:
+            self._first, self._count, self._fixed = _coefficients(in_h, out_h)
+        else:
+            self._first, self._count = np.arange(out_h), np.ones(out_h, dtype=np.int64)
+        self._cache = np.empty((0, out_w), dtype=np.uint8)
+        self._cache_y0 = 0
+
+    def _source_rows(self, y0: int, y1: int) -> np.ndarray:
+        """Horizontally resampled source rows [y0, y1), reusing the cached overlap."""
+        c0, c1 = self._cache_y0, self._cache_y0 + self._cache.shape[0]
+        keep = self._cache[y0 - c0:min(y1, c1) - c0] if c0 <= y0 < c1 else self._cache[:0]
+        start = y0 + keep.shape[0]
+        if start < y1:
+            raw = np.ascontiguousarray(rows_band(self._reader, self._reader.read_rows(start, y1), self._band))
+            if self._need_h:
+                raw = np.asarray(Image.fromarray(raw).resize((self.size[0], y1 - start), resample=Image.Resampling.LANCZOS))
+            keep = np.concatenate([keep, raw])
+        self._cache = keep
+        self._cache_y0 = y0
+        return keep
+
+    def read_rows(self, y0: int, y1: int) -> np.ndarray:
+        src_y0 = int(self._first[y0])
+        src_y1 = int((self._first[y0:y1] + self._count[y0:y1]).max())
+        src = self._source_rows(src_y0, src_y1)
+        if not self._need_v:
+            return src[y0 - src_y0:y1 - src_y0]
+        return _resample_rows(src, self._first[y0:y1] - src_y0, self._fixed[y0:y1])
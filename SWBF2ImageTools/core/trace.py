@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from .atomic import atomic_write
+
+TRACE_NAME = "swbf2-image-tools-trace.json"
+
+# Wall-clock anchor for this process. Span timestamps are the anchor plus a
+# perf_counter offset, so they are precise within a process and comparable
+# across the worker processes of one job.
+_ANCHOR_WALL_US = time.time_ns() // 1000
+_ANCHOR_PERF_NS = time.perf_counter_ns()
+
+
+def now_us() -> float:
+    return _ANCHOR_WALL_US + (time.perf_counter_ns() - _ANCHOR_PERF_NS) / 1000
+
+
+@dataclass
+class ItemTrace:
+    """Spans and I/O counters for one input. Plain data, so it pickles back from worker processes."""
+    key: str
+    events: list[dict[str, Any]] = field(default_factory=list)  # Chrome trace complete ("X") events
+    bytes_read: int = 0
+    bytes_written: int = 0
+
+    def seconds(self, name: str) -> float:
+        return sum(e["dur"] for e in self.events if e["name"] == name) / 1e6
+
+    def stage_seconds(self) -> dict[str, float]:
+        out: dict[str, float] = {}
+        for e in self.events:
+            out[e["name"]] = out.get(e["name"], 0.0) + e["dur"] / 1e6
+        return out
+
+
+class Tracer:
+    """Records spans into an ItemTrace. Safe to use from the encode threads of a pair."""
+
+    def __init__(self, key: str) -> None:
+        self.trace = ItemTrace(key)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, cat: str = "stage", **args: Any) -> Iterator[dict[str, Any]]:
+        """Record the block as a span. Yields its args, for details only known inside the block."""
+        start = now_us()
+        try:
+            yield args
+        finally:
+            self.add_span(name, start, cat, **args)
+
+    def add_span(self, name: str, start_us: float, cat: str = "stage", **args: Any) -> None:
+        """Record a span from start_us to now, for work that does not fit one with block."""
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": start_us,
+            "dur": now_us() - start_us,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {"key": self.trace.key, **args},
+        }
+        with self._lock:
+            self.trace.events.append(event)
+
+    def add_read(self, nbytes: int) -> None:
+        with self._lock:
+            self.trace.bytes_read += nbytes
+
+    def add_written(self, nbytes: int) -> None:
+        with self._lock:
+            self.trace.bytes_written += nbytes
+
+
+def write_chrome_trace(path: Path, traces: Iterable[ItemTrace], extra_events: Iterable[dict[str, Any]] = ()) -> Path:
+    """Write every span as a Chrome trace (chrome://tracing, Perfetto) JSON file."""
+    events: list[dict[str, Any]] = list(extra_events)
+    pids: set[int] = {e["pid"] for e in events}
+    for t in traces:
+        events.extend(t.events)
+        pids.update(e["pid"] for e in t.events)
+
+    main_pid = os.getpid()
+    for pid in sorted(pids):
+        label = "job" if pid == main_pid else f"worker {pid}"
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": label}})
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(path) as tmp, open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return path
+
+
+def file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def job_span(name: str, start_us: float, end_us: Optional[float] = None, **args: Any) -> dict[str, Any]:
+    """A complete event for work done by the job itself rather than one input."""
+    end = now_us() if end_us is None else end_us
+    return {
+        "name": name,
+        "cat": "job",
+        "ph": "X",
+        "ts": start_us,
+        "dur": end - start_us,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "args": args,
+    }
+
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Sequence
+
+if TYPE_CHECKING:
+    from ..conversions.base import ConversionDefinition, DetectedInput
+
+# Watch mode polls the input folder instead of relying on file system
+# notifications, which are unreliable on network shares and need a native
+# dependency. Re-detection is cheap because folder listings are cached by
+# mtime (see scan.py), leaving one stat per input file per poll.
+
+WATCH_POLL_S = 1.0
+# How long both files of an input must stay unchanged before it is converted,
+# so a pair still being exported (or only half exported) is left alone.
+WATCH_SETTLE_S = 2.0
+
+_Stats = tuple[tuple[int, int], ...]
+
+
+def _stat_files(paths: Sequence[Path]) -> Optional[_Stats]:
+    out = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+        except OSError:
+            return None
+        out.append((st.st_size, st.st_mtime_ns))
+    return tuple(out)
+
+
+class InputWatcher:
+    """
+    Reports the detected inputs of a folder whose files changed since they
+    were last reported, once every file of the input has been stable for
+    settle_s. With baseline, inputs that already exist when the watcher is
+    created count as reported; otherwise the first polls report everything.
+    An input is reported once per change, whether or not its conversion
+    succeeds; exporting it again reports it again.
+    """
+
+    def __init__(
+        self,
+        conversion: ConversionDefinition,
+        folder: Path,
+        recursive: bool = True,
+        settle_s: float = WATCH_SETTLE_S,
+        baseline: bool = True,
+    ) -> None:
+        self._conversion = conversion
+        self._folder = folder
+        self._recursive = recursive
+        self._settle_s = settle_s
+        self._reported: dict[str, _Stats] = {}
+        self._changing: dict[str, tuple[_Stats, float]] = {}  # key -> (stats, when they were first seen)
+        if baseline:
+            for item in conversion.detect_inputs(folder, recursive):
+                stats = _stat_files(conversion.input_files(item))
+                if stats is not None:
+                    self._reported[item.key] = stats
+
+    @property
+    def pending(self) -> int:
+        """Inputs that changed but have not settled yet."""
+        return len(self._changing)
+
+    def poll(self, now: Optional[float] = None) -> list[DetectedInput]:
+        now = time.monotonic() if now is None else now
+        ready: list[DetectedInput] = []
+        present: set[str] = set()
+
+        for item in self._conversion.detect_inputs(self._folder, self._recursive):
+            stats = _stat_files(self._conversion.input_files(item))
+            if stats is None:
+                continue  # a file vanished between listing and stat; look again next poll
+            present.add(item.key)
+            if self._reported.get(item.key) == stats:
+                self._changing.pop(item.key, None)
+                continue
+            changing = self._changing.get(item.key)
+            if changing is None or changing[0] != stats:
+                self._changing[item.key] = (stats, now)  # new or still being written: (re)start its settle time
+                continue
+            if now - changing[1] >= self._settle_s:
+                ready.append(item)
+                self._reported[item.key] = stats
+                del self._changing[item.key]
+
+        # Forget inputs that disappeared, so they are converted if they come back.
+        for key in set(self._reported) - present:
+            del self._reported[key]
+        for key in set(self._changing) - present:
+            del self._changing[key]
+        return ready
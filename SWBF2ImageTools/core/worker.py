@@ -1,17 +1,24 @@
 from __future__ import annotations
 
+import time
+from pathlib import Path
 from typing import Any, Sequence
 
 from PySide6.QtCore import QThread, Signal
 
-from ..conversions.base import ConversionDefinition, DetectedInput
+from ..conversions.base import ConversionDefinition, DetectedInput, ItemResult, summarize_duplicates, summarize_failures
+from .decoded_cache import shared_cache
+from .trace import ItemTrace
+from .watch import WATCH_POLL_S, InputWatcher
 
 
 class SplitWorker(QThread):
     progress = Signal(int, int)
     status = Signal(str)
+    item_traced = Signal(object)  # ItemTrace of each converted input
+    item_done = Signal(object)  # ItemResult of each input as soon as it is known
     error = Signal(str)
-    finished_ok = Signal()
+    finished_ok = Signal(str)  # summary of reused duplicate outputs, or ""
 
     def __init__(
         self,
@@ -37,8 +44,134 @@ class SplitWorker(QThread):
             def status_cb(msg: str) -> None:
                 self.status.emit(msg)
 
-            self._conversion.run(self._detected, self._cfg, progress_cb, status_cb)
-            self.finished_ok.emit()
+            def trace_cb(trace: ItemTrace) -> None:
+                self.item_traced.emit(trace)
+
+            def result_cb(result: ItemResult) -> None:
+                self.item_done.emit(result)
+
+            results = self._conversion.run(self._detected, self._cfg, progress_cb, status_cb, trace_cb, result_cb)
+            failures = summarize_failures(results)
+            if failures:
+                self.error.emit(failures)
+                return
+            self.finished_ok.emit(summarize_duplicates(results) or "")
 
         except Exception as ex:
             self.error.emit(str(ex))
+
+
+class DetectWorker(QThread):
+    """Scans for inputs off the GUI thread, emitting what it finds in batches as it goes."""
+
+    found = Signal(object)  # list[DetectedInput] found since the last emit
+    finished_scan = Signal(object)  # every DetectedInput, in scan order
+    error = Signal(str)
+
+    # Batches are coalesced so a scan of thousands of small folders does not
+    # flood the GUI thread with one signal per folder.
+    EMIT_INTERVAL_S = 0.1
+
+    def __init__(self, conversion: ConversionDefinition, folder: Path, recursive: bool):
+        super().__init__()
+        self._conversion = conversion
+        self._folder = folder
+        self._recursive = recursive
+
+    def run(self) -> None:
+        try:
+            everything: list[DetectedInput] = []
+            pending: list[DetectedInput] = []
+            last_emit = time.monotonic()
+            for batch in self._conversion.scan_inputs(self._folder, self._recursive):
+                if self.isInterruptionRequested():
+                    return
+                everything.extend(batch)
+                pending.extend(batch)
+                if time.monotonic() - last_emit >= self.EMIT_INTERVAL_S:
+                    self.found.emit(pending)
+                    pending = []
+                    last_emit = time.monotonic()
+            if pending:
+                self.found.emit(pending)
+            self.finished_scan.emit(everything)
+
+        except Exception as ex:
+            self.error.emit(str(ex))
+
+
+class WatchWorker(QThread):
+    """
+    Watches the input folder and converts inputs as they are exported, until
+    interrupted. A batch that is running when interruption is requested is
+    finished first.
+    """
+
+    batch_started = Signal(object)  # list[DetectedInput] about to be converted
+    progress = Signal(int, int)
+    item_traced = Signal(object)
+    item_done = Signal(object)
+    batch_done = Signal(str)  # failures or reused duplicates of the batch, or ""
+    status = Signal(str)
+    error = Signal(str)
+
+    # Sleep in short steps so a stop request is noticed promptly between polls.
+    _SLEEP_STEP_S = 0.1
+
+    def __init__(self, conversion: ConversionDefinition, folder: Path, recursive: bool, cfg: Any):
+        super().__init__()
+        self._conversion = conversion
+        self._folder = folder
+        self._recursive = recursive
+        self._cfg = cfg
+
+    def _sleep(self, seconds: float) -> bool:
+        """Sleep unless interrupted; returns False once interruption is requested."""
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if self.isInterruptionRequested():
+                return False
+            time.sleep(self._SLEEP_STEP_S)
+        return not self.isInterruptionRequested()
+
+    def run(self) -> None:
+        try:
+            watcher = InputWatcher(self._conversion, self._folder, self._recursive)
+            self.status.emit(f"Watching {self._folder} for exported inputs...")
+            while self._sleep(WATCH_POLL_S):
+                ready = watcher.poll()
+                if not ready:
+                    continue
+                self.batch_started.emit(ready)
+                results = self._conversion.run(
+                    ready,
+                    self._cfg,
+                    progress_cb=self.progress.emit,
+                    status_cb=self.status.emit,
+                    trace_cb=self.item_traced.emit,
+                    result_cb=self.item_done.emit,
+                )
+                self.batch_done.emit(summarize_failures(results) or summarize_duplicates(results) or "")
+
+        except Exception as ex:
+            self.error.emit(str(ex))
+
+
+class PreviewWorker(QThread):
+    """Decodes the preview proxies of one input off the GUI thread."""
+
+    loaded = Signal(str, object)  # input key, sources for ConversionDefinition.render_preview
+    error = Signal(str, str)  # input key, message
+
+    def __init__(self, conversion: ConversionDefinition, item: DetectedInput, max_size: int):
+        super().__init__()
+        self._conversion = conversion
+        self._item = item
+        self._max_size = max_size
+
+    def run(self) -> None:
+        try:
+            sources = self._conversion.load_preview(self._item, self._max_size, shared_cache())
+            self.loaded.emit(self._item.key, sources)
+        except Exception as ex:
+            self.error.emit(self._item.key, str(ex))
@@ -1,18 +1,68 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields, is_dataclass
 from pathlib import Path
+from typing import Any
+
+# Field metadata for settings that change how a job runs but not what it writes.
+RUNTIME_ONLY = {"affects_output": False}
+
+# Values GlobalConfig accepts, kept here rather than next to the code that
+# uses them so the window and the command line can offer them without
+# importing NumPy and Pillow.
+ENCODER_PROFILES = ["fastest", "balanced", "smallest"]
+DDS_COLOR_FORMATS = ["bc7", "bc1"]
+DDS_QUALITIES = ["fast", "balanced", "high"]
+DOWNSCALE_FILTERS = ["lanczos", "reduce", "box"]
+STREAMING_MODES = ["off", "auto", "on"]
 
 
 @dataclass(frozen=True)
 class GlobalConfig:
-    out_ext: str  # "png" or "tga"
+    out_ext: str  # "png", "tga" or "dds"
     tga_rle: bool
+    encoder_profile: str = "balanced"  # "fastest", "balanced" or "smallest" (PNG only)
+    dds_format: str = "bc7"  # "bc7" or "bc1" for colour and packed outputs; normals are always BC5 (DDS only)
+    dds_mips: bool = True  # write the full mip chain (DDS only)
+    dds_quality: str = "balanced"  # "fast", "balanced" or "high" block compression (DDS only)
+    max_size: int = 0  # longest side of the outputs in pixels; larger outputs are scaled down (0 = no cap)
+    lod_levels: int = 0  # extra outputs (_LOD1, _LOD2, ...), each half the size of the previous level
+    downscale_filter: str = "lanczos"  # "lanczos", "reduce" or "box", for capped outputs and LOD levels
+    compact_outputs: bool = False  # grayscale _C as single-channel (PNG and TGA only)
+    workers: int = field(default=1, metadata=RUNTIME_ONLY)  # 1 = run in-process, >1 = process pool
+    incremental: bool = field(default=False, metadata=RUNTIME_ONLY)  # skip pairs recorded as up to date
+    memory_budget_mb: int = field(default=0, metadata=RUNTIME_ONLY)  # RAM for in-flight pairs; 0 = share of physical RAM
+    trace: bool = field(default=False, metadata=RUNTIME_ONLY)  # write a Chrome trace of the job to the output folder
+    streaming: str = field(default="auto", metadata=RUNTIME_ONLY)  # "off", "auto" (very large pairs only) or "on": convert in row strips
+    resume: bool = field(default=True, metadata=RUNTIME_ONLY)  # skip inputs an interrupted run of the same job already converted
+    retries: int = field(default=0, metadata=RUNTIME_ONLY)  # extra attempts for inputs that fail
+    dedup: str = field(default="link", metadata=RUNTIME_ONLY)  # "off", "link" or "copy": convert byte-identical inputs once and reuse the outputs
+    decode_cache_mb: int = field(default=0, metadata=RUNTIME_ONLY)  # decoded inputs kept in memory for reuse within the session; 0 = off
+    disk_cache_mb: int = field(default=0, metadata=RUNTIME_ONLY)  # decoded inputs kept on disk across sessions, LRU-evicted beyond this size; 0 = off
+    disk_cache_dir: str = field(default="", metadata=RUNTIME_ONLY)  # folder of the disk cache; "" = per-user cache folder
 
 
 @dataclass(frozen=True)
 class JobBase:
     conversion_id: str
-    input_folder: Path
-    output_folder: Path
+    input_folder: Path = field(metadata=RUNTIME_ONLY)
+    output_folder: Path = field(metadata=RUNTIME_ONLY)
     global_cfg: GlobalConfig
+
+
+def output_settings(cfg: Any) -> dict[str, Any]:
+    """Return the fields of a config dataclass that influence the written outputs."""
+    out: dict[str, Any] = {}
+    for f in fields(cfg):
+        if not f.metadata.get("affects_output", True):
+            continue
+        out[f.name] = _output_value(getattr(cfg, f.name))
+    return out
+
+
+def _output_value(value: Any) -> Any:
+    if is_dataclass(value):
+        return output_settings(value)
+    if isinstance(value, (tuple, list)):
+        return [_output_value(v) for v in value]
+    return value
@@ -1,18 +1,23 @@
 from __future__ import annotations
 
 from PySide6.QtCore import Signal
-from PySide6.QtWidgets import QListWidget
+from PySide6.QtWidgets import QAbstractItemView, QListView
 
 
-class DropList(QListWidget):
+class DropList(QListView):
     dropped = Signal(list)  # list[str] paths
 
     def __init__(self) -> None:
         super().__init__()
         self.setAcceptDrops(True)
         self.viewport().setAcceptDrops(True)
-        self.setDragDropMode(QListWidget.DropOnly)
-        self.setSelectionMode(QListWidget.ExtendedSelection)
+        self.setDragDropMode(QAbstractItemView.DropOnly)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        # Every row is one line of text: let the view skip per-row size hints,
+        # and lay out large models in batches so appends never stall the GUI.
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(1000)
 
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
-from PySide6.QtWidgets import QCheckBox, QComboBox, QGridLayout, QGroupBox, QLabel
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QCheckBox, QComboBox, QGridLayout, QGroupBox, QLabel, QSpinBox, QToolButton, QWidget
 
-from ..models.config import GlobalConfig
+from ..core.decoded_cache import DEFAULT_DECODE_CACHE_MB
+from ..core.dedup import DEDUP_MODES
+from ..core.disk_cache import default_cache_dir
+from ..core.executor import default_workers, max_workers
+from ..models.config import DDS_COLOR_FORMATS, DDS_QUALITIES, DOWNSCALE_FILTERS, ENCODER_PROFILES, STREAMING_MODES, GlobalConfig
 
 
 class GlobalSettingsWidget(QGroupBox):
@@ -12,30 +17,209 @@ class GlobalSettingsWidget(QGroupBox):
         grid = QGridLayout()
 
         self.format_combo = QComboBox()
-        self.format_combo.addItems(["PNG", "TGA"])
+        self.format_combo.addItems(["PNG", "TGA", "DDS"])
         self.format_combo.setCurrentText("PNG")
         self.format_combo.currentTextChanged.connect(self._on_format_changed)
 
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItems([p.capitalize() for p in ENCODER_PROFILES])
+        self.profile_combo.setCurrentText("Balanced")
+        self.profile_combo.setToolTip("Fastest: quickest PNG writes, slightly larger files. Smallest: slowest, smallest files.")
+
         self.tga_rle_cb = QCheckBox("TGA RLE compression (lossless)")
         self.tga_rle_cb.setChecked(False)
         self.tga_rle_cb.setEnabled(False)
 
+        self.dds_format_combo = QComboBox()
+        self.dds_format_combo.addItems([f.upper() for f in DDS_COLOR_FORMATS])
+        self.dds_format_combo.setCurrentText("BC7")
+        self.dds_format_combo.setToolTip("Block format for _C and _ORM. _N is always written as BC5.")
+        self.dds_format_combo.setEnabled(False)
+
+        self.dds_quality_combo = QComboBox()
+        self.dds_quality_combo.addItems([q.capitalize() for q in DDS_QUALITIES])
+        self.dds_quality_combo.setCurrentText("Balanced")
+        self.dds_quality_combo.setToolTip("Fast: quickest block compression. High: slowest, lowest error.")
+        self.dds_quality_combo.setEnabled(False)
+
+        self.dds_mips_cb = QCheckBox("Generate DDS mip chain")
+        self.dds_mips_cb.setChecked(True)
+        self.dds_mips_cb.setEnabled(False)
+
+        self.max_size_spin = QSpinBox()
+        self.max_size_spin.setRange(0, 16384)
+        self.max_size_spin.setSingleStep(512)
+        self.max_size_spin.setSuffix(" px")
+        self.max_size_spin.setSpecialValueText("Full resolution")
+        self.max_size_spin.setValue(0)
+        self.max_size_spin.setToolTip("Outputs whose longest side is larger are scaled down to it, keeping the aspect ratio.")
+
+        self.lod_spin = QSpinBox()
+        self.lod_spin.setRange(0, 12)
+        self.lod_spin.setValue(0)
+        self.lod_spin.setToolTip("Extra outputs (_LOD1, _LOD2, ...), each half the size of the previous level and resampled from it.")
+
+        self.downscale_combo = QComboBox()
+        self.downscale_combo.addItems([f.capitalize() for f in DOWNSCALE_FILTERS])
+        self.downscale_combo.setCurrentText("Lanczos")
+        self.downscale_combo.setToolTip("Lanczos: sharpest. Reduce: block-average most of the way, then Lanczos; much faster for large factors. Box: plain block average.")
+
+        self.compact_cb = QCheckBox("Compact outputs: grayscale _C as one channel")
+        self.compact_cb.setChecked(False)
+        self.compact_cb.setToolTip("Lossless. _C textures that are grayscale are written single-channel, so files are smaller and faster to write (PNG and TGA).")
+
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, max_workers())
+        self.workers_spin.setValue(default_workers())
+        self.workers_spin.setToolTip("Number of pairs processed in parallel (1 = single process).")
+
+        self.memory_spin = QSpinBox()
+        self.memory_spin.setRange(0, 1 << 20)
+        self.memory_spin.setSingleStep(1024)
+        self.memory_spin.setSuffix(" MB")
+        self.memory_spin.setSpecialValueText("Auto")
+        self.memory_spin.setValue(0)
+        self.memory_spin.setToolTip("RAM that pairs in flight may use together. Auto uses 60% of physical memory; large pairs are started first.")
+
+        self.cache_spin = QSpinBox()
+        self.cache_spin.setRange(0, 1 << 20)
+        self.cache_spin.setSingleStep(256)
+        self.cache_spin.setSuffix(" MB")
+        self.cache_spin.setSpecialValueText("Off")
+        self.cache_spin.setValue(DEFAULT_DECODE_CACHE_MB)
+        self.cache_spin.setToolTip("Decoded inputs kept in memory for this session, so previewed inputs and a second Process after changing settings are not read from disk again.")
+
+        self.disk_cache_spin = QSpinBox()
+        self.disk_cache_spin.setRange(0, 1 << 24)
+        self.disk_cache_spin.setSingleStep(1024)
+        self.disk_cache_spin.setSuffix(" MB")
+        self.disk_cache_spin.setSpecialValueText("Off")
+        self.disk_cache_spin.setValue(0)
+        self.disk_cache_spin.setToolTip(f"Decoded inputs kept on disk in {default_cache_dir()} across sessions, so unchanged inputs are memory-mapped instead of decoded again. Least recently used entries are removed beyond this size.")
+
+        self.streaming_combo = QComboBox()
+        self.streaming_combo.addItems([m.capitalize() for m in STREAMING_MODES])
+        self.streaming_combo.setCurrentText("Auto")
+        self.streaming_combo.setToolTip("Convert pairs in row strips so memory stays bounded. Auto streams pairs of 8K and above.")
+
+        self.incremental_cb = QCheckBox("Incremental: skip inputs whose outputs are up to date")
+        self.incremental_cb.setChecked(False)
+        self.incremental_cb.setToolTip("Keeps a manifest in the output folder and only re-converts changed inputs or settings.")
+
+        self.dedup_combo = QComboBox()
+        self.dedup_combo.addItems([m.capitalize() for m in DEDUP_MODES])
+        self.dedup_combo.setCurrentText("Link")
+        self.dedup_combo.setToolTip("Inputs that are byte-identical to another are converted once; the others get hard links (Link) or copies (Copy) of its outputs.")
+
+        self.resume_cb = QCheckBox("Resume interrupted batches")
+        self.resume_cb.setChecked(True)
+        self.resume_cb.setToolTip("Skip inputs that an interrupted or failed run with the same settings already converted.")
+
+        self.retries_spin = QSpinBox()
+        self.retries_spin.setRange(0, 10)
+        self.retries_spin.setValue(0)
+        self.retries_spin.setToolTip("Extra attempts for inputs that fail, after the rest of the batch.")
+
+        self.trace_cb = QCheckBox("Write timing trace to the output folder")
+        self.trace_cb.setChecked(False)
+        self.trace_cb.setToolTip("Per-stage timings of every input as a Chrome trace (open in chrome://tracing or Perfetto).")
+
         grid.addWidget(QLabel("Output format:"), 0, 0)
         grid.addWidget(self.format_combo, 0, 1)
-        grid.addWidget(self.tga_rle_cb, 1, 0, 1, 2)
+        grid.addWidget(QLabel("PNG encoder profile:"), 1, 0)
+        grid.addWidget(self.profile_combo, 1, 1)
+        grid.addWidget(self.tga_rle_cb, 2, 0, 1, 2)
+        grid.addWidget(QLabel("DDS colour/ORM format:"), 3, 0)
+        grid.addWidget(self.dds_format_combo, 3, 1)
+        grid.addWidget(QLabel("DDS quality:"), 4, 0)
+        grid.addWidget(self.dds_quality_combo, 4, 1)
+        grid.addWidget(self.dds_mips_cb, 5, 0, 1, 2)
+        grid.addWidget(QLabel("Max resolution:"), 6, 0)
+        grid.addWidget(self.max_size_spin, 6, 1)
+        grid.addWidget(QLabel("Extra LOD levels:"), 7, 0)
+        grid.addWidget(self.lod_spin, 7, 1)
+        grid.addWidget(QLabel("Downscale filter:"), 8, 0)
+        grid.addWidget(self.downscale_combo, 8, 1)
+        grid.addWidget(self.compact_cb, 9, 0, 1, 2)
+        # Options that change how a batch runs but not what it writes, folded
+        # away by default so the window fits on small screens.
+        self.advanced_btn = QToolButton()
+        self.advanced_btn.setText("Advanced: workers, memory, caches, incremental runs")
+        self.advanced_btn.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
+        self.advanced_btn.setArrowType(Qt.RightArrow)
+        self.advanced_btn.setAutoRaise(True)
+        self.advanced_btn.setCheckable(True)
+        self.advanced_btn.toggled.connect(self._on_advanced_toggled)
+
+        self.advanced = QWidget()
+        advanced = QGridLayout()
+        advanced.setContentsMargins(0, 0, 0, 0)
+        advanced.addWidget(QLabel("Parallel workers:"), 0, 0)
+        advanced.addWidget(self.workers_spin, 0, 1)
+        advanced.addWidget(QLabel("Memory budget:"), 1, 0)
+        advanced.addWidget(self.memory_spin, 1, 1)
+        advanced.addWidget(QLabel("Decoded cache:"), 2, 0)
+        advanced.addWidget(self.cache_spin, 2, 1)
+        advanced.addWidget(QLabel("Disk cache:"), 3, 0)
+        advanced.addWidget(self.disk_cache_spin, 3, 1)
+        advanced.addWidget(QLabel("Streaming:"), 4, 0)
+        advanced.addWidget(self.streaming_combo, 4, 1)
+        advanced.addWidget(self.incremental_cb, 5, 0, 1, 2)
+        advanced.addWidget(QLabel("Duplicate inputs:"), 6, 0)
+        advanced.addWidget(self.dedup_combo, 6, 1)
+        advanced.addWidget(self.resume_cb, 7, 0, 1, 2)
+        advanced.addWidget(QLabel("Retries for failed inputs:"), 8, 0)
+        advanced.addWidget(self.retries_spin, 8, 1)
+        advanced.addWidget(self.trace_cb, 9, 0, 1, 2)
+        self.advanced.setLayout(advanced)
+        self.advanced.setVisible(False)
+
+        grid.addWidget(self.advanced_btn, 10, 0, 1, 2)
+        grid.addWidget(self.advanced, 11, 0, 1, 2)
 
         self.setLayout(grid)
 
+    def _on_advanced_toggled(self, shown: bool) -> None:
+        self.advanced_btn.setArrowType(Qt.DownArrow if shown else Qt.RightArrow)
+        self.advanced.setVisible(shown)
+
     def _on_format_changed(self, fmt: str) -> None:
         is_tga = (fmt.upper() == "TGA")
         self.tga_rle_cb.setEnabled(is_tga)
+        self.profile_combo.setEnabled(fmt.upper() == "PNG")
+        is_dds = (fmt.upper() == "DDS")
+        self.dds_format_combo.setEnabled(is_dds)
+        self.dds_quality_combo.setEnabled(is_dds)
+        self.dds_mips_cb.setEnabled(is_dds)
+        self.compact_cb.setEnabled(not is_dds)
         if not is_tga:
             self.tga_rle_cb.setChecked(False)
 
     def build_config(self) -> GlobalConfig:
         out_ext = self.format_combo.currentText().lower()
         tga_rle = self.tga_rle_cb.isChecked() if out_ext == "tga" else False
-        return GlobalConfig(out_ext=out_ext, tga_rle=tga_rle)
+        return GlobalConfig(
+            out_ext=out_ext,
+            tga_rle=tga_rle,
+            encoder_profile=self.profile_combo.currentText().lower(),
+            dds_format=self.dds_format_combo.currentText().lower(),
+            dds_mips=self.dds_mips_cb.isChecked(),
+            dds_quality=self.dds_quality_combo.currentText().lower(),
+            max_size=self.max_size_spin.value(),
+            lod_levels=self.lod_spin.value(),
+            downscale_filter=self.downscale_combo.currentText().lower(),
+            compact_outputs=self.compact_cb.isChecked(),
+            workers=self.workers_spin.value(),
+            memory_budget_mb=self.memory_spin.value(),
+            decode_cache_mb=self.cache_spin.value(),
+            disk_cache_mb=self.disk_cache_spin.value(),
+            streaming=self.streaming_combo.currentText().lower(),
+            incremental=self.incremental_cb.isChecked(),
+            dedup=self.dedup_combo.currentText().lower(),
+            resume=self.resume_cb.isChecked(),
+            retries=self.retries_spin.value(),
+            trace=self.trace_cb.isChecked(),
+        )
 
     def set_enabled_for_processing(self, enabled: bool) -> None:
         self.setEnabled(enabled)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from typing import Any, Optional, Sequence
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
+from PySide6.QtGui import QBrush, QColor
+
+from ..conversions.base import DetectedInput, ItemResult
+
+# Per-row state during and after a run. None = not part of a run yet.
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+STATUS_DUPLICATE = "duplicate"
+
+_STATUS_COLORS = {
+    STATUS_PENDING: QColor(110, 110, 110),
+    STATUS_DONE: QColor(30, 130, 50),
+    STATUS_SKIPPED: QColor(110, 110, 110),
+    STATUS_FAILED: QColor(200, 40, 40),
+    STATUS_DUPLICATE: QColor(30, 130, 50),
+}
+
+
+def status_for(result: ItemResult) -> str:
+    if not result.ok:
+        return STATUS_FAILED
+    if result.duplicate_of:
+        return STATUS_DUPLICATE
+    return STATUS_SKIPPED if result.skipped else STATUS_DONE
+
+
+def tooltip_for(result: ItemResult) -> Optional[str]:
+    if result.error:
+        return result.error
+    if result.duplicate_of:
+        return f"Same inputs as {result.duplicate_of}; its outputs were reused."
+    return None
+
+
+class DetectedInputsModel(QAbstractListModel):
+    """
+    Detected inputs for a QListView. Rows are only formatted when the view
+    paints them, inputs are appended in batches as detection finds them, and
+    a status change repaints just its own row, so tens of thousands of rows
+    stay cheap to fill and to update during a run.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._inputs: list[DetectedInput] = []
+        self._status: list[Optional[str]] = []
+        self._tooltips: dict[int, str] = {}
+        self._row_by_key: dict[str, int] = {}
+        self._message: Optional[str] = None  # shown as a single unselectable row when there are no inputs
+
+    # --- Qt model interface ---
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        if not self._inputs and self._message is not None:
+            return 1
+        return len(self._inputs)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        if not self._inputs:
+            return self._message if role == Qt.DisplayRole else None
+
+        row = index.row()
+        status = self._status[row]
+        if role == Qt.DisplayRole:
+            line = self._inputs[row].display_line
+            return line if status is None else f"{line}  —  {status}"
+        if role == Qt.ForegroundRole and status is not None:
+            return QBrush(_STATUS_COLORS[status])
+        if role == Qt.ToolTipRole:
+            return self._tooltips.get(row)
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        if not index.isValid() or not self._inputs:
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    # --- updates ---
+    def clear(self, message: Optional[str] = None) -> None:
+        self.beginResetModel()
+        self._inputs = []
+        self._status = []
+        self._tooltips = {}
+        self._row_by_key = {}
+        self._message = message
+        self.endResetModel()
+
+    def append(self, batch: Sequence[DetectedInput]) -> None:
+        if not batch:
+            return
+        if not self._inputs and self._message is not None:
+            self.clear()
+        first = len(self._inputs)
+        self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+        for offset, item in enumerate(batch):
+            self._row_by_key[item.key] = first + offset
+        self._inputs.extend(batch)
+        self._status.extend([None] * len(batch))
+        self.endInsertRows()
+
+    def reset_status(self, status: Optional[str] = STATUS_PENDING) -> None:
+        """Give every row the same status, e.g. pending at the start of a run."""
+        if not self._inputs:
+            return
+        self._status = [status] * len(self._inputs)
+        self._tooltips = {}
+        self.dataChanged.emit(self.index(0), self.index(len(self._inputs) - 1))
+
+    def mark_pending(self, batch: Sequence[DetectedInput]) -> None:
+        """Mark the rows of a batch pending, appending inputs that are not listed yet."""
+        self.append([item for item in batch if item.key not in self._row_by_key])
+        for item in batch:
+            row = self._row_by_key[item.key]
+            self._status[row] = STATUS_PENDING
+            self._tooltips.pop(row, None)
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def set_result(self, result: ItemResult) -> None:
+        row = self._row_by_key.get(result.key)
+        if row is None:
+            return
+        self._status[row] = status_for(result)
+        tooltip = tooltip_for(result)
+        if tooltip:
+            self._tooltips[row] = tooltip
+        else:
+            self._tooltips.pop(row, None)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def input_at(self, row: int) -> Optional[DetectedInput]:
+        return self._inputs[row] if 0 <= row < len(self._inputs) else None
+
+    def inputs(self) -> list[DetectedInput]:
+        return list(self._inputs)
+
+    def count(self) -> int:
+        return len(self._inputs)
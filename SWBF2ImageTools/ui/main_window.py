@@ -1,16 +1,17 @@
 from __future__ import annotations
 
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QTimer, Signal
 from PySide6.QtWidgets import (
+    QCheckBox,
     QFileDialog,
     QGroupBox,
     QHBoxLayout,
     QLabel,
     QLineEdit,
-    QListWidgetItem,
     QMessageBox,
     QPushButton,
     QProgressBar,
@@ -20,19 +21,34 @@ from PySide6.QtWidgets import (
     QComboBox,
 )
 
-from ..conversions.base import ConversionDefinition
-from ..conversions.registry import get_conversions
-from ..core.worker import SplitWorker
+from ..conversions.base import ConversionDefinition, DetectedInput
+from ..conversions.registry import ConversionInfo, conversion_infos
+from ..core.decoded_cache import shared_cache
+from ..core.trace import ItemTrace
+from ..core.worker import DetectWorker, PreviewWorker, SplitWorker, WatchWorker
 from .drop_list import DropList
 from .global_settings import GlobalSettingsWidget
+from .inputs_model import DetectedInputsModel
+from .preview import PREVIEW_SIZE, PreviewPane
+from .settings_scroll import SettingsScrollArea
 
 from SWBF2ImageTools import __version__
 
+def _format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
+
 def app_version() -> str:
     return __version__
 
 
 class MainWindow(QWidget):
+    # Emitted once the settings of the selected conversion are shown, after the first paint.
+    ready = Signal()
+
     def __init__(self) -> None:
         super().__init__()
         self.setWindowTitle(f"SWBF2 / Frosty Texture Image Tools v{app_version()} (by dudebroSW)")
@@ -43,13 +59,29 @@ class MainWindow(QWidget):
         self.output_folder: Optional[Path] = None
 
         self._worker: Optional[SplitWorker] = None
-
-        self._conversions: list[ConversionDefinition] = get_conversions()
-        self._conversion_by_name = {c.display_name: c for c in self._conversions}
+        self._watcher: Optional[WatchWorker] = None
+        self._detector: Optional[DetectWorker] = None
+        self._retired_detectors: set[DetectWorker] = set()  # cancelled scans still winding down
+        self._detected: list[DetectedInput] = []
+        self._preview_worker: Optional[PreviewWorker] = None
+        self._preview_next: Optional[DetectedInput] = None  # selected while another preview was loading
+        self._preview_item: Optional[DetectedInput] = None
+        self._preview_sources: Any = None
+        self._job_started = 0.0
+        self._converted = 0
+        self._bytes_moved = 0
+
+        # Conversions are imported, and their settings widgets built, when first
+        # used; the selected one right after the window is first painted.
+        self._infos: list[ConversionInfo] = conversion_infos()
+        self._info_by_name = {info.display_name: info for info in self._infos}
+        self._conversions: dict[str, ConversionDefinition] = {}
+        self._settings_pages: dict[str, int] = {}  # conversion id -> settings_stack index
+        self._started = False
 
         # --- Conversion ---
         self.conversion_combo = QComboBox()
-        self.conversion_combo.addItems([c.display_name for c in self._conversions])
+        self.conversion_combo.addItems([info.display_name for info in self._infos])
         self.conversion_combo.currentTextChanged.connect(self.on_conversion_changed)
 
         conversion_row = QHBoxLayout()
@@ -67,9 +99,15 @@ class MainWindow(QWidget):
         clear_btn = QPushButton("Clear")
         clear_btn.clicked.connect(self.on_refresh_clear)
 
+        self.recursive_cb = QCheckBox("Include subfolders")
+        self.recursive_cb.setChecked(True)
+        self.recursive_cb.setToolTip("Also detect inputs in subfolders; outputs are written to the same subfolders of the output folder.")
+        self.recursive_cb.toggled.connect(lambda _checked: self.refresh_detected_inputs())
+
         top_row = QHBoxLayout()
         top_row.addWidget(QLabel("Input folder:"))
         top_row.addWidget(self.input_edit, 1)
+        top_row.addWidget(self.recursive_cb)
         top_row.addWidget(input_browse_btn)
         top_row.addWidget(clear_btn)
 
@@ -87,14 +125,22 @@ class MainWindow(QWidget):
         output_row.addWidget(output_browse_btn)
 
         # --- Drop list ---
+        self.inputs_model = DetectedInputsModel()
         self.drop_list = DropList()
+        self.drop_list.setModel(self.inputs_model)
         self.drop_list.setToolTip("Drag & drop a folder or texture files here.")
         self.drop_list.dropped.connect(self.on_dropped)
+        self.drop_list.selectionModel().currentChanged.connect(self.on_current_input_changed)
+
+        # --- Preview ---
+        self.preview = PreviewPane()
+
+        inputs_row = QHBoxLayout()
+        inputs_row.addWidget(self.drop_list, 1)
+        inputs_row.addWidget(self.preview)
 
         # --- Conversion settings ---
         self.settings_stack = QStackedWidget()
-        for c in self._conversions:
-            self.settings_stack.addWidget(c.build_settings_widget())
 
         settings_box = QGroupBox("Conversion Settings")
         settings_layout = QVBoxLayout()
@@ -103,11 +149,26 @@ class MainWindow(QWidget):
 
         # --- Global settings ---
         self.global_settings = GlobalSettingsWidget()
+        self.global_settings.cache_spin.valueChanged.connect(lambda mb: shared_cache().set_capacity(mb << 20))
+        shared_cache().set_capacity(self.global_settings.cache_spin.value() << 20)
+
+        # Conversion settings on top, global settings below; scrolled when the window is short.
+        settings_panels = QWidget()
+        panels_layout = QVBoxLayout()
+        panels_layout.setContentsMargins(0, 0, 0, 0)
+        panels_layout.addWidget(settings_box)
+        panels_layout.addWidget(self.global_settings)
+        settings_panels.setLayout(panels_layout)
 
         # --- Process + Progress ---
         self.process_btn = QPushButton("Process")
         self.process_btn.clicked.connect(self.on_process)
 
+        self.watch_btn = QPushButton("Watch")
+        self.watch_btn.setCheckable(True)
+        self.watch_btn.setToolTip("Keep watching the input folder and convert inputs as they are exported, until stopped.")
+        self.watch_btn.toggled.connect(self.on_watch_toggled)
+
         self.progress = QProgressBar()
         self.progress.setMinimum(0)
         self.progress.setMaximum(100)
@@ -118,6 +179,7 @@ class MainWindow(QWidget):
 
         bottom = QHBoxLayout()
         bottom.addWidget(self.process_btn)
+        bottom.addWidget(self.watch_btn)
         bottom.addWidget(self.progress, 1)
 
         layout = QVBoxLayout()
@@ -125,14 +187,30 @@ class MainWindow(QWidget):
         layout.addLayout(top_row)
         layout.addLayout(output_row)
         layout.addWidget(QLabel("Detected inputs (only valid for the selected conversion type):"))
-        layout.addWidget(self.drop_list, 1)
-        layout.addWidget(settings_box)          # conversion settings on top
-        layout.addWidget(self.global_settings)  # global settings below
+        layout.addLayout(inputs_row, 1)
+        layout.addWidget(SettingsScrollArea(settings_panels))
         layout.addLayout(bottom)
         layout.addWidget(self.status_label)
         self.setLayout(layout)
 
-        self.on_conversion_changed(self.conversion_combo.currentText())
+    def paintEvent(self, event) -> None:
+        super().paintEvent(event)
+        if not self._started:
+            self._started = True
+            QTimer.singleShot(0, self._finish_startup)
+
+    def _finish_startup(self) -> None:
+        self._show_conversion_settings()
+        self._fit_to_screen()
+        self.refresh_detected_inputs()
+        self.ready.emit()
+
+    def _fit_to_screen(self) -> None:
+        """Grow the window so the settings show without scrolling, as far as the screen allows."""
+        frame = self.frameGeometry().height() - self.height()
+        height = min(self.sizeHint().height(), self.screen().availableGeometry().height() - frame)
+        if height > self.height():
+            self.resize(self.width(), height)
 
     # --- Window-level drag/drop ---
     def dragEnterEvent(self, event):
@@ -157,14 +235,22 @@ class MainWindow(QWidget):
             event.ignore()
 
     def current_conversion(self) -> ConversionDefinition:
-        name = self.conversion_combo.currentText()
-        return self._conversion_by_name[name]
+        info = self._info_by_name[self.conversion_combo.currentText()]
+        conv = self._conversions.get(info.id)
+        if conv is None:
+            conv = info.load()
+            self._settings_pages[info.id] = self.settings_stack.addWidget(conv.build_settings_widget())
+            conv.on_settings_changed(self.render_preview)
+            self._conversions[info.id] = conv
+        return conv
+
+    def _show_conversion_settings(self) -> None:
+        conv = self.current_conversion()
+        self.settings_stack.setCurrentIndex(self._settings_pages[conv.id])
 
     # --- handlers ---
     def on_conversion_changed(self, _text: str) -> None:
-        conv = self.current_conversion()
-        idx = [c.display_name for c in self._conversions].index(conv.display_name)
-        self.settings_stack.setCurrentIndex(idx)
+        self._show_conversion_settings()
         self.refresh_detected_inputs()
 
     def on_browse_input(self) -> None:
@@ -178,15 +264,19 @@ class MainWindow(QWidget):
             self.set_output_folder(Path(folder))
 
     def on_refresh_clear(self) -> None:
+        self._stop_detection()
         self.input_folder = None
         self.output_folder = None
         self.input_edit.clear()
         self.output_edit.clear()
-        self.drop_list.clear()
+        self.inputs_model.clear()
+        self._detected = []
         self.progress.setValue(0)
         self.status_label.setText("Cleared. Drop a folder or files to begin.")
 
     def on_dropped(self, paths: list) -> None:
+        if self._is_running():
+            return  # changing the input folder mid-run would detach the list from the job
         dropped_paths = [Path(p) for p in paths]
         folders = [p for p in dropped_paths if p.exists() and p.is_dir()]
         if folders:
@@ -216,44 +306,135 @@ class MainWindow(QWidget):
         if refresh:
             self.refresh_detected_inputs()
 
+    def _stop_detection(self) -> None:
+        detector = self._detector
+        if detector is None:
+            return
+        detector.requestInterruption()
+        self._retired_detectors.add(detector)
+        detector.finished.connect(lambda: self._retired_detectors.discard(detector))
+        self._detector = None
+        self.process_btn.setEnabled(True)
+
     def refresh_detected_inputs(self) -> None:
-        self.drop_list.clear()
+        self._stop_detection()
+        self._show_preview(None)
+        self.inputs_model.clear()
+        self._detected = []
 
         if not self.input_folder or not self.input_folder.exists():
             self.status_label.setText("No input folder selected.")
             return
 
-        conv = self.current_conversion()
-        detected = conv.detect_inputs(self.input_folder)
+        # Detection runs on a worker thread; results are added to the list as
+        # they arrive, and Process waits until the scan has finished.
+        self._detector = DetectWorker(self.current_conversion(), self.input_folder, self.recursive_cb.isChecked())
+        self._detector.found.connect(self.on_inputs_found)
+        self._detector.finished_scan.connect(self.on_detection_done)
+        self._detector.error.connect(self.on_detection_error)
+        self.process_btn.setEnabled(False)
+        self.status_label.setText("Scanning for inputs...")
+        self._detector.start()
+
+    def on_inputs_found(self, batch: list[DetectedInput]) -> None:
+        if self.sender() is not self._detector:
+            return  # a cancelled scan
+        self.inputs_model.append(batch)
+        self.status_label.setText(f"Scanning for inputs... {self.inputs_model.count()} found so far.")
+
+    def on_detection_done(self, detected: list[DetectedInput]) -> None:
+        if self.sender() is not self._detector:
+            return
+        self._detector = None
+        self._detected = detected
+        self.process_btn.setEnabled(True)
 
         if not detected:
-            item = QListWidgetItem("No valid inputs found for the selected conversion type.")
-            item.setFlags(item.flags() & ~Qt.ItemIsSelectable)
-            self.drop_list.addItem(item)
+            self.inputs_model.clear("No valid inputs found for the selected conversion type.")
             self.status_label.setText("Ready. No valid inputs for this conversion.")
             return
 
-        for item in detected:
-            self.drop_list.addItem(item.display_line)
-
         out_text = str(self.output_folder) if self.output_folder else "(not set)"
         self.status_label.setText(f"Ready. Detected {len(detected)} valid inputs. Output → {out_text}")
 
+    def on_detection_error(self, msg: str) -> None:
+        if self.sender() is not self._detector:
+            return
+        self._detector = None
+        self.process_btn.setEnabled(True)
+        self.status_label.setText(f"Could not scan the input folder: {msg}")
+
+    def _is_running(self) -> bool:
+        return any(w is not None and w.isRunning() for w in (self._worker, self._watcher))
+
+    # --- preview ---
+    def on_current_input_changed(self, current, _previous) -> None:
+        self._show_preview(self.inputs_model.input_at(current.row()) if current.isValid() else None)
+
+    def _show_preview(self, item: Optional[DetectedInput]) -> None:
+        self._preview_item = item
+        self._preview_sources = None
+        if item is None:
+            self._preview_next = None
+            self.preview.clear("Select an input to preview its outputs.")
+            return
+        self.preview.clear(f"Loading {item.key}...")
+        # One load at a time; while it runs only the latest selection is kept,
+        # so scrolling through the list does not queue up decodes.
+        if self._preview_worker is not None:
+            self._preview_next = item
+            return
+        self._preview_worker = PreviewWorker(self.current_conversion(), item, PREVIEW_SIZE)
+        self._preview_worker.loaded.connect(self.on_preview_loaded)
+        self._preview_worker.error.connect(self.on_preview_error)
+        self._preview_worker.finished.connect(self.on_preview_worker_done)
+        self._preview_worker.start()
+
+    def on_preview_worker_done(self) -> None:
+        self._preview_worker = None
+        item, self._preview_next = self._preview_next, None
+        if item is not None and item is self._preview_item:
+            self._show_preview(item)
+
+    def on_preview_loaded(self, key: str, sources: Any) -> None:
+        if self._preview_item is None or key != self._preview_item.key or self._preview_next is not None:
+            return  # the selection moved on
+        self._preview_sources = sources
+        self.render_preview()
+
+    def on_preview_error(self, key: str, msg: str) -> None:
+        if self._preview_item is not None and key == self._preview_item.key:
+            self.preview.clear(f"Could not load {key}: {msg}")
+
+    def render_preview(self) -> None:
+        if self._preview_sources is None or self._preview_item is None:
+            return
+        conv = self.current_conversion()
+        cfg = conv.make_job_config(self.input_folder or Path(), self.output_folder or Path(), self.global_settings.build_config())
+        start = time.perf_counter()
+        outputs = conv.render_preview(self._preview_sources, cfg)
+        ms = (time.perf_counter() - start) * 1000
+        self.preview.show_outputs(outputs, f"{self._preview_item.key}\nrendered in {ms:.1f} ms")
+
     def set_busy(self, busy: bool) -> None:
+        # The list stays enabled so per-row status can be followed during a run.
         self.process_btn.setEnabled(not busy)
-        self.drop_list.setEnabled(not busy)
+        self.watch_btn.setEnabled(not busy or self.watch_btn.isChecked())
+        self.drop_list.setAcceptDrops(not busy)
         self.conversion_combo.setEnabled(not busy)
+        self.recursive_cb.setEnabled(not busy)
 
         self.global_settings.set_enabled_for_processing(not busy)
         self.current_conversion().set_settings_enabled(not busy)
 
         if busy:
             self.progress.setValue(0)
+        self.progress.setFormat("%p%")
 
-    def on_process(self) -> None:
+    def _check_folders(self) -> bool:
         if not self.input_folder or not self.input_folder.exists():
             QMessageBox.warning(self, "No input folder", "Please select or drop an input folder containing textures.")
-            return
+            return False
 
         if not self.output_folder:
             self.output_folder = self.input_folder
@@ -261,10 +442,19 @@ class MainWindow(QWidget):
 
         if self.output_folder.exists() and not self.output_folder.is_dir():
             QMessageBox.warning(self, "Bad output folder", "Output path exists but is not a folder.")
+            return False
+        return True
+
+    def on_process(self) -> None:
+        if not self._check_folders():
+            return
+
+        if self._detector is not None:
+            self.status_label.setText("Still scanning for inputs; try again when the scan has finished.")
             return
 
         conv = self.current_conversion()
-        detected = conv.detect_inputs(self.input_folder)
+        detected = self._detected
         if not detected:
             QMessageBox.warning(self, "No inputs", "No valid inputs found for the selected conversion type.")
             return
@@ -273,19 +463,107 @@ class MainWindow(QWidget):
         cfg = conv.make_job_config(self.input_folder, self.output_folder, global_cfg)
 
         self.set_busy(True)
+        self.inputs_model.reset_status()
         self.status_label.setText("Starting...")
 
+        self._job_started = time.monotonic()
+        self._converted = 0
+        self._bytes_moved = 0
+
         self._worker = SplitWorker(conv, detected, cfg)
         self._worker.progress.connect(self.on_progress)
         self._worker.status.connect(self.on_status)
+        self._worker.item_traced.connect(self.on_item_traced)
+        self._worker.item_done.connect(self.inputs_model.set_result)
         self._worker.error.connect(self.on_error)
         self._worker.finished_ok.connect(self.on_done)
         self._worker.start()
 
+    def on_watch_toggled(self, checked: bool) -> None:
+        if not checked:
+            if self._watcher is not None:
+                # A batch in progress is finished first; the UI is released when the thread ends.
+                self._watcher.requestInterruption()
+                self.watch_btn.setEnabled(False)
+                self.status_label.setText("Stopping after the current batch...")
+            return
+
+        if not self._check_folders():
+            self.watch_btn.setChecked(False)
+            return
+
+        conv = self.current_conversion()
+        global_cfg = self.global_settings.build_config()
+        cfg = conv.make_job_config(self.input_folder, self.output_folder, global_cfg)
+
+        self.watch_btn.setText("Stop watching")
+        self.set_busy(True)
+
+        self._watcher = WatchWorker(conv, self.input_folder, self.recursive_cb.isChecked(), cfg)
+        self._watcher.batch_started.connect(self.on_watch_batch_started)
+        self._watcher.progress.connect(self.on_progress)
+        self._watcher.status.connect(self.on_status)
+        self._watcher.item_traced.connect(self.on_item_traced)
+        self._watcher.item_done.connect(self.inputs_model.set_result)
+        self._watcher.batch_done.connect(self.on_watch_batch_done)
+        self._watcher.error.connect(self.on_watch_error)
+        self._watcher.finished.connect(self.on_watch_stopped)
+        self._watcher.start()
+
+    def on_watch_batch_started(self, batch: list[DetectedInput]) -> None:
+        self.inputs_model.mark_pending(batch)
+        self._job_started = time.monotonic()
+        self._converted = 0
+        self._bytes_moved = 0
+        self.progress.setValue(0)
+        self.progress.setFormat("%p%")
+
+    def on_watch_batch_done(self, summary: str) -> None:
+        self.progress.setValue(100)
+        stamp = time.strftime("%H:%M:%S")
+        self.status_label.setText(f"[{stamp}] Converted changed inputs. {summary}".strip() + "\nWatching for exported inputs...")
+
+    def on_watch_error(self, msg: str) -> None:
+        self.status_label.setText("Stopped watching after an error.")
+        QMessageBox.critical(self, "Error", msg)
+
+    def on_watch_stopped(self) -> None:
+        if self.sender() is not self._watcher:
+            return
+        self._watcher = None
+        self.watch_btn.blockSignals(True)
+        self.watch_btn.setChecked(False)
+        self.watch_btn.blockSignals(False)
+        self.watch_btn.setText("Watch")
+        self.set_busy(False)
+        if not self.status_label.text().startswith("Stopped"):
+            self.status_label.setText("Stopped watching.")
+
+    def closeEvent(self, event) -> None:
+        # Watching never ends by itself; let the current batch finish before the window goes.
+        if self._watcher is not None:
+            self._watcher.requestInterruption()
+            self._watcher.wait()
+        if self._preview_worker is not None:
+            self._preview_worker.wait()
+        super().closeEvent(event)
+
     def on_progress(self, done: int, total: int) -> None:
         pct = int((done / total) * 100) if total else 0
         self.progress.setValue(pct)
 
+        elapsed = time.monotonic() - self._job_started
+        if self._converted == 0 or elapsed <= 0:
+            return
+        pairs_per_s = self._converted / elapsed
+        mb_per_s = self._bytes_moved / elapsed / (1 << 20)
+        eta = _format_duration((total - done) / pairs_per_s)
+        self.progress.setFormat(f"%p%  ·  {pairs_per_s:.2f} pairs/s  ·  {mb_per_s:.1f} MB/s  ·  ETA {eta}")
+
+    def on_item_traced(self, trace: ItemTrace) -> None:
+        self._converted += 1
+        self._bytes_moved += trace.bytes_read + trace.bytes_written
+
     def on_status(self, msg: str) -> None:
         self.status_label.setText(msg)
 
@@ -294,7 +572,7 @@ class MainWindow(QWidget):
         self.status_label.setText("Error.")
         QMessageBox.critical(self, "Error", msg)
 
-    def on_done(self) -> None:
+    def on_done(self, summary: str) -> None:
         self.set_busy(False)
         self.progress.setValue(100)
-        self.status_label.setText("Finished successfully.")
+        self.status_label.setText(f"Finished successfully. {summary}".strip())
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, Sequence
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtWidgets import QGridLayout, QGroupBox, QLabel
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Longest side of the proxies previews are rendered from. Small enough that
+# packing all outputs takes well under a millisecond.
+PREVIEW_SIZE = 256
+
+_TILE_PX = 128
+
+_QIMAGE_FORMATS = {
+    1: QImage.Format_Grayscale8,
+    3: QImage.Format_RGB888,
+    4: QImage.Format_RGBA8888,
+}
+
+
+def to_qimage(arr: np.ndarray) -> QImage:
+    """QImage copy of a (h, w) or (h, w, c) uint8 array."""
+    import numpy as np  # only needed once there is something to preview
+    arr = np.ascontiguousarray(arr)
+    h, w = arr.shape[:2]
+    channels = 1 if arr.ndim == 2 else arr.shape[2]
+    return QImage(arr.data, w, h, w * channels, _QIMAGE_FORMATS[channels]).copy()
+
+
+class PreviewPane(QGroupBox):
+    """The outputs of the selected input, one tile per output."""
+
+    def __init__(self) -> None:
+        super().__init__("Preview")
+        self._grid = QGridLayout()
+        self._tiles: list[tuple[QLabel, QLabel]] = []
+        self._info = QLabel()
+        self._info.setWordWrap(True)
+        self._info.setAlignment(Qt.AlignCenter)
+        self._grid.addWidget(self._info, 99, 0)
+        self.setLayout(self._grid)
+        self.setFixedWidth(_TILE_PX + 40)
+        self.clear("Select an input to preview its outputs.")
+
+    def _tile(self, n: int) -> tuple[QLabel, QLabel]:
+        while len(self._tiles) <= n:
+            caption = QLabel()
+            caption.setAlignment(Qt.AlignCenter)
+            image = QLabel()
+            image.setAlignment(Qt.AlignCenter)
+            image.setFixedSize(_TILE_PX, _TILE_PX)
+            row = 2 * len(self._tiles)
+            self._grid.addWidget(caption, row, 0)
+            self._grid.addWidget(image, row + 1, 0)
+            self._tiles.append((caption, image))
+        return self._tiles[n]
+
+    def clear(self, message: str = "") -> None:
+        for caption, image in self._tiles:
+            caption.clear()
+            image.clear()
+        self._info.setText(message)
+
+    def show_outputs(self, outputs: Sequence[tuple[str, np.ndarray]], info: Optional[str] = None) -> None:
+        for n, (suffix, arr) in enumerate(outputs):
+            caption, image = self._tile(n)
+            caption.setText(f"_{suffix}")
+            pixmap = QPixmap.fromImage(to_qimage(arr))
+            image.setPixmap(pixmap.scaled(_TILE_PX, _TILE_PX, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        for caption, image in self._tiles[len(outputs):]:
+            caption.clear()
+            image.clear()
+        self._info.setText(info or "")
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from PySide6.QtCore import QEvent, QSize, Qt
+from PySide6.QtWidgets import QFrame, QScrollArea, QWidget
+
+# Height the settings keep when the window is made as short as it goes.
+_MIN_VISIBLE_HEIGHT = 160
+
+
+class SettingsScrollArea(QScrollArea):
+    """
+    Vertical scroll area for the settings panels. It asks for the full height
+    of its contents, so they show whole when the window has room, and only
+    scrolls once the window is shorter (small laptop screens, high scaling).
+    """
+
+    def __init__(self, contents: QWidget) -> None:
+        super().__init__()
+        self.setFrameShape(QFrame.NoFrame)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setWidgetResizable(True)
+        self.setWidget(contents)
+        # The contents change height when a conversion's settings are shown or a section is unfolded.
+        contents.installEventFilter(self)
+
+    def eventFilter(self, obj, event) -> bool:
+        if obj is self.widget() and event.type() == QEvent.LayoutRequest:
+            self.updateGeometry()
+        return False
+
+    def sizeHint(self) -> QSize:
+        hint = self.widget().sizeHint()
+        return QSize(hint.width() + self.verticalScrollBar().sizeHint().width(), hint.height())
+
+    def minimumSizeHint(self) -> QSize:
+        contents = self.widget().minimumSizeHint()
+        width = contents.width() + self.verticalScrollBar().sizeHint().width()
+        return QSize(width, min(contents.height(), _MIN_VISIBLE_HEIGHT))
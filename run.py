@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import multiprocessing
+
 from SWBF2ImageTools.app import main
 
 if __name__ == "__main__":
+    # Required for the worker process pool in PyInstaller builds.
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file